@@ -7,6 +7,7 @@ class AiopsConfig(AppConfig):
 
     def ready(self):
         # Place to connect signals or preload logic
+        import aiops.signals  # noqa
         try:
             import aiops.tasks  # noqa
         except ImportError:
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-16 18:46
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def schedule_initial_scoring(apps, schema_editor):
+    # Make every open item due so the first rescore_sla_bands run scores the backlog
+    WorkItem = apps.get_model("aiops", "WorkItem")
+    WorkItem.objects.exclude(status__in=["resolved", "fulfilled", "closed"]).update(
+        smart_score_rescore_at=F("created_at")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aiops', '0006_automationexecutionlog_message'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workitem',
+            name='smart_score',
+            field=models.IntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='workitem',
+            name='smart_score_rescore_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(schedule_initial_scoring, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.30 on 2026-10-16 18:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aiops', '0007_workitem_smart_score'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='analyticsmetric',
+            index=models.Index(fields=['name', 'recorded_at'], name='aiops_metric_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='analyticsmetric',
+            index=models.Index(fields=['tenant_id', 'name', 'recorded_at'], name='aiops_metric_tenant_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assetcompliancecertificate',
+            index=models.Index(fields=['status', 'expiry_date'], name='aiops_cert_status_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assetcompliancecertificate',
+            index=models.Index(fields=['tenant_id', 'status', 'expiry_date'], name='aiops_cert_tenant_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='systemlog',
+            index=models.Index(fields=['-timestamp'], name='aiops_log_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='systemlog',
+            index=models.Index(fields=['tenant_id', '-timestamp'], name='aiops_log_tenant_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='systemlog',
+            index=models.Index(fields=['tenant_id', 'level', '-timestamp'], name='aiops_log_tenant_level_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='systemlog',
+            index=models.Index(fields=['tenant_id', 'category', '-timestamp'], name='aiops_log_tenant_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workitem',
+            index=models.Index(fields=['tenant_id', 'status', 'work_type', '-created_at'], name='aiops_wi_tenant_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workitem',
+            index=models.Index(fields=['tenant_id', '-smart_score'], name='aiops_wi_tenant_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workitem',
+            index=models.Index(fields=['-created_at', '-id'], name='aiops_wi_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workitem',
+            index=models.Index(fields=['status', 'modified_at'], name='aiops_wi_status_modified_idx'),
+        ),
+    ]
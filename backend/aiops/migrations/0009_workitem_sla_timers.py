@@ -0,0 +1,55 @@
+# Generated by Django 4.2.30 on 2026-10-16 18:50
+
+from datetime import timedelta
+from django.db import migrations, models
+
+# ESCALATION_MATRIX thresholds at the time of this migration
+ESCALATION_THRESHOLDS = {"priority_1": 60, "priority_2": 180, "priority_3": 360}
+
+
+def schedule_existing_timers(apps, schema_editor):
+    # Open items get their first threshold as the next check, so the first
+    # run_sla_checks tick reports everything already in breach once
+    WorkItem = apps.get_model("aiops", "WorkItem")
+    batch = []
+    for wi in WorkItem.objects.only("id", "created_at", "sla_target_minutes", "priority", "status").iterator(chunk_size=1000):
+        wi.sla_due_at = wi.created_at + timedelta(minutes=wi.sla_target_minutes)
+        threshold = ESCALATION_THRESHOLDS.get(wi.priority)
+        wi.sla_escalation_at = wi.created_at + timedelta(minutes=threshold) if threshold else None
+        wi.sla_next_check_at = wi.sla_due_at if wi.status in ("new", "in_progress") else None
+        batch.append(wi)
+        if len(batch) >= 1000:
+            WorkItem.objects.bulk_update(batch, ["sla_due_at", "sla_escalation_at", "sla_next_check_at"])
+            batch = []
+    WorkItem.objects.bulk_update(batch, ["sla_due_at", "sla_escalation_at", "sla_next_check_at"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aiops', '0008_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workitem',
+            name='sla_checked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='workitem',
+            name='sla_due_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='workitem',
+            name='sla_escalation_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='workitem',
+            name='sla_next_check_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(schedule_existing_timers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-16 18:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aiops', '0009_workitem_sla_timers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkItemEscalation',
+            fields=[
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('tenant_id', models.UUIDField(blank=True, null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('target', models.CharField(max_length=255)),
+                ('threshold_at', models.DateTimeField()),
+                ('work_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='escalations', to='aiops.workitem')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='workitemescalation',
+            constraint=models.UniqueConstraint(fields=('work_item', 'threshold_at'), name='aiops_wi_escalation_once'),
+        ),
+    ]
@@ -0,0 +1,139 @@
+# Generated by Django 4.2.30 on 2026-10-16 19:03
+
+from datetime import datetime, time, timedelta, timezone
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+TABLE = "aiops_systemlog"
+LEGACY = "aiops_systemlog_legacy"
+# Daily partitions created ahead of time; log maintenance keeps this window topped up
+PREMAKE_DAYS = 7
+
+
+def _table_layout(cursor, table):
+    # Secondary index definitions and foreign keys, to rebuild them on a replacement table
+    cursor.execute(
+        """
+        SELECT i.relname, pg_get_indexdef(i.oid) FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid JOIN pg_class t ON t.oid = x.indrelid
+        WHERE t.relname = %s AND NOT x.indisprimary
+        """,
+        [table],
+    )
+    indexes = cursor.fetchall()
+    cursor.execute(
+        """
+        SELECT c.conname, pg_get_constraintdef(c.oid) FROM pg_constraint c
+        JOIN pg_class t ON t.oid = c.conrelid WHERE t.relname = %s AND c.contype = 'f'
+        """,
+        [table],
+    )
+    return indexes, cursor.fetchall()
+
+
+def partition_systemlog(apps, schema_editor):
+    # Existing rows stay where they are: the old table becomes one partition covering
+    # everything before its newest day, later rows go to daily partitions
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        indexes, foreign_keys = _table_layout(cursor, TABLE)
+        cursor.execute(f'SELECT max("timestamp") FROM {TABLE}')
+        newest = cursor.fetchone()[0]
+        today = datetime.combine(datetime.now(timezone.utc).date(), time.min, tzinfo=timezone.utc)
+        boundary = today
+        if newest is not None:
+            boundary = max(today, datetime.combine(newest.astimezone(timezone.utc).date(), time.min, tzinfo=timezone.utc) + timedelta(days=1))
+
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY}")
+        # A partition can't keep its own primary key; attaching builds the (id, timestamp) one
+        cursor.execute(f"ALTER TABLE {LEGACY} DROP CONSTRAINT {TABLE}_pkey")
+        for name, _ in indexes:
+            cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{name[:56]}_legacy"')
+
+        cursor.execute(f'CREATE TABLE {TABLE} (LIKE {LEGACY} INCLUDING DEFAULTS) PARTITION BY RANGE ("timestamp")')
+        cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id, "timestamp")')
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT "{name}" {definition}')
+        for _, definition in indexes:
+            cursor.execute(definition)
+
+        cursor.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {LEGACY} FOR VALUES FROM (MINVALUE) TO (%s)", [boundary])
+        cursor.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+        day = boundary
+        while day <= today + timedelta(days=PREMAKE_DAYS):
+            cursor.execute(
+                f"CREATE TABLE {TABLE}_p{day:%Y%m%d} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)",
+                [day, day + timedelta(days=1)],
+            )
+            day += timedelta(days=1)
+
+
+def unpartition_systemlog(apps, schema_editor):
+    # Copies every attached partition back into one plain table; archived tables are left alone
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        indexes, foreign_keys = _table_layout(cursor, TABLE)
+        cursor.execute(f"CREATE TABLE {TABLE}_plain (LIKE {TABLE} INCLUDING DEFAULTS)")
+        cursor.execute(f"INSERT INTO {TABLE}_plain SELECT * FROM {TABLE}")
+        cursor.execute(f"DROP TABLE {TABLE}")
+        cursor.execute(f"ALTER TABLE {TABLE}_plain RENAME TO {TABLE}")
+        cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id)")
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT "{name}" {definition}')
+        for _, definition in indexes:
+            cursor.execute(definition.replace(" ON ONLY ", " ON "))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aiops', '0011_automationbatchjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LogRetentionPolicy',
+            fields=[
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('tenant_id', models.UUIDField(blank=True, null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('retention_days', models.IntegerField()),
+                ('action', models.CharField(default='drop', max_length=20)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='systemlogcorrelation',
+            name='log',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='correlations', to='aiops.systemlog'),
+        ),
+        migrations.CreateModel(
+            name='SystemLogRollup',
+            fields=[
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('tenant_id', models.UUIDField(blank=True, null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('resolution', models.CharField(max_length=10)),
+                ('bucket_start', models.DateTimeField()),
+                ('level', models.CharField(max_length=20)),
+                ('source', models.CharField(max_length=255)),
+                ('category', models.CharField(max_length=50)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['resolution', 'bucket_start'], name='aiops_logrollup_bucket_idx'), models.Index(fields=['tenant_id', 'resolution', 'bucket_start'], name='aiops_logrollup_tenant_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='logretentionpolicy',
+            constraint=models.UniqueConstraint(fields=('tenant_id',), name='aiops_log_retention_tenant_uniq'),
+        ),
+        migrations.RunPython(partition_systemlog, unpartition_systemlog),
+    ]
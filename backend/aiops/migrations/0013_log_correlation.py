@@ -0,0 +1,67 @@
+# Generated by Django 4.2.30 on 2026-10-16 19:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def collapse_correlations(apps, schema_editor):
+    # Correlations used to be one row per log; keep the earliest row of each id as
+    # the group and stamp the id onto every log it covered
+    SystemLog = apps.get_model("aiops", "SystemLog")
+    SystemLogCorrelation = apps.get_model("aiops", "SystemLogCorrelation")
+    seen = set()
+    for row in SystemLogCorrelation.objects.order_by("correlation_id", "created_at").iterator(chunk_size=1000):
+        SystemLog.objects.filter(id=row.log_id).update(correlation_id=row.correlation_id[:64])
+        if row.correlation_id in seen:
+            row.delete()
+        seen.add(row.correlation_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aiops', '0012_systemlog_partitioning'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='systemlog',
+            name='correlation_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='systemlogcorrelation',
+            name='asset',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='log_correlations', to='aiops.asset'),
+        ),
+        migrations.AddField(
+            model_name='systemlogcorrelation',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='systemlogcorrelation',
+            name='source',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='systemlogcorrelation',
+            name='window_start',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='systemlogcorrelation',
+            name='work_item',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='log_correlations', to='aiops.workitem'),
+        ),
+        migrations.RunPython(collapse_correlations, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='systemlogcorrelation',
+            name='correlation_id',
+            field=models.CharField(max_length=255, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='systemlog',
+            index=models.Index(fields=['correlation_id', 'timestamp'], name='aiops_log_correlation_idx'),
+        ),
+    ]
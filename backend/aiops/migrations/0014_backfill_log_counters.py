@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-16 19:10
+
+from datetime import timedelta
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import TruncDay, TruncHour, TruncMinute
+from django.utils.timezone import now
+
+# Counter resolutions and how far back each is kept, at the time of this migration
+BACKFILL = [("1d", TruncDay, None), ("1h", TruncHour, timedelta(days=90)), ("1m", TruncMinute, timedelta(days=2))]
+
+
+def backfill_log_counters(apps, schema_editor):
+    # Day rollups written by retention before counters existed cover logs that are
+    # gone, so they don't overlap with anything counted here
+    SystemLog = apps.get_model("aiops", "SystemLog")
+    SystemLogRollup = apps.get_model("aiops", "SystemLogRollup")
+    for resolution, trunc, keep in BACKFILL:
+        logs = SystemLog.objects.all()
+        if keep:
+            logs = logs.filter(timestamp__gte=now() - keep)
+        rows = (
+            logs.annotate(bucket=trunc("timestamp"))
+            .values("tenant_id", "bucket", "level", "category", "source")
+            .annotate(total=Count("id"))
+            .order_by()
+        )
+        batch = []
+        for row in rows.iterator(chunk_size=2000):
+            batch.append(SystemLogRollup(
+                resolution=resolution, tenant_id=row["tenant_id"], bucket_start=row["bucket"],
+                level=row["level"], category=row["category"], source=row["source"], count=row["total"],
+            ))
+            if len(batch) >= 2000:
+                SystemLogRollup.objects.bulk_create(batch)
+                batch = []
+        SystemLogRollup.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aiops', '0013_log_correlation'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_log_counters, migrations.RunPython.noop),
+    ]
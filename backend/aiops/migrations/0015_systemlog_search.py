@@ -0,0 +1,68 @@
+# Generated by Django 4.2.30 on 2026-10-16 19:14
+
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    # Stored generated column: PostgreSQL keeps it current on every write, partitions included.
+    # Punctuation is blanked first so words split the way FTS5 and log_search split them
+    # (the default parser keeps "db-01" and "10.0.0.7" as odd single tokens).
+    """
+    ALTER TABLE aiops_systemlog ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('simple', regexp_replace(coalesce(message, ''), '[^[:alnum:]]+', ' ', 'g'))) STORED
+    """,
+    "CREATE INDEX aiops_log_search_idx ON aiops_systemlog USING GIN (search_vector)",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS aiops_log_search_idx",
+    "ALTER TABLE aiops_systemlog DROP COLUMN IF EXISTS search_vector",
+]
+
+# External-content FTS5 index keyed on the log table's rowid, kept in sync by triggers
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE aiops_systemlog_fts USING fts5(message, content='aiops_systemlog', content_rowid='rowid')",
+    """
+    CREATE TRIGGER aiops_systemlog_fts_ai AFTER INSERT ON aiops_systemlog BEGIN
+        INSERT INTO aiops_systemlog_fts(rowid, message) VALUES (new.rowid, new.message);
+    END
+    """,
+    """
+    CREATE TRIGGER aiops_systemlog_fts_ad AFTER DELETE ON aiops_systemlog BEGIN
+        INSERT INTO aiops_systemlog_fts(aiops_systemlog_fts, rowid, message) VALUES ('delete', old.rowid, old.message);
+    END
+    """,
+    """
+    CREATE TRIGGER aiops_systemlog_fts_au AFTER UPDATE ON aiops_systemlog BEGIN
+        INSERT INTO aiops_systemlog_fts(aiops_systemlog_fts, rowid, message) VALUES ('delete', old.rowid, old.message);
+        INSERT INTO aiops_systemlog_fts(rowid, message) VALUES (new.rowid, new.message);
+    END
+    """,
+    "INSERT INTO aiops_systemlog_fts(aiops_systemlog_fts) VALUES ('rebuild')",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS aiops_systemlog_fts_ai",
+    "DROP TRIGGER IF EXISTS aiops_systemlog_fts_ad",
+    "DROP TRIGGER IF EXISTS aiops_systemlog_fts_au",
+    "DROP TABLE IF EXISTS aiops_systemlog_fts",
+]
+STATEMENTS = {"postgresql": (POSTGRES_FORWARD, POSTGRES_REVERSE), "sqlite": (SQLITE_FORWARD, SQLITE_REVERSE)}
+
+
+def run_statements(direction):
+    # Other backends get no index; log search falls back to substring matching there
+    def run(apps, schema_editor):
+        statements = STATEMENTS.get(schema_editor.connection.vendor)
+        if statements:
+            for sql in statements[direction]:
+                schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aiops', '0014_backfill_log_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_statements(0), run_statements(1)),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-16 19:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aiops', '0015_systemlog_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='systemlog',
+            index=models.Index(fields=['created_at'], name='aiops_log_created_idx'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 4.2.30 on 2026-10-16 19:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from importlib import import_module
+
+search_migration = import_module("aiops.migrations.0015_systemlog_search")
+
+
+def restore_sqlite_search(apps, schema_editor):
+    # Adding occurrences remakes the table on SQLite, dropping the FTS triggers and
+    # renumbering rowids; recreate the triggers and rebuild the index
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in search_migration.SQLITE_REVERSE[:3] + search_migration.SQLITE_FORWARD[1:]:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aiops', '0016_systemlog_created_index'),
+    ]
+
+    operations = [
+        # Runs last when unapplying, after the field removals remake the table again
+        migrations.RunPython(migrations.RunPython.noop, restore_sqlite_search),
+        migrations.CreateModel(
+            name='LogTemplate',
+            fields=[
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('tenant_id', models.UUIDField(blank=True, null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('template', models.TextField()),
+                ('template_hash', models.CharField(max_length=40, unique=True)),
+                ('token_count', models.IntegerField(default=0)),
+                ('occurrences', models.BigIntegerField(default=0)),
+                ('last_seen', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='systemlog',
+            name='collapse_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='systemlog',
+            name='last_seen',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='systemlog',
+            name='occurrences',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='systemlogrollup',
+            name='template_id',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='systemlog',
+            index=models.Index(condition=models.Q(('collapse_key__isnull', False)), fields=['collapse_key'], name='aiops_log_collapse_idx'),
+        ),
+        migrations.AddField(
+            model_name='systemlog',
+            name='template',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='logs', to='aiops.logtemplate'),
+        ),
+        migrations.RunPython(restore_sqlite_search, migrations.RunPython.noop),
+    ]
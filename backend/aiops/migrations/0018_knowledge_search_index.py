@@ -0,0 +1,84 @@
+# Generated by Django 4.2.30 on 2026-10-16 19:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import hashlib
+import json
+import re
+from collections import Counter
+
+# Frozen copy of services/kb_search.py as of this migration, so later changes to
+# the live analyzer can't change what this backfill writes
+FIELD_WEIGHTS = {"title": 3.0, "tags": 2.0, "content": 1.0}
+MAX_TERM_LENGTH = 64
+WORD_RE = re.compile(r"[^\W_]+")
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have how i in is it its of on or that the this to was were what when where which with".split()
+)
+
+
+def tokenize(text):
+    return [word for word in WORD_RE.findall((text or "").lower()) if word not in STOP_WORDS and len(word) <= MAX_TERM_LENGTH]
+
+
+def analyze(title, content, tags):
+    weighted = Counter()
+    fields = {"title": title, "content": content, "tags": " ".join(str(tag) for tag in tags or [])}
+    for name, text in fields.items():
+        for term in tokenize(text):
+            weighted[term] += FIELD_WEIGHTS[name]
+    return weighted, sum(weighted.values())
+
+
+def signature(title, content, tags):
+    return hashlib.sha1(json.dumps([title, content, tags], sort_keys=True, default=str).encode()).hexdigest()
+
+
+def index_articles(apps, schema_editor):
+    KnowledgeBaseArticle = apps.get_model("aiops", "KnowledgeBaseArticle")
+    KnowledgeSearchDocument = apps.get_model("aiops", "KnowledgeSearchDocument")
+    KnowledgeSearchPosting = apps.get_model("aiops", "KnowledgeSearchPosting")
+    for article in KnowledgeBaseArticle.objects.only("id", "title", "content", "tags").iterator(chunk_size=500):
+        terms, length = analyze(article.title, article.content, article.tags)
+        KnowledgeSearchDocument.objects.create(article_id=article.pk, length=length, signature=signature(article.title, article.content, article.tags))
+        KnowledgeSearchPosting.objects.bulk_create(
+            [KnowledgeSearchPosting(document_id=article.pk, term=term, tf=tf) for term, tf in terms.items()], batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aiops', '0017_log_templates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KnowledgeSearchDocument',
+            fields=[
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='aiops.knowledgebasearticle')),
+                ('length', models.FloatField(default=0)),
+                ('signature', models.CharField(max_length=40)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='KnowledgeSearchPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('tf', models.FloatField()),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='aiops.knowledgesearchdocument')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='knowledgesearchposting',
+            constraint=models.UniqueConstraint(fields=('term', 'document'), name='aiops_kb_posting_term_uniq'),
+        ),
+        migrations.RunPython(index_articles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-16 19:32
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_ratings(apps, schema_editor):
+    KnowledgeBaseArticle = apps.get_model("aiops", "KnowledgeBaseArticle")
+    KnowledgeFeedback = apps.get_model("aiops", "KnowledgeFeedback")
+    distributions = {}
+    for article_id, rating, n in KnowledgeFeedback.objects.values_list("article_id", "rating").annotate(n=Count("id")).order_by():
+        distributions.setdefault(article_id, {})[str(rating)] = n
+    for article_id, distribution in distributions.items():
+        KnowledgeBaseArticle.objects.filter(pk=article_id).update(
+            rating_count=sum(distribution.values()),
+            rating_sum=sum(int(rating) * n for rating, n in distribution.items()),
+            rating_distribution=distribution,
+        )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aiops', '0018_knowledge_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='knowledgebasearticle',
+            name='rating_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='knowledgebasearticle',
+            name='rating_distribution',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='knowledgebasearticle',
+            name='rating_sum',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.30 on 2026-10-16 19:35
+
+from django.db import migrations, models
+import django.utils.timezone
+import uuid
+from datetime import timedelta
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDay, TruncHour, TruncMinute
+from django.utils.timezone import now
+
+
+def downsample_history(apps, schema_editor):
+    # Every resolution straight from the samples, as far back as it is kept
+    AnalyticsMetric = apps.get_model("aiops", "AnalyticsMetric")
+    AnalyticsMetricRollup = apps.get_model("aiops", "AnalyticsMetricRollup")
+    for resolution, truncate, keep in (("1m", TruncMinute, timedelta(days=7)), ("1h", TruncHour, timedelta(days=180)), ("1d", TruncDay, None)):
+        samples = AnalyticsMetric.objects.all()
+        if keep:
+            samples = samples.filter(recorded_at__gte=now() - keep)
+        rows = samples.annotate(bucket=truncate("recorded_at")).values("tenant_id", "name", "bucket").annotate(
+            n=Count("id"), total=Sum("value"), low=Min("value"), high=Max("value"),
+        ).order_by()
+        AnalyticsMetricRollup.objects.bulk_create([
+            AnalyticsMetricRollup(
+                resolution=resolution, tenant_id=row["tenant_id"], name=row["name"], bucket_start=row["bucket"],
+                count=row["n"], value_sum=row["total"], value_min=row["low"], value_max=row["high"],
+            )
+            for row in rows.iterator()
+        ], batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aiops', '0019_knowledge_rating_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsMetricRollup',
+            fields=[
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('tenant_id', models.UUIDField(blank=True, null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('resolution', models.CharField(max_length=10)),
+                ('bucket_start', models.DateTimeField()),
+                ('name', models.CharField(max_length=100)),
+                ('count', models.BigIntegerField(default=0)),
+                ('value_sum', models.FloatField(default=0)),
+                ('value_min', models.FloatField()),
+                ('value_max', models.FloatField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['name', 'resolution', 'bucket_start'], name='aiops_metricrollup_name_idx'), models.Index(fields=['tenant_id', 'name', 'resolution', 'bucket_start'], name='aiops_metricrollup_tenant_idx')],
+            },
+        ),
+        migrations.RunPython(downsample_history, migrations.RunPython.noop),
+    ]
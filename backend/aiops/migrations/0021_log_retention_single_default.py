@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-16 20:09
+
+from django.db import migrations, models
+import django.db.models.lookups
+
+
+def keep_latest_default(apps, schema_editor):
+    # Duplicate default rows would fail the constraint; the last one written is the one in effect
+    LogRetentionPolicy = apps.get_model("aiops", "LogRetentionPolicy")
+    defaults = LogRetentionPolicy.objects.filter(tenant_id__isnull=True).order_by("-modified_at")
+    latest = defaults.first()
+    if latest:
+        defaults.exclude(pk=latest.pk).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aiops', '0020_analytics_metric_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(keep_latest_default, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='logretentionpolicy',
+            constraint=models.UniqueConstraint(django.db.models.lookups.IsNull(models.F('tenant_id'), True), condition=models.Q(('tenant_id__isnull', True)), name='aiops_log_retention_default_uniq'),
+        ),
+    ]
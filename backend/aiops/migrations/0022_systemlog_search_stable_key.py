@@ -0,0 +1,71 @@
+# Generated by Django 4.2.30 on 2026-10-16 21:02
+
+from django.db import migrations
+from importlib import import_module
+
+search_migration = import_module("aiops.migrations.0015_systemlog_search")
+
+# The log table's implicit rowid is not stable (VACUUM and table remakes renumber it),
+# so the FTS5 index is contentless and keyed on an INTEGER PRIMARY KEY of its own,
+# mapped to the log's UUID. Match and rank go through the map, never through rowid.
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER aiops_systemlog_fts_ai AFTER INSERT ON aiops_systemlog BEGIN
+        INSERT INTO aiops_systemlog_fts_ids(log_id) VALUES (new.id);
+        INSERT INTO aiops_systemlog_fts(rowid, message) VALUES (last_insert_rowid(), new.message);
+    END
+    """,
+    """
+    CREATE TRIGGER aiops_systemlog_fts_ad AFTER DELETE ON aiops_systemlog BEGIN
+        INSERT INTO aiops_systemlog_fts(aiops_systemlog_fts, rowid, message)
+            SELECT 'delete', rowid, old.message FROM aiops_systemlog_fts_ids WHERE log_id = old.id;
+        DELETE FROM aiops_systemlog_fts_ids WHERE log_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER aiops_systemlog_fts_au AFTER UPDATE OF message ON aiops_systemlog BEGIN
+        INSERT INTO aiops_systemlog_fts(aiops_systemlog_fts, rowid, message)
+            SELECT 'delete', rowid, old.message FROM aiops_systemlog_fts_ids WHERE log_id = old.id;
+        INSERT INTO aiops_systemlog_fts(rowid, message)
+            SELECT rowid, new.message FROM aiops_systemlog_fts_ids WHERE log_id = new.id;
+    END
+    """,
+]
+SQLITE_FORWARD = [
+    *search_migration.SQLITE_REVERSE,
+    "CREATE TABLE aiops_systemlog_fts_ids (rowid INTEGER PRIMARY KEY, log_id char(32) NOT NULL UNIQUE)",
+    "CREATE VIRTUAL TABLE aiops_systemlog_fts USING fts5(message, content='')",
+    *SQLITE_TRIGGERS,
+    "INSERT INTO aiops_systemlog_fts_ids(log_id) SELECT id FROM aiops_systemlog",
+    """
+    INSERT INTO aiops_systemlog_fts(rowid, message)
+    SELECT ids.rowid, log.message FROM aiops_systemlog_fts_ids ids JOIN aiops_systemlog log ON log.id = ids.log_id
+    """,
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS aiops_systemlog_fts_ai",
+    "DROP TRIGGER IF EXISTS aiops_systemlog_fts_ad",
+    "DROP TRIGGER IF EXISTS aiops_systemlog_fts_au",
+    "DROP TABLE IF EXISTS aiops_systemlog_fts",
+    "DROP TABLE IF EXISTS aiops_systemlog_fts_ids",
+    *search_migration.SQLITE_FORWARD,
+]
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == "sqlite":
+            for sql in statements:
+                schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aiops', '0021_log_retention_single_default'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_statements(SQLITE_FORWARD), run_statements(SQLITE_REVERSE)),
+    ]
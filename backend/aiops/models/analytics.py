@@ -15,6 +15,28 @@ class AnalyticsMetric(UUIDModel, TimeStampedModel, TenantScopedModel):
     value = models.FloatField()
     recorded_at = models.DateTimeField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["name", "recorded_at"], name="aiops_metric_name_idx"),
+            models.Index(fields=["tenant_id", "name", "recorded_at"], name="aiops_metric_tenant_name_idx"),
+        ]
+
+class AnalyticsMetricRollup(UUIDModel, TimeStampedModel, TenantScopedModel):
+    # Samples of one metric per bucket, rebuilt from AnalyticsMetric by services/metric_series.py
+    resolution = models.CharField(max_length=10)  # 1m, 1h, 1d
+    bucket_start = models.DateTimeField()
+    name = models.CharField(max_length=100)
+    count = models.BigIntegerField(default=0)
+    value_sum = models.FloatField(default=0)
+    value_min = models.FloatField()
+    value_max = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["name", "resolution", "bucket_start"], name="aiops_metricrollup_name_idx"),
+            models.Index(fields=["tenant_id", "name", "resolution", "bucket_start"], name="aiops_metricrollup_tenant_idx"),
+        ]
+
 class FinancialImpact(UUIDModel, TimeStampedModel, TenantScopedModel):
     work_item = models.OneToOneField(WorkItem, related_name="financial_impact", on_delete=models.CASCADE)
     estimated_cost = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
@@ -28,6 +28,12 @@ class AssetComplianceCertificate(UUIDModel, TimeStampedModel, TenantScopedModel)
     expiry_date = models.DateField()
     status = models.CharField(max_length=50)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "expiry_date"], name="aiops_cert_status_expiry_idx"),
+            models.Index(fields=["tenant_id", "status", "expiry_date"], name="aiops_cert_tenant_status_idx"),
+        ]
+
 class AssetCostTracking(UUIDModel, TimeStampedModel, TenantScopedModel):
     asset = models.OneToOneField(Asset, related_name="cost_tracking", on_delete=models.CASCADE)
     monthly_operating_cost = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
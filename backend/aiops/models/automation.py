@@ -26,8 +26,22 @@ class AutomationExecutionStep(UUIDModel, TimeStampedModel, TenantScopedModel):
     action = models.CharField(max_length=255)
     params = models.JSONField(default=dict)
 
+class AutomationBatchJob(UUIDModel, TimeStampedModel, TenantScopedModel):
+    # One rule run across many WorkItems; chunk tasks advance the counters
+    rule = models.ForeignKey(AutomationRule, related_name="batch_jobs", on_delete=models.CASCADE)
+    status = models.CharField(max_length=20, default="queued")  # queued, running, completed, cancelled, failed
+    total = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    succeeded = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    concurrency = models.IntegerField(default=4)
+    chunk_size = models.IntegerField(default=50)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
 class AutomationExecutionLog(UUIDModel, TimeStampedModel, TenantScopedModel):
     rule = models.ForeignKey(AutomationRule, related_name="logs", on_delete=models.CASCADE)
+    batch_job = models.ForeignKey(AutomationBatchJob, null=True, blank=True, related_name="logs", on_delete=models.SET_NULL)
     work_item = models.ForeignKey(WorkItem, on_delete=models.CASCADE)
     status = models.CharField(max_length=50)
     message = models.CharField(max_length=500)    
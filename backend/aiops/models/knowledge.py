@@ -1,5 +1,5 @@
 from django.db import models
-from .mixins import TimeStampedModel, TenantScopedModel
+from .mixins import ChangeTrackingModel, TimeStampedModel, TenantScopedModel
 
 import uuid
 class UUIDModel(models.Model):
@@ -8,7 +8,7 @@ class UUIDModel(models.Model):
     class Meta:
         abstract = True
 
-class KnowledgeBaseArticle(UUIDModel, TimeStampedModel, TenantScopedModel):
+class KnowledgeBaseArticle(ChangeTrackingModel, UUIDModel, TimeStampedModel, TenantScopedModel):
     title = models.CharField(max_length=255)
     knowledge_type = models.CharField(max_length=50)  # howto, faq, troubleshooting
     difficulty_level = models.CharField(max_length=50, default="medium")
@@ -16,9 +16,35 @@ class KnowledgeBaseArticle(UUIDModel, TimeStampedModel, TenantScopedModel):
     applicable_work_types = models.JSONField(default=list)
     tags = models.JSONField(default=list)
     view_count = models.IntegerField(default=0)
+    # Running totals of the article's feedback, kept by services/kb_ratings.py
+    rating_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    # Feedback count per rating, keyed by the rating as a string
+    rating_distribution = models.JSONField(default=dict, blank=True)
+
+    @property
+    def average_rating(self):
+        return round(self.rating_sum / self.rating_count, 2) if self.rating_count else 0
 
 class KnowledgeFeedback(UUIDModel, TimeStampedModel, TenantScopedModel):
     article = models.ForeignKey(KnowledgeBaseArticle, related_name="feedback", on_delete=models.CASCADE)
     user = models.UUIDField(null=True, blank=True)
     rating = models.IntegerField()
     comment = models.TextField(blank=True)
+
+# Inverted index over articles for services/kb_search.py, kept current on save
+class KnowledgeSearchDocument(TimeStampedModel):
+    article = models.OneToOneField(KnowledgeBaseArticle, primary_key=True, related_name="search_document", on_delete=models.CASCADE)
+    # Field-weighted token count of title, tags and content
+    length = models.FloatField(default=0)
+    # sha1 of the indexed fields, to skip saves that don't change them
+    signature = models.CharField(max_length=40)
+
+class KnowledgeSearchPosting(models.Model):
+    document = models.ForeignKey(KnowledgeSearchDocument, related_name="postings", on_delete=models.CASCADE)
+    term = models.CharField(max_length=64)
+    # Field-weighted term frequency
+    tf = models.FloatField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["term", "document"], name="aiops_kb_posting_term_uniq")]
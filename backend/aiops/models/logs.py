@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.lookups import IsNull
 from .mixins import TimeStampedModel, TenantScopedModel
 from .assets import Asset
 from .workitems import WorkItem
@@ -10,6 +11,18 @@ class UUIDModel(models.Model):
     class Meta:
         abstract = True
 
+# A message template mined at ingest (Drain-style): the message with its variable
+# tokens replaced by <*>. The text generalizes as more messages join it.
+class LogTemplate(UUIDModel, TimeStampedModel, TenantScopedModel):
+    template = models.TextField()
+    # Identity of the template: sha1 of tenant and the text it started from
+    template_hash = models.CharField(max_length=40, unique=True)
+    token_count = models.IntegerField(default=0)
+    occurrences = models.BigIntegerField(default=0)
+    last_seen = models.DateTimeField(null=True, blank=True)
+
+# On PostgreSQL the table is range-partitioned by day on timestamp (migration 0012),
+# so the database primary key is (id, timestamp) and nothing may hold a real FK to it
 class SystemLog(UUIDModel, TimeStampedModel, TenantScopedModel):
     timestamp = models.DateTimeField()
     level = models.CharField(max_length=20)
@@ -19,7 +32,66 @@ class SystemLog(UUIDModel, TimeStampedModel, TenantScopedModel):
     asset = models.ForeignKey(Asset, null=True, blank=True, on_delete=models.SET_NULL)
     work_item = models.ForeignKey(WorkItem, null=True, blank=True, on_delete=models.SET_NULL)
     tags = models.JSONField(default=list)
+    # Assigned by the log correlator when the row is written
+    correlation_id = models.CharField(max_length=64, null=True, blank=True)
+    template = models.ForeignKey(LogTemplate, null=True, blank=True, on_delete=models.SET_NULL, related_name="logs")
+    # Bulk ingest folds repeats within SYSTEMLOG_COLLAPSE_WINDOW into one row: timestamp
+    # is the first occurrence, last_seen the latest
+    occurrences = models.PositiveIntegerField(default=1)
+    last_seen = models.DateTimeField(null=True, blank=True)
+    collapse_key = models.CharField(max_length=64, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["correlation_id", "timestamp"], name="aiops_log_correlation_idx"),
+            models.Index(fields=["-timestamp"], name="aiops_log_timestamp_idx"),
+            models.Index(fields=["tenant_id", "-timestamp"], name="aiops_log_tenant_ts_idx"),
+            models.Index(fields=["tenant_id", "level", "-timestamp"], name="aiops_log_tenant_level_idx"),
+            models.Index(fields=["tenant_id", "category", "-timestamp"], name="aiops_log_tenant_category_idx"),
+            # Live tail cursor
+            models.Index(fields=["created_at"], name="aiops_log_created_idx"),
+            models.Index(fields=["collapse_key"], name="aiops_log_collapse_idx", condition=models.Q(collapse_key__isnull=False)),
+        ]
 
+# One row per correlated group of logs: same tenant, scope (asset, else work item, else
+# source) and message fingerprint within one time window
 class SystemLogCorrelation(UUIDModel, TimeStampedModel, TenantScopedModel):
-    correlation_id = models.CharField(max_length=255)
-    log = models.ForeignKey(SystemLog, related_name="correlations", on_delete=models.CASCADE)
+    correlation_id = models.CharField(max_length=255, unique=True)
+    # First log of the group. Retention drops logs wholesale; orphaned correlations
+    # are swept by log maintenance
+    log = models.ForeignKey(SystemLog, related_name="correlations", on_delete=models.DO_NOTHING, db_constraint=False)
+    asset = models.ForeignKey(Asset, null=True, blank=True, on_delete=models.SET_NULL, related_name="log_correlations")
+    work_item = models.ForeignKey(WorkItem, null=True, blank=True, on_delete=models.SET_NULL, related_name="log_correlations")
+    source = models.CharField(max_length=255, blank=True, default="")
+    fingerprint = models.CharField(max_length=64, blank=True, default="")
+    window_start = models.DateTimeField(null=True, blank=True)
+
+class LogRetentionPolicy(UUIDModel, TimeStampedModel, TenantScopedModel):
+    # A row without tenant_id overrides the SYSTEMLOG_RETENTION_* defaults
+    retention_days = models.IntegerField()
+    action = models.CharField(max_length=20, default="drop")  # drop, archive
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tenant_id"], name="aiops_log_retention_tenant_uniq"),
+            # NULLs never collide in the constraint above; at most one default row
+            models.UniqueConstraint(
+                IsNull(models.F("tenant_id"), True), condition=models.Q(tenant_id__isnull=True), name="aiops_log_retention_default_uniq",
+            ),
+        ]
+
+class SystemLogRollup(UUIDModel, TimeStampedModel, TenantScopedModel):
+    # Log counts per bucket, kept after the raw rows are deleted
+    resolution = models.CharField(max_length=10)  # 1d
+    bucket_start = models.DateTimeField()
+    level = models.CharField(max_length=20)
+    source = models.CharField(max_length=255)
+    category = models.CharField(max_length=50)
+    template_id = models.UUIDField(null=True, blank=True)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["resolution", "bucket_start"], name="aiops_logrollup_bucket_idx"),
+            models.Index(fields=["tenant_id", "resolution", "bucket_start"], name="aiops_logrollup_tenant_idx"),
+        ]
@@ -20,3 +20,27 @@ class TenantScopedModel(models.Model):
 
     class Meta:
         abstract = True
+
+class ChangeTrackingModel(models.Model):
+    # Remembers the values an instance was loaded or last saved with, so save hooks
+    # can skip work when the fields they depend on are unchanged
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def has_changed(self, *fields):
+        """Whether any of the fields (attnames) differ from the stored row; unsaved and unloaded fields count as changed."""
+        loaded = getattr(self, "_loaded_values", None)
+        if self._state.adding or loaded is None:
+            return True
+        return any(field not in loaded or loaded[field] != getattr(self, field) for field in fields)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = {field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields if field.attname in self.__dict__}
@@ -1,5 +1,5 @@
 from django.db import models
-from .mixins import TimeStampedModel, TenantScopedModel
+from .mixins import ChangeTrackingModel, TimeStampedModel, TenantScopedModel
 from .customers import Customer
 from .services import BusinessService
 from .assets import Asset
@@ -12,7 +12,7 @@ class UUIDModel(models.Model):
     class Meta:
         abstract = True
 
-class WorkItem(UUIDModel, TimeStampedModel, TenantScopedModel):
+class WorkItem(ChangeTrackingModel, UUIDModel, TimeStampedModel, TenantScopedModel):
     title = models.CharField(max_length=255)
     description = models.TextField()
     work_type = models.CharField(max_length=50)  # incident, request, problem
@@ -31,6 +31,22 @@ class WorkItem(UUIDModel, TimeStampedModel, TenantScopedModel):
     assigned_team = models.ForeignKey("Team", null=True, blank=True, on_delete=models.SET_NULL, related_name="assigned_work_items")
     # Instead of single FK to asset, allow multiple if JSON requires
     related_assets = models.ManyToManyField("Asset", blank=True, related_name="related_work_items")
+    # Persisted smart score (services.scoring), refreshed on save and when the SLA band changes
+    smart_score = models.IntegerField(default=0, db_index=True)
+    smart_score_rescore_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # SLA deadlines (services.sla_timers); run_sla_checks only reads items whose next check is due
+    sla_due_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    sla_escalation_at = models.DateTimeField(null=True, blank=True)
+    sla_checked_at = models.DateTimeField(null=True, blank=True)
+    sla_next_check_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["tenant_id", "status", "work_type", "-created_at"], name="aiops_wi_tenant_status_idx"),
+            models.Index(fields=["tenant_id", "-smart_score"], name="aiops_wi_tenant_score_idx"),
+            models.Index(fields=["-created_at", "-id"], name="aiops_wi_created_idx"),
+            models.Index(fields=["status", "modified_at"], name="aiops_wi_status_modified_idx"),
+        ]
 
 
 class WorkItemCommunication(UUIDModel, TimeStampedModel, TenantScopedModel):
@@ -46,3 +62,14 @@ class WorkItemVendorOrder(UUIDModel, TimeStampedModel, TenantScopedModel):
 class WorkItemChangeRelation(UUIDModel, TimeStampedModel, TenantScopedModel):
  work_item = models.ForeignKey(WorkItem, related_name="related_changes", on_delete=models.CASCADE)
  change_request = models.ForeignKey("ChangeRequest", null=True, blank=True, on_delete=models.SET_NULL)
+
+# One row per escalation already sent for an SLA threshold of a work item
+class WorkItemEscalation(UUIDModel, TimeStampedModel, TenantScopedModel):
+    work_item = models.ForeignKey(WorkItem, related_name="escalations", on_delete=models.CASCADE)
+    target = models.CharField(max_length=255)
+    threshold_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["work_item", "threshold_at"], name="aiops_wi_escalation_once"),
+        ]
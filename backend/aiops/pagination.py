@@ -0,0 +1,8 @@
+from rest_framework.pagination import CursorPagination
+
+class WorkItemCursorPagination(CursorPagination):
+    """Keyset pagination on (created_at, id): deep pages cost the same as the first one."""
+    ordering = ("-created_at", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
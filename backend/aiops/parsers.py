@@ -0,0 +1,20 @@
+import json
+from rest_framework.parsers import BaseParser
+
+class NDJSONParser(BaseParser):
+    """Newline-delimited JSON, parsed lazily so large bodies are never held in memory at once."""
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return iter_ndjson(stream)
+
+def iter_ndjson(stream):
+    """Yield (line_number, record, error) for every non-blank line of an NDJSON stream."""
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line), None
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from ..models.assets import Asset, AssetConfigurationItem, AssetComplianceCertificate, AssetCostTracking
+from .mixins import EagerLoadingMixin
 
 class AssetConfigurationItemSerializer(serializers.ModelSerializer):
     class Meta:
@@ -16,7 +17,7 @@ class AssetCostTrackingSerializer(serializers.ModelSerializer):
         model = AssetCostTracking
         fields = "__all__"
 
-class AssetSerializer(serializers.ModelSerializer):
+class AssetSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     configuration_items = AssetConfigurationItemSerializer(many=True, read_only=True)
     compliance_certificates = AssetComplianceCertificateSerializer(many=True, read_only=True)
     cost_tracking = AssetCostTrackingSerializer(read_only=True)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from ..models.automation import AutomationRule, AutomationTriggerCondition, AutomationExecutionStep, AutomationExecutionLog
+from ..models.automation import AutomationRule, AutomationTriggerCondition, AutomationExecutionStep, AutomationExecutionLog, AutomationBatchJob
+from .mixins import EagerLoadingMixin
 
 class AutomationTriggerConditionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -11,7 +12,7 @@ class AutomationExecutionStepSerializer(serializers.ModelSerializer):
         model = AutomationExecutionStep
         fields = "__all__"
 
-class AutomationRuleSerializer(serializers.ModelSerializer):
+class AutomationRuleSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     trigger_conditions = AutomationTriggerConditionSerializer(many=True, read_only=True)
     execution_steps = AutomationExecutionStepSerializer(many=True, read_only=True)
 
@@ -23,3 +24,8 @@ class AutomationExecutionLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = AutomationExecutionLog
         fields = "__all__"
+
+class AutomationBatchJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AutomationBatchJob
+        fields = "__all__"
@@ -2,13 +2,14 @@ from rest_framework import serializers
 from ..models.customers import Customer, CustomerEscalationContact
 from ..models.contracts import Contract, SLATarget, PenaltyClause
 from ..models.vendors import Vendor
+from .mixins import EagerLoadingMixin
 
 class CustomerEscalationContactSerializer(serializers.ModelSerializer):
     class Meta:
         model = CustomerEscalationContact
         fields = "__all__"
 
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     escalation_contacts = CustomerEscalationContactSerializer(many=True, read_only=True)
 
     class Meta:
@@ -25,7 +26,7 @@ class PenaltyClauseSerializer(serializers.ModelSerializer):
         model = PenaltyClause
         fields = "__all__"
 
-class ContractSerializer(serializers.ModelSerializer):
+class ContractSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     sla_targets = SLATargetSerializer(many=True, read_only=True)
     penalty_clauses = PenaltyClauseSerializer(many=True, read_only=True)
 
@@ -1,12 +1,13 @@
 from rest_framework import serializers
 from ..models.governance import OperationalCategory, ChangeRequest, RiskRegister
+from .mixins import EagerLoadingMixin
 
 class OperationalCategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = OperationalCategory
         fields = "__all__"
 
-class ChangeRequestSerializer(serializers.ModelSerializer):
+class ChangeRequestSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = ChangeRequest
         fields = "__all__"
@@ -1,14 +1,19 @@
 from rest_framework import serializers
 from ..models.knowledge import KnowledgeBaseArticle, KnowledgeFeedback
+from .mixins import EagerLoadingMixin, SparseFieldsetMixin
 
 class KnowledgeFeedbackSerializer(serializers.ModelSerializer):
     class Meta:
         model = KnowledgeFeedback
         fields = "__all__"
 
-class KnowledgeBaseArticleSerializer(serializers.ModelSerializer):
+class KnowledgeBaseArticleSerializer(EagerLoadingMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     feedback = KnowledgeFeedbackSerializer(many=True, read_only=True)
+    average_rating = serializers.FloatField(read_only=True)
 
     class Meta:
         model = KnowledgeBaseArticle
         fields = "__all__"
+        read_only_fields = ("rating_count", "rating_sum", "rating_distribution")
+        # List responses carry the rating summary; ?expand=feedback adds the rows
+        expandable_fields = ("feedback",)
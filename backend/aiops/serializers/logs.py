@@ -1,14 +1,47 @@
 from rest_framework import serializers
-from ..models.logs import SystemLog, SystemLogCorrelation
+from ..models.logs import SystemLog, SystemLogCorrelation, LogRetentionPolicy, LogTemplate
+from .mixins import EagerLoadingMixin
 
 class SystemLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = SystemLog
         fields = "__all__"
+        read_only_fields = ["correlation_id", "template", "occurrences", "last_seen", "collapse_key"]
 
-class SystemLogCorrelationSerializer(serializers.ModelSerializer):
+class SystemLogCorrelationSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     log = SystemLogSerializer(read_only=True)
 
     class Meta:
         model = SystemLogCorrelation
         fields = "__all__"
+
+class LogRetentionPolicySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LogRetentionPolicy
+        fields = "__all__"
+
+    def validate_retention_days(self, value):
+        if value < 1:
+            raise serializers.ValidationError("Must be at least one day")
+        return value
+
+    def validate_action(self, value):
+        if value not in ("drop", "archive"):
+            raise serializers.ValidationError("Must be drop or archive")
+        return value
+
+    def validate(self, attrs):
+        # One default (tenant-less) policy; aiops_log_retention_default_uniq backs this up
+        tenant_id = attrs.get("tenant_id", getattr(self.instance, "tenant_id", None))
+        if tenant_id is None:
+            defaults = LogRetentionPolicy.objects.filter(tenant_id__isnull=True)
+            if self.instance is not None:
+                defaults = defaults.exclude(pk=self.instance.pk)
+            if defaults.exists():
+                raise serializers.ValidationError({"tenant_id": "A default policy without tenant_id already exists"})
+        return attrs
+
+class LogTemplateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LogTemplate
+        fields = "__all__"
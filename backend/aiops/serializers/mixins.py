@@ -0,0 +1,68 @@
+# Shared serializer behaviour
+from rest_framework import serializers
+
+def _split_param(value):
+    return {name.strip() for name in (value or "").split(",") if name.strip()}
+
+class SparseFieldsetMixin:
+    """
+    Lets clients shape the response through query params:
+    ?fields=a,b renders only those fields, and nested relations named in
+    Meta.expandable_fields are left out of list responses unless asked for
+    with ?expand=a,b (or named in ?fields=).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None:
+            return
+        fields = _split_param(request.query_params.get("fields"))
+        expand = _split_param(request.query_params.get("expand")) | fields
+        view = self.context.get("view")
+        if getattr(view, "action", None) == "list":
+            for name in getattr(self.Meta, "expandable_fields", ()):
+                if name not in expand:
+                    self.fields.pop(name, None)
+        if fields:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+
+class EagerLoadingMixin:
+    """
+    Derives the select_related/prefetch_related a queryset needs to render this
+    serializer without per-row queries: nested serializers and many-to-many
+    primary key fields are followed recursively. Relations used outside declared
+    fields (e.g. by SerializerMethodField) go in Meta.select_related and
+    Meta.prefetch_related. Only fields this instance will render are considered,
+    so relations trimmed by SparseFieldsetMixin are not loaded.
+    """
+
+    def setup_eager_loading(self, queryset):
+        select, prefetch = _eager_lookups(self)
+        select += list(getattr(self.Meta, "select_related", ()))
+        prefetch += list(getattr(self.Meta, "prefetch_related", ()))
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+def _eager_lookups(serializer, prefix="", through_prefetch=False):
+    select, prefetch = [], []
+    for field in serializer.fields.values():
+        if field.write_only or field.source == "*" or "." in field.source:
+            continue
+        path = prefix + field.source
+        if isinstance(field, serializers.ManyRelatedField):
+            prefetch.append(path)
+        elif isinstance(field, serializers.ListSerializer):
+            prefetch.append(path)
+            _, nested = _eager_lookups(field.child, path + "__", through_prefetch=True)
+            prefetch += nested
+        elif isinstance(field, serializers.BaseSerializer):
+            (prefetch if through_prefetch else select).append(path)
+            nested_select, nested_prefetch = _eager_lookups(field, path + "__", through_prefetch)
+            select += nested_select
+            prefetch += nested_prefetch
+    return select, prefetch
@@ -1,19 +1,20 @@
 from rest_framework import serializers
 from ..models.core import ExternalUser, Team, TeamMembership
+from .mixins import EagerLoadingMixin
 
 class ExternalUserSerializer(serializers.ModelSerializer):
     class Meta:
         model = ExternalUser
         fields = "__all__"
 
-class TeamMembershipSerializer(serializers.ModelSerializer):
+class TeamMembershipSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     user = ExternalUserSerializer(read_only=True)
 
     class Meta:
         model = TeamMembership
         fields = "__all__"
 
-class TeamSerializer(serializers.ModelSerializer):
+class TeamSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     memberships = TeamMembershipSerializer(many=True, read_only=True)
 
     class Meta:
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from ..models.services import BusinessService, ServiceComponent, ServiceComplianceRequirement
+from .mixins import EagerLoadingMixin
 
 class ServiceComponentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -11,7 +12,7 @@ class ServiceComplianceRequirementSerializer(serializers.ModelSerializer):
         model = ServiceComplianceRequirement
         fields = "__all__"
 
-class BusinessServiceSerializer(serializers.ModelSerializer):
+class BusinessServiceSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     components = ServiceComponentSerializer(many=True, read_only=True)
     compliance_requirements = ServiceComplianceRequirementSerializer(many=True, read_only=True)
 
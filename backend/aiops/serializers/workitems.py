@@ -3,6 +3,7 @@ from ..models.workitems import (
     WorkItem, WorkItemCommunication, WorkItemVendorOrder, WorkItemChangeRelation
 )
 from ..models.analytics import FinancialImpact
+from .mixins import EagerLoadingMixin, SparseFieldsetMixin
 
 class WorkItemCommunicationSerializer(serializers.ModelSerializer):
     class Meta:
@@ -24,7 +25,7 @@ class FinancialImpactSerializer(serializers.ModelSerializer):
         model = FinancialImpact
         fields = "__all__"
 
-class WorkItemSerializer(serializers.ModelSerializer):
+class WorkItemSerializer(EagerLoadingMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     communications = WorkItemCommunicationSerializer(many=True, read_only=True)
     vendor_orders = WorkItemVendorOrderSerializer(many=True, read_only=True)
     related_changes = WorkItemChangeRelationSerializer(many=True, read_only=True)
@@ -33,3 +34,4 @@ class WorkItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = WorkItem
         fields = "__all__"
+        expandable_fields = ("communications", "vendor_orders", "related_changes", "financial_impact")
@@ -1,23 +1,201 @@
-# Automation eligibility + step runner
+# Automation eligibility (steps are run by automation_runner)
+import time
+from collections import defaultdict, deque
+from django.core.cache import cache
+from django.db import transaction
 from ..models.automation import AutomationRule, AutomationTriggerCondition
 
+# Other processes pick up rule changes through the shared cache version; without
+# a shared cache, a compiled index is rebuilt at least this often
+RULE_INDEX_TTL = 60
+RULE_INDEX_VERSION_KEY = "aiops:automation_rule_index:version"
+
 def is_work_item_eligible_for_automation(work_item, rule: AutomationRule):
-    for cond in rule.trigger_conditions.all():
-        if cond.work_types and work_item.work_type not in cond.work_types:
+    return get_rule_index().is_eligible(rule.id, *automation_attributes(work_item))
+
+def automation_attributes(work_item):
+    """The (work_type, asset_type, text) a WorkItem is matched on."""
+    asset_type = work_item.asset.asset_type if work_item.asset_id else None
+    return work_item.work_type, asset_type, automation_text(work_item.title, work_item.description)
+
+def automation_text(title, description):
+    return (title or "").lower() + (description or "").lower()
+
+def rule_candidates(rule_id, queryset, index=None):
+    """Narrow a WorkItem queryset to the work and asset types a rule can accept, in SQL."""
+    index = index or get_rule_index()
+    if index.work_types.get(rule_id) is not None:
+        queryset = queryset.filter(work_type__in=index.work_types[rule_id])
+    if index.asset_types.get(rule_id) is not None:
+        queryset = queryset.filter(asset__asset_type__in=index.asset_types[rule_id])
+    return queryset
+
+def eligible_work_items(rule_id, queryset):
+    """(id, title) of the WorkItems in the queryset a rule is eligible for."""
+    index = get_rule_index()
+    for pk, title, description, work_type, asset_type in rule_candidates(rule_id, queryset, index).values_list(
+        "id", "title", "description", "work_type", "asset__asset_type"
+    ).iterator(chunk_size=2000):
+        if index.is_eligible(rule_id, work_type, asset_type, automation_text(title, description)):
+            yield pk, title
+
+def evaluate_work_items(queryset):
+    """
+    Map every WorkItem in the queryset to the ids of the rules it is eligible for.
+    Items and their asset types come from one query; the compiled rule index adds
+    two more only when it has to be rebuilt.
+    """
+    index = get_rule_index()
+    return {
+        pk: index.match(work_type, asset_type, automation_text(title, description))
+        for pk, title, description, work_type, asset_type in queryset.values_list(
+            "id", "title", "description", "work_type", "asset__asset_type"
+        ).iterator(chunk_size=2000)
+    }
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton: reports every keyword contained in a text in a single scan."""
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [frozenset()]
+        for keyword in keywords:
+            node = 0
+            for ch in keyword:
+                if ch not in self._goto[node]:
+                    self._goto[node][ch] = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(frozenset())
+                node = self._goto[node][ch]
+            self._out[node] = self._out[node] | {keyword}
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                self._out[child] = self._out[child] | self._out[self._fail[child]]
+
+    def matches(self, text):
+        found = set()
+        node = 0
+        for ch in text:
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            if self._out[node]:
+                found |= self._out[node]
+        return found
+
+
+class RuleIndex:
+    """
+    All automation rules compiled for matching, equivalent to running
+    is_work_item_eligible_for_automation rule by rule: a rule applies when every
+    one of its trigger conditions passes. Rules are bucketed by the work types and
+    asset types they accept, and every keyword is folded into one automaton so an
+    item's text is scanned once for all rules.
+    """
+
+    def __init__(self, rules):
+        # rules: [(rule_id, [(work_types, asset_types, keywords), ...]), ...]
+        self.rule_ids = [rule_id for rule_id, _ in rules]
+        self.work_types = {}
+        self.asset_types = {}
+        self.keyword_groups = {}
+        self._by_work_type = defaultdict(set)
+        self._any_work_type = set()
+        self._by_asset_type = defaultdict(set)
+        self._any_asset_type = set()
+        keywords = set()
+        for rule_id, conditions in rules:
+            work_types = asset_types = None
+            groups = []
+            for cond_work_types, cond_asset_types, cond_keywords in conditions:
+                if cond_work_types:
+                    work_types = set(cond_work_types) if work_types is None else work_types & set(cond_work_types)
+                if cond_asset_types:
+                    asset_types = set(cond_asset_types) if asset_types is None else asset_types & set(cond_asset_types)
+                if cond_keywords:
+                    group = {kw.lower() for kw in cond_keywords}
+                    if "" not in group:  # the empty keyword matches any text
+                        groups.append(frozenset(group))
+                        keywords |= group
+            self.work_types[rule_id] = work_types
+            self.asset_types[rule_id] = asset_types
+            self.keyword_groups[rule_id] = groups
+            if work_types is None:
+                self._any_work_type.add(rule_id)
+            for work_type in work_types or ():
+                self._by_work_type[work_type].add(rule_id)
+            if asset_types is None:
+                self._any_asset_type.add(rule_id)
+            for asset_type in asset_types or ():
+                self._by_asset_type[asset_type].add(rule_id)
+        self._automaton = KeywordAutomaton(keywords)
+
+    def match(self, work_type, asset_type, text):
+        """Ids of every rule the item is eligible for, in rule order."""
+        candidates = (self._any_work_type | self._by_work_type.get(work_type, set())) & (
+            self._any_asset_type | self._by_asset_type.get(asset_type, set())
+        )
+        if any(self.keyword_groups[rule_id] for rule_id in candidates):
+            found = self._automaton.matches(text)
+            candidates = {
+                rule_id for rule_id in candidates
+                if all(group & found for group in self.keyword_groups[rule_id])
+            }
+        return [rule_id for rule_id in self.rule_ids if rule_id in candidates]
+
+    def is_eligible(self, rule_id, work_type, asset_type, text):
+        if rule_id not in self.work_types:
+            return False
+        work_types, asset_types = self.work_types[rule_id], self.asset_types[rule_id]
+        if work_types is not None and work_type not in work_types:
             return False
-        if cond.asset_types and (not work_item.asset or work_item.asset.asset_type not in cond.asset_types):
+        if asset_types is not None and asset_type not in asset_types:
             return False
-        if cond.keywords:
-            if not any(kw.lower() in (work_item.title.lower() + work_item.description.lower()) for kw in cond.keywords):
-                return False
-    return True
-
-def run_execution_steps(rule, work_item):
-    results = []
-    for step in rule.execution_steps.order_by("order"):
-        results.append({
-            "action": step.action,
-            "params": step.params,
-            "status": "success"  # placeholder, integrate with real runner
-        })
-    return results
+        groups = self.keyword_groups[rule_id]
+        if not groups:
+            return True
+        found = self._automaton.matches(text)
+        return all(group & found for group in groups)
+
+
+_rule_index = None
+_rule_index_version = None
+_rule_index_built_at = 0.0
+
+def get_rule_index():
+    """The compiled RuleIndex, rebuilt after rules or trigger conditions change."""
+    global _rule_index, _rule_index_version, _rule_index_built_at
+    version = cache.get(RULE_INDEX_VERSION_KEY, 0)
+    if _rule_index is None or version != _rule_index_version or time.monotonic() - _rule_index_built_at > RULE_INDEX_TTL:
+        conditions = defaultdict(list)
+        for rule_id, work_types, asset_types, keywords in AutomationTriggerCondition.objects.values_list(
+            "rule_id", "work_types", "asset_types", "keywords"
+        ):
+            conditions[rule_id].append((work_types, asset_types, keywords))
+        rule_ids = AutomationRule.objects.values_list("id", flat=True)
+        _rule_index = RuleIndex([(rule_id, conditions[rule_id]) for rule_id in rule_ids])
+        _rule_index_version = version
+        _rule_index_built_at = time.monotonic()
+    return _rule_index
+
+def invalidate_rule_index():
+    # After commit only: an index rebuilt mid-transaction would hold rules a rollback undoes
+    transaction.on_commit(_bump_rule_index_version)
+
+def _bump_rule_index_version():
+    global _rule_index
+    _rule_index = None
+    try:
+        cache.incr(RULE_INDEX_VERSION_KEY)
+    except ValueError:
+        cache.set(RULE_INDEX_VERSION_KEY, 1, timeout=None)
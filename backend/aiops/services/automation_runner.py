@@ -0,0 +1,187 @@
+# Automation step runner: ordered step groups, parallel within a group, timeouts + rollback
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import groupby
+from django.conf import settings
+from django.db import connection
+from django.utils.timezone import now
+from ..models.automation import AutomationExecutionLog
+from ..models.logs import SystemLog
+from ..models.workitems import WorkItem
+
+# Step action name -> handler(work_item, params) returning a dict of output
+ACTION_HANDLERS = {}
+
+def register_action(name):
+    """
+    Register a step handler. A handler may return a "rollback" spec
+    ({"action": ..., "params": ...}) undoing exactly what it did; otherwise
+    the step's own params["rollback"] is used.
+    """
+    def decorator(handler):
+        ACTION_HANDLERS[name] = handler
+        return handler
+    return decorator
+
+@register_action("set_status")
+def set_status(work_item, params):
+    wi = WorkItem.objects.get(id=work_item.id)
+    previous = wi.status
+    wi.status = params["status"]
+    wi.save()
+    return {"status": wi.status, "rollback": {"action": "set_status", "params": {"status": previous}}}
+
+@register_action("assign")
+def assign(work_item, params):
+    wi = WorkItem.objects.get(id=work_item.id)
+    previous = {"team": wi.assigned_team_id, "user": wi.assigned_user_id}
+    if "team" in params:
+        wi.assigned_team_id = params["team"]
+    if "user" in params:
+        wi.assigned_user_id = params["user"]
+    wi.save()
+    return {"rollback": {"action": "assign", "params": {key: str(value) if value else None for key, value in previous.items()}}}
+
+@register_action("log")
+def write_log(work_item, params):
+    entry = SystemLog.objects.create(
+        timestamp=now(),
+        level=params.get("level", "info"),
+        source="automation",
+        category=params.get("category", "automation"),
+        message=params.get("message", ""),
+        asset_id=work_item.asset_id,
+        work_item_id=work_item.id,
+        tenant_id=work_item.tenant_id,
+    )
+    return {"log": str(entry.id)}
+
+@register_action("wait")
+def wait_seconds(work_item, params):
+    time.sleep(float(params.get("seconds", 0)))
+    return {}
+
+
+def run_execution_steps(rule, work_item, steps=None):
+    """
+    Run a rule's steps against a WorkItem. Steps sharing an `order` are independent
+    and run in parallel on a bounded pool; a failed or timed-out step stops the run
+    and every completed step is rolled back in reverse. A timed-out step can't be
+    interrupted and may still finish after the rollback, so it is reported as
+    "unknown" and the run as failed rather than rolled_back. Returns (status, results).
+    Pass `steps` when running one rule over many items to load them only once.
+    """
+    if steps is None:
+        steps = rule_steps(rule)
+    results, completed = [], []
+    status = "success"
+    pool = ThreadPoolExecutor(max_workers=settings.AUTOMATION_MAX_WORKERS, thread_name_prefix="automation")
+    try:
+        for order, group in groupby(steps, key=lambda step: step.order):
+            group = list(group)
+            if status != "success":
+                results.extend({"step": str(step.id), "order": order, "action": step.action, "status": "skipped"} for step in group)
+                continue
+            outcomes = _run_group(pool, [(step.id, step.action, step.params) for step in group], work_item)
+            for step, outcome in zip(group, outcomes):
+                rollback = outcome.pop("rollback", None) or step.params.get("rollback")
+                results.append({"step": str(step.id), "order": order, "action": step.action, **outcome})
+                if outcome["status"] == "success":
+                    if rollback:
+                        completed.append((step, rollback))
+                else:
+                    status = "failed"
+    finally:
+        # Timed-out handlers cannot be interrupted; leave them to finish in the background
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    if status == "failed" and completed:
+        status = "rolled_back"
+        if any(r["status"] == "unknown" for r in results):
+            status = "failed"
+        rollback_pool = ThreadPoolExecutor(max_workers=len(completed), thread_name_prefix="automation-rollback")
+        try:
+            for step, spec in reversed(completed):
+                params = {"timeout": step.params.get("timeout"), **spec.get("params", {})}
+                outcome = _run_group(rollback_pool, [(step.id, spec["action"], params)], work_item)[0]
+                outcome.pop("rollback", None)
+                results.append({"step": str(step.id), "order": step.order, "action": spec["action"], "phase": "rollback", **outcome})
+                if outcome["status"] != "success":
+                    status = "failed"
+        finally:
+            rollback_pool.shutdown(wait=False, cancel_futures=True)
+    return status, results
+
+def rule_steps(rule):
+    return list(rule.execution_steps.order_by("order", "created_at"))
+
+def execute_rule(rule, work_item, log=None, steps=None, commit=True):
+    """
+    Run a rule against a WorkItem and record measured wall time and step results
+    on its log. With commit=False the log is returned unsaved for bulk insertion.
+    """
+    started = time.perf_counter()
+    status, results = run_execution_steps(rule, work_item, steps)
+    elapsed = time.perf_counter() - started
+    succeeded = sum(1 for r in results if r["status"] == "success" and "phase" not in r)
+    attempted = sum(1 for r in results if "phase" not in r)
+    if log is None:
+        log = AutomationExecutionLog(rule=rule, work_item=work_item, tenant_id=work_item.tenant_id)
+    log.status = status
+    log.execution_time = round(elapsed, 3)
+    log.message = f"Rule {rule.name} {status.replace('_', ' ')}: {succeeded}/{attempted} steps succeeded"[:500]
+    log.result = {"steps": results}
+    if commit:
+        log.save()
+    return log
+
+
+def _step_timeout(params):
+    return float(params.get("timeout") or settings.AUTOMATION_STEP_TIMEOUT)
+
+def _run_step(action, params, work_item, key, started):
+    started[key] = time.monotonic()
+    try:
+        handler = ACTION_HANDLERS.get(action)
+        if handler is None:
+            raise ValueError(f"Unknown action: {action}")
+        output = dict(handler(work_item, params) or {})
+        rollback = output.pop("rollback", None)
+        return {"status": "success", "output": output, "rollback": rollback, "duration": round(time.monotonic() - started[key], 3)}
+    except Exception as e:
+        return {"status": "failed", "error": str(e), "duration": round(time.monotonic() - started[key], 3)}
+    finally:
+        # Worker threads open their own connections; don't leak one per step
+        connection.close()
+
+def _run_group(pool, units, work_item):
+    """
+    Run (key, action, params) units concurrently, each against its own timeout
+    counted from when it actually starts. Once one fails, steps still queued
+    behind it are cancelled rather than started.
+    """
+    started = {}
+    pending = {pool.submit(_run_step, action, params, work_item, key, started): (key, params) for key, action, params in units}
+    outcomes = {}
+    while pending:
+        deadlines = [started[key] + _step_timeout(params) for key, params in pending.values() if key in started]
+        timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else 0.05
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            key, _params = pending.pop(future)
+            outcomes[key] = future.result()
+        at = time.monotonic()
+        for future, (key, params) in list(pending.items()):
+            if key in started and at >= started[key] + _step_timeout(params):
+                del pending[future]
+                # The handler keeps running; whatever it does is neither awaited nor rolled back
+                outcomes[key] = {
+                    "status": "unknown", "timed_out": True, "duration": round(at - started[key], 3),
+                    "error": f"Step exceeded {_step_timeout(params):g}s and may still complete; it is not rolled back",
+                }
+        if any(outcome["status"] != "success" for outcome in outcomes.values()):
+            for future, (key, _params) in list(pending.items()):
+                if future.cancel():
+                    del pending[future]
+                    outcomes[key] = {"status": "skipped"}
+    return [outcomes[key] for key, _action, _params in units]
@@ -0,0 +1,170 @@
+# Write-buffered counters: hot increments are collected in memory (or Redis) and
+# reach the database as batched F() updates instead of one row lock per hit
+import atexit
+import logging
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+import redis
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+REDIS_KEY = "aiops:counters:pending"
+
+logger = logging.getLogger(__name__)
+
+def counter_key(model, pk, field):
+    return f"{model._meta.label}|{pk}|{field}"
+
+class MemoryBuffer:
+    """
+    Increments held by this process until it next counts past the flush interval
+    or exits; an idle process holds them that long, and a killed one loses them.
+    """
+    def __init__(self):
+        self.pending = Counter()
+        self.lock = threading.Lock()
+
+    def add(self, key, amount):
+        with self.lock:
+            self.pending[key] += amount
+
+    def get(self, key):
+        with self.lock:
+            return self.pending.get(key, 0)
+
+    @property
+    def size(self):
+        return len(self.pending)
+
+    def take(self):
+        with self.lock:
+            taken, self.pending = self.pending, Counter()
+        return taken
+
+    def restore(self, taken):
+        with self.lock:
+            self.pending.update(taken)
+
+class RedisBuffer:
+    """Increments held in one Redis hash shared by every web and worker process."""
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url)
+
+    def add(self, key, amount):
+        self.client.hincrby(REDIS_KEY, key, amount)
+
+    def get(self, key):
+        return int(self.client.hget(REDIS_KEY, key) or 0)
+
+    @property
+    def size(self):
+        # The hash is flushed on the interval, by whichever process gets there first
+        return 0
+
+    def take(self):
+        # Renaming hands the hash to this flusher; increments after it start a new one
+        flushing = f"{REDIS_KEY}:{uuid.uuid4()}"
+        try:
+            self.client.rename(REDIS_KEY, flushing)
+        except redis.ResponseError:
+            # Nothing pending
+            return Counter()
+        pipe = self.client.pipeline()
+        pipe.hgetall(flushing)
+        pipe.delete(flushing)
+        taken, _ = pipe.execute()
+        return Counter({key.decode(): int(value) for key, value in taken.items()})
+
+    def restore(self, taken):
+        pipe = self.client.pipeline()
+        for key, amount in taken.items():
+            pipe.hincrby(REDIS_KEY, key, amount)
+        pipe.execute()
+
+_buffer = None
+_buffer_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+def get_buffer():
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            url = settings.COUNTER_BUFFER_URL
+            _buffer = RedisBuffer(url) if url else MemoryBuffer()
+        return _buffer
+
+def reset_counter_buffer():
+    """Drop the buffer and anything pending in it (for tests and settings changes)."""
+    global _buffer
+    with _buffer_lock:
+        _buffer = None
+
+def increment(model, pk, field, amount=1):
+    """
+    Add `amount` to a counter column without touching its row now. The database
+    catches up at the next flush, at most COUNTER_FLUSH_INTERVAL seconds later
+    for a process that keeps counting; the beat task flushes the shared Redis
+    buffer for everyone else. Never raises: a counter isn't worth failing the
+    request that bumped it, so buffer and flush errors are logged instead.
+    """
+    key = counter_key(model, pk, field)
+    try:
+        buffer = get_buffer()
+        buffer.add(key, amount)
+    except Exception:
+        logger.exception("Dropped counter increment %s", key)
+        return
+    if buffer.size >= settings.COUNTER_MAX_PENDING or time.monotonic() - _last_flush >= settings.COUNTER_FLUSH_INTERVAL:
+        try:
+            flush_counters()
+        except Exception:
+            # The increments went back into the buffer; the next flush retries them
+            logger.exception("Counter flush failed")
+
+def pending(model, pk, field):
+    """Increments to a counter not yet written to the database (0 if the buffer can't be read)."""
+    key = counter_key(model, pk, field)
+    try:
+        return get_buffer().get(key)
+    except Exception:
+        logger.exception("Could not read pending counter %s", key)
+        return 0
+
+def flush_counters():
+    """
+    Write every pending increment with one UPDATE per model, field and amount,
+    in one transaction. Returns the number of counters written; on failure the
+    increments go back into the buffer.
+    """
+    global _last_flush
+    _last_flush = time.monotonic()
+    buffer = get_buffer()
+    taken = buffer.take()
+    if not taken:
+        return 0
+    groups = defaultdict(list)
+    for key, amount in taken.items():
+        label, pk, field = key.split("|")
+        if amount:
+            groups[(label, field, amount)].append(pk)
+    try:
+        with transaction.atomic():
+            # Sorted, so concurrent flushers lock rows in the same order
+            for (label, field, amount), pks in sorted(groups.items()):
+                apps.get_model(label).objects.filter(pk__in=sorted(pks)).update(**{field: F(field) + amount})
+    except Exception:
+        buffer.restore(taken)
+        raise
+    return len(taken)
+
+@atexit.register
+def _flush_at_exit():
+    if isinstance(_buffer, MemoryBuffer) and _buffer.size:
+        try:
+            flush_counters()
+        except Exception:
+            pass
@@ -14,6 +14,9 @@ ITSM_SCHEMA = {
     },
 }
 
+# Statuses after which a work item no longer needs attention
+CLOSED_STATUSES = ("resolved", "fulfilled", "closed")
+
 def validate_status(work_type, status):
     allowed = ITSM_SCHEMA.get(work_type, {}).get("statuses", [])
     return status in allowed
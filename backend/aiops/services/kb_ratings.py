@@ -0,0 +1,28 @@
+# Rating count, sum and distribution stored on each KnowledgeBaseArticle, kept in step with its feedback
+from collections import Counter
+from django.db import transaction
+from ..models.knowledge import KnowledgeBaseArticle
+
+def apply_ratings(changes):
+    """
+    Fold (article_id, rating, +1 or -1) changes into the articles' totals, in the
+    caller's transaction. Each article row is locked while its distribution is
+    rewritten, so concurrent feedback on one article can't lose an update.
+    """
+    by_article = {}
+    for article_id, rating, sign in changes:
+        by_article.setdefault(article_id, Counter())[str(rating)] += sign
+    with transaction.atomic():
+        # Sorted, so concurrent writers lock articles in the same order
+        for article_id in sorted(by_article, key=str):
+            row = KnowledgeBaseArticle.objects.select_for_update().filter(pk=article_id).values("rating_distribution").first()
+            if row is None:
+                continue
+            distribution = Counter(row["rating_distribution"] or {})
+            distribution.update(by_article[article_id])
+            distribution = {rating: count for rating, count in distribution.items() if count > 0}
+            KnowledgeBaseArticle.objects.filter(pk=article_id).update(
+                rating_count=sum(distribution.values()),
+                rating_sum=sum(int(rating) * count for rating, count in distribution.items()),
+                rating_distribution=distribution,
+            )
@@ -0,0 +1,127 @@
+# Knowledge base search: an inverted index over articles, ranked with BM25
+import hashlib
+import json
+import math
+import re
+from bisect import bisect_left
+from collections import Counter
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.utils.html import escape
+from ..models.knowledge import KnowledgeBaseArticle, KnowledgeSearchDocument, KnowledgeSearchPosting
+
+# BM25 term saturation and length normalization
+K1 = 1.2
+B = 0.75
+# Term weights per field; a title match counts as three body matches
+FIELD_WEIGHTS = {"title": 3.0, "tags": 2.0, "content": 1.0}
+MAX_TERM_LENGTH = 64
+SNIPPET_WORDS = 30
+
+WORD_RE = re.compile(r"[^\W_]+")
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have how i in is it its of on or that the this to was were what when where which with".split()
+)
+
+def tokenize(text):
+    return [word for word in WORD_RE.findall((text or "").lower()) if word not in STOP_WORDS and len(word) <= MAX_TERM_LENGTH]
+
+def analyze(title, content, tags):
+    """(weighted term frequencies, weighted length) of an article's searchable fields."""
+    weighted = Counter()
+    fields = {"title": title, "content": content, "tags": " ".join(str(tag) for tag in tags or [])}
+    for name, text in fields.items():
+        for term in tokenize(text):
+            weighted[term] += FIELD_WEIGHTS[name]
+    return weighted, sum(weighted.values())
+
+def signature(title, content, tags):
+    return hashlib.sha1(json.dumps([title, content, tags], sort_keys=True, default=str).encode()).hexdigest()
+
+def index_article(article):
+    """
+    Bring an article's postings up to date. Saves that leave title, content
+    and tags alone (view counts and the like) cost one lookup.
+    """
+    digest = signature(article.title, article.content, article.tags)
+    document = KnowledgeSearchDocument.objects.filter(article_id=article.pk).first()
+    if document is not None and document.signature == digest:
+        return False
+    terms, length = analyze(article.title, article.content, article.tags)
+    with transaction.atomic():
+        if document is None:
+            document = KnowledgeSearchDocument.objects.create(article_id=article.pk, length=length, signature=digest)
+        else:
+            KnowledgeSearchDocument.objects.filter(pk=document.pk).update(length=length, signature=digest)
+            document.postings.all().delete()
+        KnowledgeSearchPosting.objects.bulk_create(
+            [KnowledgeSearchPosting(document_id=article.pk, term=term, tf=tf) for term, tf in terms.items()],
+            batch_size=1000,
+        )
+    return True
+
+def work_type_filter(work_type, prefix=""):
+    # JSON containment is PostgreSQL-only; elsewhere match the quoted value in the JSON text
+    if connection.vendor == "postgresql":
+        return Q(**{f"{prefix}applicable_work_types__contains": [work_type]})
+    return Q(**{f"{prefix}applicable_work_types__icontains": json.dumps(work_type)})
+
+def search_articles(query, limit=10, work_type=None, tenant_id=None):
+    """
+    Top `limit` articles for a query, best first, as (article, score, snippet).
+    Every query term is optional; BM25 rewards articles matching more, rarer
+    terms. The snippet is escaped HTML with the matched words in <mark>.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        raise ValueError("Search query has no searchable words")
+    documents = KnowledgeSearchDocument.objects.all()
+    postings = KnowledgeSearchPosting.objects.filter(term__in=terms)
+    if tenant_id:
+        # IDF and average length come from the tenant's own articles, so other
+        # tenants' content can't shift its rankings
+        documents = documents.filter(article__tenant_id=tenant_id)
+        postings = postings.filter(document__article__tenant_id=tenant_id)
+    corpus = documents.aggregate(documents=Count("pk"), total=Sum("length"))
+    if not corpus["documents"]:
+        return []
+    avg_length = (corpus["total"] or 0) / corpus["documents"] or 1.0
+    frequencies = dict(postings.order_by().values_list("term").annotate(df=Count("id")))
+    idf = {term: math.log(1 + (corpus["documents"] - df + 0.5) / (df + 0.5)) for term, df in frequencies.items()}
+    if not idf:
+        return []
+    if work_type:
+        postings = postings.filter(work_type_filter(work_type, "document__article__"))
+    weight = Case(*(When(term=term, then=Value(value)) for term, value in idf.items()), output_field=FloatField())
+    saturation = F("tf") * (K1 + 1) / (F("tf") + K1 * (1 - B + B * F("document__length") / avg_length))
+    top = list(
+        postings.values("document_id").annotate(score=Sum(weight * saturation, output_field=FloatField()))
+        .order_by("-score", "document_id")[:limit]
+    )
+    articles = KnowledgeBaseArticle.objects.in_bulk([row["document_id"] for row in top])
+    return [
+        (articles[row["document_id"]], row["score"], snippet(articles[row["document_id"]].content, terms))
+        for row in top if row["document_id"] in articles
+    ]
+
+def snippet(text, terms, words=SNIPPET_WORDS):
+    """The `words`-word window of `text` holding the most query terms, matches in <mark>."""
+    terms = set(terms)
+    spans = [(m.start(), m.end(), m.group().lower() in terms) for m in WORD_RE.finditer(text or "")]
+    if not spans:
+        return ""
+    hits = [i for i, span in enumerate(spans) if span[2]]
+    start = 0
+    if hits:
+        best = max(hits, key=lambda h: bisect_left(hits, h + words) - bisect_left(hits, h))
+        # A little leading context before the first match
+        start = max(0, min(best - 3, len(spans) - words))
+    window = spans[start:start + words]
+    parts, cursor = [], window[0][0]
+    for begin, end, hit in window:
+        parts.append(escape(text[cursor:begin]))
+        parts.append(f"<mark>{escape(text[begin:end])}</mark>" if hit else escape(text[begin:end]))
+        cursor = end
+    prefix = "… " if start > 0 else ""
+    suffix = " …" if start + words < len(spans) else ""
+    return prefix + "".join(parts) + suffix
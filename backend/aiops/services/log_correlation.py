@@ -0,0 +1,67 @@
+# Streaming log correlation: tumbling windows keyed by tenant, scope and message fingerprint
+import hashlib
+import re
+from collections import defaultdict
+from datetime import datetime, timezone
+from ..models.logs import SystemLogCorrelation
+
+# Width of the tumbling correlation window, in seconds
+CORRELATION_WINDOW = 300
+
+# Variable parts of a message, replaced before fingerprinting so repeats of one event match
+VARIABLE_PATTERNS = [
+    re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b"),
+    re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"),
+    re.compile(r"\b0x[0-9a-f]+\b|\b[0-9a-f]{8,}\b"),
+    re.compile(r"\b\d+(?:\.\d+)?\b"),
+]
+
+def normalize_message(message):
+    text = (message or "").lower()
+    for pattern in VARIABLE_PATTERNS:
+        text = pattern.sub("<*>", text)
+    return " ".join(text.split())
+
+def message_fingerprint(message):
+    return hashlib.sha1(normalize_message(message).encode()).hexdigest()[:16]
+
+def correlation_scope(log):
+    if log.asset_id:
+        return f"asset:{log.asset_id}"
+    if log.work_item_id:
+        return f"work_item:{log.work_item_id}"
+    return f"source:{log.source}"
+
+def window_start(at):
+    epoch = int(at.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % CORRELATION_WINDOW, tz=timezone.utc)
+
+def assign_correlation(log):
+    """Stamp a SystemLog with its correlation_id; returns the (fingerprint, window) it was keyed on."""
+    fingerprint = message_fingerprint(log.message)
+    window = window_start(log.timestamp)
+    key = f"{log.tenant_id}|{correlation_scope(log)}|{fingerprint}"
+    log.correlation_id = f"{window:%Y%m%d%H%M}-{hashlib.sha1(key.encode()).hexdigest()[:24]}"
+    return fingerprint, window
+
+def record_correlations(logs, keys):
+    """
+    Make sure a SystemLogCorrelation exists for every group in a batch of saved logs
+    (keys as returned by assign_correlation, in the same order). Groups are created
+    with one insert; a group first seen without a work item adopts the first one
+    that shows up.
+    """
+    groups = {}
+    work_items = defaultdict(set)
+    for log, (fingerprint, window) in zip(logs, keys):
+        groups.setdefault(log.correlation_id, SystemLogCorrelation(
+            correlation_id=log.correlation_id, log_id=log.id, tenant_id=log.tenant_id,
+            asset_id=log.asset_id, work_item_id=log.work_item_id, source=log.source,
+            fingerprint=fingerprint, window_start=window,
+        ))
+        if log.work_item_id:
+            work_items[log.work_item_id].add(log.correlation_id)
+    SystemLogCorrelation.objects.bulk_create(groups.values(), ignore_conflicts=True)
+    for work_item_id, correlation_ids in work_items.items():
+        SystemLogCorrelation.objects.filter(correlation_id__in=correlation_ids, work_item__isnull=True).update(work_item_id=work_item_id)
+    return len(groups)
@@ -0,0 +1,155 @@
+# Pre-aggregated SystemLog counters (SystemLogRollup) at minute, hour and day resolution
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from django.db import connection, transaction
+from django.db.models import Q, Sum
+from django.utils.timezone import now
+from ..models.logs import LogTemplate, SystemLogRollup
+
+RESOLUTIONS = {"1m": 60, "1h": 3600, "1d": 86400}
+COARSER = {"1m": "1h", "1h": "1d"}
+# How long finer counters are kept; day counters are kept for good
+COUNTER_RETENTION = {"1m": timedelta(days=2), "1h": timedelta(days=90)}
+# Trailing span re-merged on each compaction run; older buckets are already merged
+MERGE_WINDOW = {"1m": timedelta(hours=1), "1h": timedelta(days=1), "1d": timedelta(days=2)}
+
+KEY_FIELDS = ("tenant_id", "bucket_start", "level", "category", "source", "template_id")
+
+def count_logs(logs, sign=1):
+    """
+    Add saved SystemLogs (each counted `occurrences` times) to the counters of every
+    resolution with one insert; sign=-1 takes them back out. Counters are
+    append-only, so concurrent writers never contend; readers sum them and
+    compaction merges the rows of each bucket.
+    """
+    counts = Counter()
+    for log in logs:
+        for resolution, seconds in RESOLUTIONS.items():
+            key = (resolution, log.tenant_id, bucket_floor(log.timestamp, seconds), log.level, log.category, log.source, log.template_id)
+            counts[key] += sign * log.occurrences
+    SystemLogRollup.objects.bulk_create([
+        SystemLogRollup(
+            resolution=resolution, tenant_id=tenant_id, bucket_start=bucket, level=level,
+            category=category, source=source, template_id=template_id, count=total,
+        )
+        for (resolution, tenant_id, bucket, level, category, source, template_id), total in counts.items()
+    ], batch_size=1000)
+
+def log_stats(start, end, tenant_id=None, templates=0):
+    """
+    Log counts by level and by category for [start, end), read from the coarsest
+    counters that tile the range: whole days, then whole hours, then minutes.
+    Where finer counters have expired the range widens to coarser buckets; the
+    start and end returned are the ones actually counted.
+    With `templates`, also the most frequent message templates, up to that many.
+    """
+    start, end = bucket_floor(start, 60), bucket_floor(end, 60)
+    segments = cover_range(start, end, at=now())
+    if segments:
+        start, end = segments[0][1], segments[-1][2]
+    coverage = Q(pk__in=[])
+    for resolution, lo, hi in segments:
+        coverage |= Q(resolution=resolution, bucket_start__gte=lo, bucket_start__lt=hi)
+    counters = SystemLogRollup.objects.filter(coverage)
+    if tenant_id:
+        counters = counters.filter(tenant_id=tenant_id)
+    by_level, by_category = Counter(), Counter()
+    for level, category, total in counters.values_list("level", "category").annotate(total=Sum("count")).order_by():
+        by_level[level] += total
+        by_category[category] += total
+    stats = {
+        "start": start,
+        "end": end,
+        "total": sum(by_level.values()),
+        # Edits and deletes can cancel a key out to zero
+        "by_level": [{"level": level, "total": total} for level, total in by_level.most_common() if total],
+        "by_category": [{"category": category, "total": total} for category, total in by_category.most_common() if total],
+    }
+    if templates:
+        top = list(
+            counters.filter(template_id__isnull=False).values_list("template_id")
+            .annotate(total=Sum("count")).filter(total__gt=0).order_by("-total", "template_id")[:templates]
+        )
+        texts = dict(LogTemplate.objects.filter(id__in=[template_id for template_id, _ in top]).values_list("id", "template"))
+        stats["by_template"] = [
+            {"template_id": template_id, "template": texts.get(template_id), "total": total} for template_id, total in top
+        ]
+    return stats
+
+def cover_range(start, end, at=None):
+    """
+    Split [start, end) into (resolution, lo, hi) segments, coarsest first. With `at`,
+    a segment whose counters were expired by then is widened to the buckets of
+    the next coarser resolution still kept.
+    """
+    segments = _tile(start, end)
+    if at is None:
+        return segments
+    widened = []
+    for resolution, lo, hi in segments:
+        while resolution in COUNTER_RETENTION and lo < at - COUNTER_RETENTION[resolution]:
+            resolution = COARSER[resolution]
+            lo, hi = bucket_floor(lo, RESOLUTIONS[resolution]), bucket_ceil(hi, RESOLUTIONS[resolution])
+        if widened and widened[-1][0] == resolution and widened[-1][2] >= lo:
+            widened[-1] = (resolution, widened[-1][1], max(hi, widened[-1][2]))
+        else:
+            widened.append((resolution, lo, hi))
+    return widened
+
+def compact_log_counters(at=None):
+    """Merge recent counter rows to one per bucket and key, and drop expired resolutions."""
+    at = at or now()
+    merged = {resolution: _merge(resolution, at - window) for resolution, window in MERGE_WINDOW.items()}
+    for resolution, keep in COUNTER_RETENTION.items():
+        SystemLogRollup.objects.filter(resolution=resolution, bucket_start__lt=at - keep).delete()
+    return merged
+
+def bucket_floor(at, seconds):
+    epoch = int(at.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % seconds, tz=timezone.utc)
+
+def bucket_ceil(at, seconds):
+    floor = bucket_floor(at, seconds)
+    return floor if floor == at else floor + timedelta(seconds=seconds)
+
+
+def _tile(start, end):
+    for resolution in ("1d", "1h"):
+        seconds = RESOLUTIONS[resolution]
+        lo, hi = bucket_ceil(start, seconds), bucket_floor(end, seconds)
+        if lo < hi:
+            return _tile(start, lo) + [(resolution, lo, hi)] + _tile(hi, end)
+    return [("1m", start, end)] if start < end else []
+
+def _merge(resolution, since):
+    table = SystemLogRollup._meta.db_table
+    if connection.vendor == "postgresql":
+        # One statement: rows committed while it runs are neither deleted nor lost
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH moved AS (
+                    DELETE FROM {table} WHERE resolution = %s AND bucket_start >= %s
+                    RETURNING tenant_id, bucket_start, level, category, source, template_id, count
+                )
+                INSERT INTO {table} (id, created_at, modified_at, resolution, tenant_id, bucket_start, level, category, source, template_id, count)
+                SELECT gen_random_uuid(), now(), now(), %s, tenant_id, bucket_start, level, category, source, template_id, sum(count)
+                FROM moved GROUP BY tenant_id, bucket_start, level, category, source, template_id
+                HAVING sum(count) <> 0
+                """,
+                [resolution, since, resolution],
+            )
+            return cursor.rowcount
+    with transaction.atomic():
+        rows = list(SystemLogRollup.objects.filter(resolution=resolution, bucket_start__gte=since).values_list("id", *KEY_FIELDS, "count"))
+        totals = defaultdict(int)
+        for row in rows:
+            totals[row[1:-1]] += row[-1]
+        ids = [row[0] for row in rows]
+        for i in range(0, len(ids), 500):
+            SystemLogRollup.objects.filter(id__in=ids[i:i + 500]).delete()
+        SystemLogRollup.objects.bulk_create([
+            SystemLogRollup(resolution=resolution, count=total, **dict(zip(KEY_FIELDS, key)))
+            for key, total in totals.items() if total
+        ], batch_size=1000)
+    return len(totals)
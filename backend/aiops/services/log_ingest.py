@@ -0,0 +1,112 @@
+# Bulk SystemLog ingestion: batched validation, reference lookups and inserts
+import uuid
+from datetime import timezone
+from itertools import islice
+from django.utils.dateparse import parse_datetime
+from ..models.assets import Asset
+from ..models.logs import SystemLog
+from ..models.workitems import WorkItem
+from .log_correlation import assign_correlation, record_correlations
+from .log_counters import count_logs
+from .log_templates import assign_templates, collapse_logs
+
+INGEST_BATCH_SIZE = 5000
+# Rejections reported per batch; the counts always cover every line
+MAX_REPORTED_ERRORS = 20
+
+REQUIRED_FIELDS = ("timestamp", "level", "source", "category", "message")
+MAX_LENGTHS = {"level": 20, "source": 255, "category": 50}
+
+def ingest_logs(lines, batch_size=INGEST_BATCH_SIZE, tenant_id=None):
+    """
+    Ingest (line_number, record, error) tuples, e.g. from iter_ndjson, one batch at
+    a time: validate, resolve asset/work_item ids with one query each, correlate,
+    template and count the logs, fold repeats (see collapse_logs), then bulk insert
+    the remaining rows and any new correlation groups.
+    `tenant_id` applies to records that don't carry their own.
+    """
+    lines = iter(lines)
+    batches = []
+    while True:
+        batch = list(islice(lines, batch_size))
+        if not batch:
+            break
+        batches.append(_ingest_batch(batch, tenant_id, len(batches) + 1))
+    return {
+        "accepted": sum(b["accepted"] for b in batches),
+        "rejected": sum(b["rejected"] for b in batches),
+        "batches": batches,
+    }
+
+def _ingest_batch(batch, tenant_id, number):
+    errors, parsed = [], []
+    for line_number, record, error in batch:
+        if error is None:
+            try:
+                parsed.append((line_number, _parse_record(record, tenant_id)))
+                continue
+            except ValueError as e:
+                error = str(e)
+        errors.append({"line": line_number, "error": error})
+
+    asset_ids = {fields["asset_id"] for _, fields in parsed if fields["asset_id"]}
+    work_item_ids = {fields["work_item_id"] for _, fields in parsed if fields["work_item_id"]}
+    known_assets = set(Asset.objects.filter(id__in=asset_ids).values_list("id", flat=True)) if asset_ids else set()
+    known_work_items = set(WorkItem.objects.filter(id__in=work_item_ids).values_list("id", flat=True)) if work_item_ids else set()
+
+    logs = []
+    for line_number, fields in parsed:
+        if fields["asset_id"] and fields["asset_id"] not in known_assets:
+            errors.append({"line": line_number, "error": f"Unknown asset {fields['asset_id']}"})
+        elif fields["work_item_id"] and fields["work_item_id"] not in known_work_items:
+            errors.append({"line": line_number, "error": f"Unknown work_item {fields['work_item_id']}"})
+        else:
+            logs.append(SystemLog(**fields))
+    keys = [assign_correlation(log) for log in logs]
+    assign_templates(logs)
+    # Counted per occurrence, before repeats are folded together
+    count_logs(logs)
+    SystemLog.objects.bulk_create(collapse_logs(logs), batch_size=1000)
+    record_correlations(logs, keys)
+    errors.sort(key=lambda e: e["line"])
+    return {"batch": number, "accepted": len(logs), "rejected": len(errors), "errors": errors[:MAX_REPORTED_ERRORS]}
+
+def _parse_record(record, tenant_id):
+    if not isinstance(record, dict):
+        raise ValueError("Expected a JSON object")
+    missing = [name for name in REQUIRED_FIELDS if record.get(name) in (None, "")]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+    for name in REQUIRED_FIELDS[1:]:
+        if not isinstance(record[name], str):
+            raise ValueError(f"{name} must be a string")
+    for name, limit in MAX_LENGTHS.items():
+        if len(record[name]) > limit:
+            raise ValueError(f"{name} exceeds {limit} characters")
+    timestamp = parse_datetime(record["timestamp"]) if isinstance(record["timestamp"], str) else None
+    if timestamp is None:
+        raise ValueError("timestamp must be an ISO 8601 datetime")
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    tags = record.get("tags") or []
+    if not isinstance(tags, list):
+        raise ValueError("tags must be a list")
+    return {
+        "timestamp": timestamp,
+        "level": record["level"],
+        "source": record["source"],
+        "category": record["category"],
+        "message": record["message"],
+        "tags": tags,
+        "asset_id": _uuid(record.get("asset"), "asset"),
+        "work_item_id": _uuid(record.get("work_item"), "work_item"),
+        "tenant_id": _uuid(record.get("tenant_id"), "tenant_id") or tenant_id,
+    }
+
+def _uuid(value, name):
+    if value in (None, ""):
+        return None
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        raise ValueError(f"{name} must be a UUID")
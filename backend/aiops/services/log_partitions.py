@@ -0,0 +1,145 @@
+# SystemLog partition upkeep and retention
+import re
+from datetime import datetime, time, timedelta, timezone
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils.timezone import now
+from ..models.logs import SystemLog, SystemLogCorrelation, LogRetentionPolicy
+
+PARENT_TABLE = SystemLog._meta.db_table
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+ARCHIVE_PREFIX = f"{PARENT_TABLE}_archive_"
+# Daily partitions kept ready ahead of the clock
+PREMAKE_DAYS = 7
+
+BOUND_RE = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+def partitioning_enabled():
+    """True when SystemLog is a partitioned PostgreSQL table (see migration 0012)."""
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = %s",
+            [PARENT_TABLE],
+        )
+        return cursor.fetchone() is not None
+
+def list_partitions():
+    """(name, lower, upper) for each range partition, oldest first; None stands for MINVALUE."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = %s
+            """,
+            [PARENT_TABLE],
+        )
+        rows = cursor.fetchall()
+    partitions = []
+    for name, bound in rows:
+        match = BOUND_RE.search(bound)
+        if match:
+            partitions.append((name, _parse_bound(match.group(1)), _parse_bound(match.group(2))))
+    return sorted(partitions, key=lambda p: p[1] or datetime.min.replace(tzinfo=timezone.utc))
+
+def ensure_partitions(at=None, days=PREMAKE_DAYS):
+    """Create the daily partitions for the next `days` days that don't exist yet."""
+    start = _day_floor(at or now())
+    existing = list_partitions()
+    created = []
+    for offset in range(days + 1):
+        lower = start + timedelta(days=offset)
+        upper = lower + timedelta(days=1)
+        if any((lo is None or lo < upper) and (hi is None or hi > lower) for _, lo, hi in existing):
+            continue
+        name = f"{PARENT_TABLE}_p{lower:%Y%m%d}"
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Rows that already landed in the default partition for this day move with it
+            cursor.execute(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)")
+            # Generated columns (the search vector) can't be copied, only recomputed
+            columns = ", ".join(f'"{field.column}"' for field in SystemLog._meta.concrete_fields)
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE "timestamp" >= %s AND "timestamp" < %s RETURNING {columns}) '
+                f"INSERT INTO {name} ({columns}) SELECT {columns} FROM moved",
+                [lower, upper],
+            )
+            cursor.execute(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", [lower, upper])
+        created.append(name)
+    return created
+
+def apply_retention(at=None):
+    """
+    Expire SystemLogs under the retention policies. Tenants that expire before
+    the longest policy lose whole days of rows; partitions older than every policy
+    are detached and dropped, or kept as archive tables when a policy asks for it.
+    Counts survive in the day counters (SystemLogRollup), which are kept for good.
+    """
+    today = _day_floor(at or now())
+    policies = {policy.tenant_id: policy for policy in LogRetentionPolicy.objects.all()}
+    default = policies.pop(None, None)
+    default_days = default.retention_days if default else settings.SYSTEMLOG_RETENTION_DAYS
+    default_action = default.action if default else settings.SYSTEMLOG_RETENTION_ACTION
+    keep_days = max([default_days] + [policy.retention_days for policy in policies.values()])
+    partitioned = partitioning_enabled()
+    result = {"deleted": 0, "dropped": [], "archived": []}
+
+    # Archived rows wait for their partition to be detached, so only "drop" expires early
+    for tenant_id, policy in policies.items():
+        if policy.retention_days < keep_days and (policy.action == "drop" or not partitioned):
+            cutoff = today - timedelta(days=policy.retention_days)
+            result["deleted"] += delete_logs(SystemLog.objects.filter(tenant_id=tenant_id, timestamp__lt=cutoff))
+    if default_days < keep_days and (default_action == "drop" or not partitioned):
+        cutoff = today - timedelta(days=default_days)
+        result["deleted"] += delete_logs(SystemLog.objects.filter(timestamp__lt=cutoff).exclude(tenant_id__in=list(policies)))
+
+    cutoff = today - timedelta(days=keep_days)
+    if partitioned:
+        archive_tenants = [t for t, policy in policies.items() if policy.action == "archive"]
+        drop_tenants = [t for t, policy in policies.items() if policy.action != "archive"]
+        for name, lower, upper in list_partitions():
+            if upper is None or upper > cutoff:
+                continue
+            if default_action == "archive" or archive_tenants:
+                result["archived"].append(_archive_partition(name, default_action, archive_tenants, drop_tenants))
+            else:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.execute(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}")
+                    cursor.execute(f"DROP TABLE {name}")
+                result["dropped"].append(name)
+    # Whatever is left past the cutoff outside expired partitions (the default partition,
+    # the legacy one while it still straddles the cutoff, or an unpartitioned table)
+    result["deleted"] += delete_logs(SystemLog.objects.filter(timestamp__lt=cutoff))
+    SystemLogCorrelation.objects.filter(~Exists(SystemLog.objects.filter(id=OuterRef("log_id")))).delete()
+    return result
+
+def delete_logs(queryset):
+    deleted, _ = queryset.delete()
+    return deleted
+
+
+def _archive_partition(name, default_action, archive_tenants, drop_tenants):
+    archived = ARCHIVE_PREFIX + name[len(PARENT_TABLE) + 1:].lstrip("p")
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}")
+        cursor.execute(f"ALTER TABLE {name} RENAME TO {archived}")
+        # Tenants on "drop" must not survive in the archive
+        if default_action == "archive":
+            if drop_tenants:
+                cursor.execute(f"DELETE FROM {archived} WHERE tenant_id = ANY(%s::uuid[])", [[str(t) for t in drop_tenants]])
+        else:
+            cursor.execute(
+                f"DELETE FROM {archived} WHERE tenant_id IS NULL OR NOT tenant_id = ANY(%s::uuid[])",
+                [[str(t) for t in archive_tenants]],
+            )
+    return archived
+
+def _parse_bound(value):
+    if value == "MINVALUE" or value == "MAXVALUE":
+        return None
+    return datetime.fromisoformat(value.strip("'")).astimezone(timezone.utc)
+
+def _day_floor(at):
+    return datetime.combine(at.astimezone(timezone.utc).date(), time.min, tzinfo=timezone.utc)
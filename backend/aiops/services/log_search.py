@@ -0,0 +1,88 @@
+# Full-text SystemLog search over the index built in migrations 0015 and 0022
+import re
+from django.db import connection
+from django.db.models import BooleanField, Count, FloatField, Max, Sum, Value
+from django.db.models.expressions import RawSQL
+from ..models.logs import LogTemplate, SystemLog
+
+TABLE = SystemLog._meta.db_table
+FTS_TABLE = f"{TABLE}_fts"
+# Maps the FTS5 rowid to the log id; the log table's own rowid is not stable
+FTS_IDS_TABLE = f"{TABLE}_fts_ids"
+
+TERM_RE = re.compile(r'"([^"]*)"|(\S+)')
+# Letters and digits only, as both indexes tokenize
+WORD_RE = re.compile(r"[^\W_]+")
+
+def parse_search_query(query):
+    """
+    Split a query into (tokens, prefix) terms, all of which must match:
+    "quoted text" is a phrase, a trailing * makes a prefix query, and words
+    joined by punctuation (db-01, 10.0.0.7) are phrases of their parts.
+    """
+    terms = []
+    for phrase, word in TERM_RE.findall(query or ""):
+        tokens = WORD_RE.findall((phrase or word).lower())
+        if tokens:
+            terms.append((tokens, not phrase and word.endswith("*")))
+    return terms
+
+def to_tsquery(terms):
+    return " & ".join(" <-> ".join(tokens) + (":*" if prefix else "") for tokens, prefix in terms)
+
+def to_fts5_query(terms):
+    return " AND ".join('"' + " ".join(tokens) + '"' + ("*" if prefix else "") for tokens, prefix in terms)
+
+def search_logs(query, logs=None):
+    """
+    Annotate SystemLogs matching a search query with a relevance `rank`, best
+    first. Pass `logs` to narrow the search (time range, level, ...) first.
+    """
+    terms = parse_search_query(query)
+    if not terms:
+        raise ValueError("Search query has no searchable words")
+    logs = SystemLog.objects.all() if logs is None else logs
+    if connection.vendor == "postgresql":
+        tsquery = to_tsquery(terms)
+        logs = logs.filter(RawSQL(f"\"{TABLE}\".search_vector @@ to_tsquery('simple', %s)", [tsquery], output_field=BooleanField()))
+        rank = RawSQL(f"ts_rank_cd(\"{TABLE}\".search_vector, to_tsquery('simple', %s))", [tsquery], output_field=FloatField())
+    elif connection.vendor == "sqlite":
+        match = to_fts5_query(terms)
+        logs = logs.filter(RawSQL(
+            f'"{TABLE}".id IN (SELECT log_id FROM {FTS_IDS_TABLE} WHERE rowid IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s))',
+            [match], output_field=BooleanField(),
+        ))
+        rank = RawSQL(
+            f'(SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+            f' AND rowid = (SELECT rowid FROM {FTS_IDS_TABLE} WHERE log_id = "{TABLE}".id))',
+            [match], output_field=FloatField(),
+        )
+    else:
+        # No index on this backend: plain substring matching, unranked
+        for tokens, _prefix in terms:
+            logs = logs.filter(message__icontains=" ".join(tokens))
+        rank = Value(0.0, output_field=FloatField())
+    return logs.annotate(rank=rank).order_by("-rank", "-timestamp")
+
+def group_by_template(hits):
+    """
+    Fold ranked search hits into one values row per template: matching rows, their
+    occurrences, the latest hit and the best rank. The loudest templates come
+    first, as a storm is what grouping is for. Pass a page of the rows to
+    describe_templates for the template text.
+    """
+    return (
+        hits.order_by().values("template_id")
+        .annotate(logs=Count("id"), occurrences=Sum("occurrences"), last_seen=Max("timestamp"), best_rank=Max("rank"))
+        .order_by("-occurrences", "-best_rank", "template_id")
+    )
+
+def describe_templates(groups):
+    texts = dict(LogTemplate.objects.filter(id__in=[g["template_id"] for g in groups if g["template_id"]]).values_list("id", "template"))
+    return [
+        {
+            "template_id": g["template_id"], "template": texts.get(g["template_id"]), "logs": g["logs"],
+            "occurrences": g["occurrences"], "last_seen": g["last_seen"], "rank": g["best_rank"],
+        }
+        for g in groups
+    ]
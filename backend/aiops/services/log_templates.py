@@ -0,0 +1,212 @@
+# Online log template mining (Drain-style) and storm collapsing for SystemLog ingest
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta, timezone
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils.timezone import now
+from ..models.logs import LogTemplate, SystemLog
+from .log_correlation import normalize_message
+
+WILDCARD = "<*>"
+# Share of positions a message must have in common with a template to join it
+SIMILARITY_THRESHOLD = 0.5
+# Templates per (length, first token) group; a full group folds newcomers into the
+# closest template. Groups per tenant are capped, least recently used dropped first
+MAX_CLUSTERS_PER_GROUP = 100
+MAX_GROUPS = 10000
+# Stored templates a tenant's miner starts from, most recently seen first
+MAX_LOADED_TEMPLATES = 5000
+
+class TemplateMiner:
+    """
+    Drain's fixed-depth parse tree, flattened to one level: messages are grouped
+    by token count and first token, then joined to the most similar template in
+    the group. Joining generalizes the template: positions that differ become <*>.
+    Messages are normalized first, so numbers, addresses and ids are <*> already.
+    A template keeps the hash of the text it started from as its identity.
+    """
+    def __init__(self, tenant_id=None):
+        self.tenant_id = tenant_id
+        self.groups = OrderedDict()
+        self.lock = threading.Lock()
+
+    def load(self, templates):
+        """Seed the tree with (template_hash, template) pairs."""
+        with self.lock:
+            for digest, template in templates:
+                tokens = template.split()
+                self._group(tokens).append((digest, tokens))
+
+    def add(self, message):
+        """(template_hash, template) of the template the message joins."""
+        tokens = normalize_message(message).split()
+        with self.lock:
+            clusters = self._group(tokens)
+            best = max(clusters, key=lambda cluster: similarity(cluster[1], tokens), default=None)
+            if best is None or (similarity(best[1], tokens) < SIMILARITY_THRESHOLD and len(clusters) < MAX_CLUSTERS_PER_GROUP):
+                best = (template_hash(self.tenant_id, " ".join(tokens)), list(tokens))
+                clusters.append(best)
+            else:
+                best[1][:] = [t if t == u else WILDCARD for t, u in zip(best[1], tokens)]
+            return best[0], " ".join(best[1])
+
+    def _group(self, tokens):
+        first = tokens[0] if tokens and not any(c.isdigit() for c in tokens[0]) else WILDCARD
+        key = (len(tokens), first)
+        clusters = self.groups.pop(key, [])
+        self.groups[key] = clusters
+        while len(self.groups) > MAX_GROUPS:
+            self.groups.popitem(last=False)
+        return clusters
+
+def similarity(template, tokens):
+    if not tokens:
+        return 1.0
+    return sum(t == u for t, u in zip(template, tokens)) / len(tokens)
+
+_miners = {}
+_miners_lock = threading.Lock()
+
+def get_miner(tenant_id):
+    """The tenant's miner, seeded from its stored templates on first use in this process."""
+    with _miners_lock:
+        if tenant_id not in _miners:
+            miner = TemplateMiner(tenant_id)
+            miner.load(
+                LogTemplate.objects.filter(tenant_id=tenant_id).order_by("-last_seen")
+                .values_list("template_hash", "template")[:MAX_LOADED_TEMPLATES]
+            )
+            _miners[tenant_id] = miner
+        return _miners[tenant_id]
+
+def reset_template_miners():
+    """Forget every mined template tree; templates already stored are unaffected."""
+    with _miners_lock:
+        _miners.clear()
+
+def template_hash(tenant_id, template):
+    return hashlib.sha1(f"{tenant_id}|{template}".encode()).hexdigest()
+
+def assign_templates(logs):
+    """
+    Set template_id on unsaved SystemLogs, creating their templates, or updating
+    their text and occurrence counts, with one upsert.
+    """
+    rows, hashes = {}, []
+    for log in logs:
+        digest, template = get_miner(log.tenant_id).add(log.message)
+        hashes.append(digest)
+        row = rows.setdefault(digest, {
+            "tenant_id": log.tenant_id, "template_hash": digest, "occurrences": 0, "last_seen": log.timestamp,
+        })
+        # The template only generalizes, so the batch's last text is the one to keep
+        row.update(template=template, token_count=len(template.split()))
+        row["occurrences"] += 1
+        row["last_seen"] = max(row["last_seen"], log.timestamp)
+    ids = _upsert_templates(rows)
+    for log, digest in zip(logs, hashes):
+        log.template_id = ids[digest]
+
+def collapse_logs(logs, window=None):
+    """
+    Fold repeats within a batch of unsaved SystemLogs: logs sharing a collapse key
+    (the same message, level, category, source, asset and work item in the same
+    correlation group within `window` seconds, default
+    SYSTEMLOG_COLLAPSE_WINDOW) become one row counting their occurrences, and rows
+    saved by earlier batches for the same key are counted up instead. Returns the
+    logs still to insert; every folded log takes the id of the row that holds it.
+    """
+    window = settings.SYSTEMLOG_COLLAPSE_WINDOW if window is None else window
+    if not window or not logs:
+        return list(logs)
+    heads, members, starts = {}, defaultdict(list), {}
+    for log in logs:
+        start, log.collapse_key = collapse_key(log, window)
+        log.last_seen = log.timestamp
+        members[log.collapse_key].append(log)
+        starts[log.collapse_key] = start
+        head = heads.setdefault(log.collapse_key, log)
+        if head is not log:
+            head.occurrences += 1
+            head.timestamp = min(head.timestamp, log.timestamp)
+            head.last_seen = max(head.last_seen, log.timestamp)
+    existing = dict(
+        SystemLog.objects.filter(
+            collapse_key__in=list(heads),
+            timestamp__gte=min(starts.values()), timestamp__lt=max(starts.values()) + timedelta(seconds=window),
+        ).values_list("collapse_key", "id")
+    )
+    if existing:
+        SystemLog.objects.bulk_update([
+            SystemLog(
+                id=row_id, occurrences=F("occurrences") + heads[key].occurrences,
+                last_seen=Greatest(F("last_seen"), heads[key].last_seen),
+            )
+            for key, row_id in existing.items()
+        ], ["occurrences", "last_seen"])
+    for key, group in members.items():
+        row_id = existing.get(key, heads[key].pk)
+        for log in group:
+            log.pk = row_id
+    return [head for key, head in heads.items() if key not in existing]
+
+def collapse_key(log, window):
+    """
+    (window start, key) for a log that already has its correlation_id. The raw
+    message is part of the key: a folded row keeps one message, so logs that
+    differ only in values the normalizer masks must stay apart.
+    """
+    epoch = int(log.timestamp.timestamp())
+    start = datetime.fromtimestamp(epoch - epoch % window, tz=timezone.utc)
+    scope = f"{log.correlation_id}|{log.level}|{log.category}|{log.source}|{log.asset_id}|{log.work_item_id}"
+    digest = hashlib.sha1(f"{scope}|{log.message}".encode()).hexdigest()
+    return start, f"{start:%Y%m%d%H%M%S}-{digest}"
+
+
+def _upsert_templates(rows):
+    ids = {}
+    if not rows:
+        return ids
+    if connection.vendor not in ("postgresql", "sqlite"):
+        for digest, row in rows.items():
+            template, _ = LogTemplate.objects.get_or_create(template_hash=digest, defaults={**row, "occurrences": 0})
+            LogTemplate.objects.filter(pk=template.pk).update(
+                template=row["template"], occurrences=F("occurrences") + row["occurrences"], last_seen=row["last_seen"],
+            )
+            ids[digest] = template.pk
+        return ids
+    table = LogTemplate._meta.db_table
+    greatest = "GREATEST" if connection.vendor == "postgresql" else "MAX"
+    columns = ["id", "created_at", "modified_at", "tenant_id", "template", "template_hash", "token_count", "occurrences", "last_seen"]
+    fields = [LogTemplate._meta.get_field(column) for column in columns]
+    # Sorted, so concurrent ingesters lock the same templates in the same order
+    ordered = [rows[digest] for digest in sorted(rows)]
+    stamp = now()
+    for i in range(0, len(ordered), 500):
+        chunk = ordered[i:i + 500]
+        params = []
+        for row in chunk:
+            values = {"id": uuid.uuid4(), "created_at": stamp, "modified_at": stamp, **row}
+            params += [field.get_db_prep_save(values[column], connection) for column, field in zip(columns, fields)]
+        placeholders = ", ".join(["(" + ", ".join(["%s"] * len(columns)) + ")"] * len(chunk))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} ({", ".join(columns)}) VALUES {placeholders}
+                ON CONFLICT (template_hash) DO UPDATE SET
+                    template = excluded.template,
+                    token_count = excluded.token_count,
+                    occurrences = {table}.occurrences + excluded.occurrences,
+                    last_seen = {greatest}(COALESCE({table}.last_seen, excluded.last_seen), excluded.last_seen),
+                    modified_at = excluded.modified_at
+                RETURNING id, template_hash
+                """,
+                params,
+            )
+            ids.update((digest, uuid.UUID(str(row_id))) for row_id, digest in cursor.fetchall())
+    return ids
@@ -0,0 +1,177 @@
+# AnalyticsMetric downsampled into 1m/1h/1d rollups, and trends read from the coarsest fitting one
+import math
+import zlib
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Max, Min, Sum, Value
+from django.db.models.functions import Greatest, Least, TruncDay, TruncHour, TruncMinute
+from django.utils.timezone import now
+from ..models.analytics import AnalyticsMetric, AnalyticsMetricRollup
+from .log_counters import RESOLUTIONS, bucket_ceil, bucket_floor
+
+# How long each resolution is kept; day buckets are kept for good
+ROLLUP_RETENTION = {"1m": timedelta(days=7), "1h": timedelta(days=180)}
+# Raw samples re-read by each periodic downsampling run, to pick up late writes
+DOWNSAMPLE_WINDOW = timedelta(minutes=5)
+
+TRUNCATE = {"1m": TruncMinute, "1h": TruncHour, "1d": TruncDay}
+GROUP_FIELDS = ("tenant_id", "name", "bucket")
+# Advisory lock of range rebuilds; single-series writers hold it shared, plus a lock of their own
+REBUILD_LOCK = zlib.crc32(b"aiops.metric_series")
+
+def downsample_metrics(start, end=None, series=None):
+    """
+    Rebuild the rollup buckets overlapping [start, end), of every metric or only
+    of one (tenant_id, name) `series`. Minute and hour buckets are aggregated from
+    the raw samples, day buckets from the hour buckets, so a run re-reads at most
+    an hour of samples plus the day's hour buckets. Anything that writes or
+    deletes samples outside DOWNSAMPLE_WINDOW (daily_rollup, API edits) calls this
+    for the range it touched. Returns the number of buckets written.
+    """
+    end = end or now()
+    if settings.ANALYTICS_METRIC_RETENTION_DAYS:
+        # Buckets whose samples have expired can't be rebuilt; leave them as they are
+        start = max(start, bucket_ceil(now() - timedelta(days=settings.ANALYTICS_METRIC_RETENTION_DAYS), RESOLUTIONS["1d"]))
+    if start >= end:
+        return 0
+    written = 0
+    with transaction.atomic():
+        # Concurrent runs would both delete, then both insert, the same buckets
+        _lock(series)
+        for resolution in ("1m", "1h", "1d"):
+            lo, hi = bucket_floor(start, RESOLUTIONS[resolution]), bucket_ceil(end, RESOLUTIONS[resolution])
+            if resolution == "1h" and lo < now() - ROLLUP_RETENTION["1h"]:
+                # Expired hour buckets can't feed the day buckets; rebuild the whole days
+                lo = bucket_floor(start, RESOLUTIONS["1d"])
+            written += _rebuild(resolution, lo, hi, series)
+    return written
+
+def add_sample(metric):
+    """
+    Fold one new AnalyticsMetric into its minute, hour and day buckets as
+    count/sum/min/max deltas, without re-reading any samples. Edits and deletes
+    can't be undone that way (min and max); they go through resample().
+    """
+    series = (metric.tenant_id, metric.name)
+    with transaction.atomic():
+        _lock(series)
+        for resolution in ("1m", "1h", "1d"):
+            bucket_start = bucket_floor(metric.recorded_at, RESOLUTIONS[resolution])
+            if resolution in ROLLUP_RETENTION and bucket_start < now() - ROLLUP_RETENTION[resolution]:
+                # Expired resolutions are not kept
+                continue
+            bucket = AnalyticsMetricRollup.objects.filter(
+                resolution=resolution, tenant_id=metric.tenant_id, name=metric.name, bucket_start=bucket_start,
+            )
+            if not bucket.update(
+                count=F("count") + 1, value_sum=F("value_sum") + metric.value,
+                value_min=Least("value_min", Value(metric.value)), value_max=Greatest("value_max", Value(metric.value)),
+            ):
+                AnalyticsMetricRollup.objects.create(
+                    resolution=resolution, tenant_id=metric.tenant_id, name=metric.name, bucket_start=bucket_start,
+                    count=1, value_sum=metric.value, value_min=metric.value, value_max=metric.value,
+                )
+
+def resample(tenant_id, name, *moments):
+    """Rebuild one series' buckets holding samples recorded at `moments`, after an edit or delete."""
+    for at in sorted(set(moments)):
+        downsample_metrics(at, at + timedelta(seconds=1), series=(tenant_id, name))
+
+def expire_metric_rollups(at=None):
+    """Drop minute and hour buckets past their retention, and raw samples past ANALYTICS_METRIC_RETENTION_DAYS."""
+    at = at or now()
+    expired = {
+        resolution: AnalyticsMetricRollup.objects.filter(resolution=resolution, bucket_start__lt=at - keep).delete()[0]
+        for resolution, keep in ROLLUP_RETENTION.items()
+    }
+    if settings.ANALYTICS_METRIC_RETENTION_DAYS:
+        cutoff = at - timedelta(days=settings.ANALYTICS_METRIC_RETENTION_DAYS)
+        expired["raw"] = AnalyticsMetric.objects.filter(recorded_at__lt=cutoff).delete()[0]
+    return expired
+
+def pick_resolution(start, end, points, at=None):
+    """
+    (resolution, step seconds) for a trend over [start, end) of at most `points`
+    points: the finest resolution still kept for `start` that fits the budget,
+    else day buckets merged `step` seconds at a time.
+    """
+    at = at or now()
+    span = (end - start).total_seconds()
+    for resolution in ("1m", "1h", "1d"):
+        seconds = RESOLUTIONS[resolution]
+        kept = resolution not in ROLLUP_RETENTION or start >= at - ROLLUP_RETENTION[resolution]
+        if kept and span / seconds <= points:
+            return resolution, seconds
+    return "1d", RESOLUTIONS["1d"] * math.ceil(span / (RESOLUTIONS["1d"] * points))
+
+def metric_trend(name, start, end, points, tenant_id=None):
+    """
+    A metric over [start, end) as parallel arrays, one entry per non-empty bucket:
+    bucket start (epoch seconds), count, sum, min, max and avg of the samples.
+    Tenants are merged unless `tenant_id` is given.
+    """
+    resolution, step = pick_resolution(start, end, points)
+    rollups = AnalyticsMetricRollup.objects.filter(
+        name=name, resolution=resolution,
+        bucket_start__gte=bucket_floor(start, RESOLUTIONS[resolution]), bucket_start__lt=end,
+    )
+    if tenant_id:
+        rollups = rollups.filter(tenant_id=tenant_id)
+    rows = (
+        rollups.values_list("bucket_start")
+        .annotate(Sum("count"), Sum("value_sum"), Min("value_min"), Max("value_max"))
+        .order_by("bucket_start")
+    )
+    series = {"timestamps": [], "count": [], "sum": [], "min": [], "max": []}
+    origin = int(bucket_floor(start, RESOLUTIONS[resolution]).timestamp())
+    for bucket, count, total, low, high in rows:
+        at = int(bucket.timestamp())
+        at -= (at - origin) % step
+        if series["timestamps"] and series["timestamps"][-1] == at:
+            series["count"][-1] += count
+            series["sum"][-1] += total
+            series["min"][-1] = min(series["min"][-1], low)
+            series["max"][-1] = max(series["max"][-1], high)
+        else:
+            for key, value in zip(series, (at, count, total, low, high)):
+                series[key].append(value)
+    series["avg"] = [total / count for total, count in zip(series["sum"], series["count"])]
+    return {"name": name, "resolution": resolution, "step": step, "start": start, "end": end, **series}
+
+
+def _lock(series=None):
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        if series is None:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [REBUILD_LOCK])
+        else:
+            # Writers of different series only wait for range rebuilds, not for each other
+            key = zlib.crc32(f"{series[0]}|{series[1]}".encode()) | 1 << 32
+            cursor.execute("SELECT pg_advisory_xact_lock_shared(%s), pg_advisory_xact_lock(%s)", [REBUILD_LOCK, key])
+
+def _series_filter(series):
+    return {} if series is None else {"tenant_id": series[0], "name": series[1]}
+
+def _rebuild(resolution, lo, hi, series=None):
+    if resolution == "1d":
+        source = AnalyticsMetricRollup.objects.filter(resolution="1h", bucket_start__gte=lo, bucket_start__lt=hi, **_series_filter(series))
+        rows = source.annotate(bucket=TruncDay("bucket_start")).values(*GROUP_FIELDS).annotate(
+            n=Sum("count"), total=Sum("value_sum"), low=Min("value_min"), high=Max("value_max"),
+        )
+    else:
+        source = AnalyticsMetric.objects.filter(recorded_at__gte=lo, recorded_at__lt=hi, **_series_filter(series))
+        rows = source.annotate(bucket=TRUNCATE[resolution]("recorded_at")).values(*GROUP_FIELDS).annotate(
+            n=Count("id"), total=Sum("value"), low=Min("value"), high=Max("value"),
+        )
+    rollups = [
+        AnalyticsMetricRollup(
+            resolution=resolution, tenant_id=row["tenant_id"], name=row["name"], bucket_start=row["bucket"],
+            count=row["n"], value_sum=row["total"], value_min=row["low"], value_max=row["high"],
+        )
+        for row in rows.order_by()
+    ]
+    AnalyticsMetricRollup.objects.filter(resolution=resolution, bucket_start__gte=lo, bucket_start__lt=hi, **_series_filter(series)).delete()
+    AnalyticsMetricRollup.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
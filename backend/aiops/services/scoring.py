@@ -1,5 +1,42 @@
 from datetime import datetime, timezone
 
+import numpy as np
+from django.db.models import Case, Count, F, Q, When
+
+from ..models.automation import AutomationExecutionLog
+from ..models.workitems import WorkItem
+from .itsm_schema import CLOSED_STATUSES
+
+PRIORITY_WEIGHTS = {
+    "priority_1": 400,
+    "priority_2": 300,
+    "priority_3": 200,
+    "priority_4": 100,
+}
+
+# (remaining SLA minutes upper bound, points), most urgent first
+SLA_URGENCY_BANDS = ((0, 300), (15, 250), (30, 200), (60, 100))
+
+REVENUE_STEP = 100000
+REVENUE_POINTS_PER_STEP = 50
+REVENUE_POINTS_CAP = 200
+
+AUTOMATION_SUCCESS_RATE_THRESHOLD = 80
+AUTOMATION_AUTO_EXECUTABLE_POINTS = 100
+AUTOMATION_ELIGIBLE_POINTS = 50
+
+ASSIGNED_TO_USER_POINTS = 75
+ASSIGNED_TO_TEAM_POINTS = 50
+
+SCORE_COMPONENTS = ("priority", "sla", "business_impact", "automation", "assignment")
+
+# WorkItem fields the persisted score depends on; automation stats and the clock are
+# covered by rescore_work_items (on execution log writes) and the SLA band rescore
+SCORE_INPUT_FIELDS = (
+    "priority", "status", "sla_target_minutes", "created_at", "business_service_id", "assigned_user_id", "assigned_team_id",
+)
+
+
 def calculate_smart_score(workitem, current_user_id=None):
     """
     Calculate Smart Score for a WorkItem.
@@ -8,13 +45,7 @@ def calculate_smart_score(workitem, current_user_id=None):
     score = 0
 
     # 1. Priority Weight
-    priority_map = {
-        "priority_1": 400,
-        "priority_2": 300,
-        "priority_3": 200,
-        "priority_4": 100,
-    }
-    score += priority_map.get(workitem.get("priority"), 0)
+    score += PRIORITY_WEIGHTS.get(workitem.get("priority"), 0)
 
     # 2. SLA Urgency
     sla_target = workitem.get("sla_target_minutes")
@@ -25,14 +56,10 @@ def calculate_smart_score(workitem, current_user_id=None):
         elapsed = (modified_at - created_at).total_seconds() / 60
         remaining = sla_target - elapsed
 
-        if remaining <= 0:
-            score += 300
-        elif remaining <= 15:
-            score += 250
-        elif remaining <= 30:
-            score += 200
-        elif remaining <= 60:
-            score += 100
+        for upper_bound, points in SLA_URGENCY_BANDS:
+            if remaining <= upper_bound:
+                score += points
+                break
 
     # 3. Business Impact
     revenue = (
@@ -42,22 +69,224 @@ def calculate_smart_score(workitem, current_user_id=None):
     )
     if revenue:
         impact = float(revenue)
-        score += min(int(impact / 100000) * 50, 200)
+        score += min(int(impact / REVENUE_STEP) * REVENUE_POINTS_PER_STEP, REVENUE_POINTS_CAP)
 
     # 4. Automation Eligibility
     automation = workitem.get("automation")
     if automation:
-        if automation.get("success_rate", 0) > 80 and automation.get("auto_executable", False):
-            score += 100
+        if automation.get("success_rate", 0) > AUTOMATION_SUCCESS_RATE_THRESHOLD and automation.get("auto_executable", False):
+            score += AUTOMATION_AUTO_EXECUTABLE_POINTS
         elif automation.get("eligible"):
-            score += 50
+            score += AUTOMATION_ELIGIBLE_POINTS
 
     # 5. Assignment Context
     assigned_to = workitem.get("assigned_to")
     if assigned_to:
         if current_user_id and assigned_to.get("id") == current_user_id:
-            score += 75
+            score += ASSIGNED_TO_USER_POINTS
         elif assigned_to.get("team"):
-            score += 50
+            score += ASSIGNED_TO_TEAM_POINTS
 
     return score
+
+
+SCORE_COLUMN_FIELDS = (
+    "id", "title", "status", "priority", "sla_target_minutes", "created_at",
+    "business_service__revenue_impact_per_hour", "assigned_user_id", "assigned_team_id",
+)
+
+
+def load_score_columns(queryset):
+    """
+    Read everything calculate_smart_score needs for a WorkItem queryset as column arrays.
+    Costs two queries regardless of size: the work items joined to their business service,
+    and their automation execution stats grouped per work item. A work item with execution
+    logs counts as automation eligible; its success rate comes from those logs.
+    """
+    rows = list(queryset.values_list(*SCORE_COLUMN_FIELDS))
+    stats = _automation_stats(AutomationExecutionLog.objects.filter(work_item__in=queryset.values("id")))
+    return _build_columns(rows, stats)
+
+
+def instance_score_columns(work_item):
+    """Single-row score columns for an in-memory WorkItem, e.g. one about to be saved."""
+    service = work_item.business_service if work_item.business_service_id else None
+    row = (
+        work_item.id, work_item.title, work_item.status, work_item.priority, work_item.sla_target_minutes,
+        work_item.created_at, service.revenue_impact_per_hour if service else None,
+        work_item.assigned_user_id, work_item.assigned_team_id,
+    )
+    stats = {}
+    if not work_item._state.adding:
+        stats = _automation_stats(AutomationExecutionLog.objects.filter(work_item_id=work_item.id))
+    return _build_columns([row], stats)
+
+
+def _automation_stats(logs):
+    return {
+        row["work_item"]: (row["total"], row["succeeded"])
+        for row in logs.values("work_item").annotate(
+            total=Count("id"), succeeded=Count("id", filter=Q(status="success"))
+        )
+    }
+
+
+def _build_columns(rows, stats):
+    ids = [row[0] for row in rows]
+    automation = [stats.get(pk, (0, 0)) for pk in ids]
+    return {
+        "id": ids,
+        "title": [row[1] for row in rows],
+        "status": [row[2] for row in rows],
+        "priority": np.array([row[3] for row in rows], dtype=object),
+        "sla_target_minutes": np.array([row[4] or 0 for row in rows], dtype=float),
+        "created_at": np.array([row[5].timestamp() for row in rows], dtype=float),
+        "revenue_impact_per_hour": np.array([float(row[6] or 0) for row in rows], dtype=float),
+        "assigned_user_id": np.array([str(row[7]) if row[7] else "" for row in rows], dtype=object),
+        "assigned_team_id": np.array([row[8] is not None for row in rows], dtype=bool),
+        "automation_total": np.array([a[0] for a in automation], dtype=float),
+        "automation_succeeded": np.array([a[1] for a in automation], dtype=float),
+    }
+
+
+def score_columns(columns, current_user_id=None, at=None):
+    """
+    Vectorized calculate_smart_score over the column arrays from load_score_columns.
+    SLA urgency is measured at `at` (defaults to now). Returns one int array per
+    SCORE_COMPONENTS entry plus their sum under "total".
+    """
+    at = at or datetime.now(timezone.utc)
+    size = len(columns["id"])
+
+    priority = np.zeros(size, dtype=np.int64)
+    for name, weight in PRIORITY_WEIGHTS.items():
+        priority[columns["priority"] == name] = weight
+
+    sla_target = columns["sla_target_minutes"]
+    remaining = sla_target - (at.timestamp() - columns["created_at"]) / 60
+    has_sla = sla_target != 0
+    sla = np.select(
+        [has_sla & (remaining <= upper_bound) for upper_bound, _ in SLA_URGENCY_BANDS],
+        [points for _, points in SLA_URGENCY_BANDS],
+        default=0,
+    ).astype(np.int64)
+
+    steps = np.trunc(columns["revenue_impact_per_hour"] / REVENUE_STEP)
+    business_impact = np.minimum(steps * REVENUE_POINTS_PER_STEP, REVENUE_POINTS_CAP).astype(np.int64)
+
+    total_runs = columns["automation_total"]
+    success_rate = np.divide(
+        columns["automation_succeeded"] * 100, total_runs,
+        out=np.zeros(size, dtype=float), where=total_runs > 0,
+    )
+    automation = np.select(
+        [success_rate > AUTOMATION_SUCCESS_RATE_THRESHOLD, total_runs > 0],
+        [AUTOMATION_AUTO_EXECUTABLE_POINTS, AUTOMATION_ELIGIBLE_POINTS],
+        default=0,
+    ).astype(np.int64)
+
+    if current_user_id:
+        assigned_to_user = columns["assigned_user_id"] == str(current_user_id)
+    else:
+        assigned_to_user = np.zeros(size, dtype=bool)
+    assignment = np.select(
+        [assigned_to_user, columns["assigned_team_id"]],
+        [ASSIGNED_TO_USER_POINTS, ASSIGNED_TO_TEAM_POINTS],
+        default=0,
+    ).astype(np.int64)
+
+    scores = {
+        "priority": priority,
+        "sla": sla,
+        "business_impact": business_impact,
+        "automation": automation,
+        "assignment": assignment,
+    }
+    scores["total"] = sum(scores[name] for name in SCORE_COMPONENTS)
+    return scores
+
+
+def next_band_change(columns, at=None):
+    """
+    Epoch seconds at which each item's SLA urgency band next changes, NaN when it never will
+    (no SLA, or already breached). Persisted scores only go stale at these instants.
+    """
+    at = at or datetime.now(timezone.utc)
+    sla_target = columns["sla_target_minutes"]
+    remaining = sla_target - (at.timestamp() - columns["created_at"]) / 60
+    next_bound = np.full(len(columns["id"]), np.nan)
+    for upper_bound in sorted(bound for bound, _ in SLA_URGENCY_BANDS):
+        next_bound[(sla_target != 0) & (remaining > upper_bound)] = upper_bound
+    return at.timestamp() + (remaining - next_bound) * 60
+
+
+def refresh_smart_score(work_item, at=None):
+    """Set the persisted smart_score and its next rescore time on a WorkItem without saving it."""
+    at = at or datetime.now(timezone.utc)
+    columns = instance_score_columns(work_item)
+    work_item.smart_score = int(score_columns(columns, at=at)["total"][0])
+    rescore_at = next_band_change(columns, at=at)[0]
+    if work_item.status in CLOSED_STATUSES or np.isnan(rescore_at):
+        work_item.smart_score_rescore_at = None
+    else:
+        work_item.smart_score_rescore_at = datetime.fromtimestamp(rescore_at, timezone.utc)
+
+
+def rescore_work_items(queryset, at=None, batch_size=1000):
+    """
+    Re-score a WorkItem queryset and persist smart_score and its next rescore time
+    in bulk (no save(), so no signals). Returns the number of items updated.
+    """
+    at = at or datetime.now(timezone.utc)
+    columns = load_score_columns(queryset)
+    totals = score_columns(columns, at=at)["total"]
+    rescore_at = next_band_change(columns, at=at)
+    updates = [
+        WorkItem(
+            id=pk,
+            smart_score=int(total),
+            smart_score_rescore_at=None if status in CLOSED_STATUSES or np.isnan(next_at) else datetime.fromtimestamp(next_at, timezone.utc),
+        )
+        for pk, status, total, next_at in zip(columns["id"], columns["status"], totals, rescore_at)
+    ]
+    WorkItem.objects.bulk_update(updates, ["smart_score", "smart_score_rescore_at"], batch_size=batch_size)
+    return len(updates)
+
+
+def rank_work_items(queryset, limit=50, current_user_id=None, at=None):
+    """Score a WorkItem queryset in one pass and return the top `limit` with their breakdown."""
+    columns = load_score_columns(queryset)
+    scores = score_columns(columns, current_user_id=current_user_id, at=at)
+    # Highest score first, oldest item first among equal scores
+    order = np.lexsort((columns["created_at"], -scores["total"]))[:limit]
+    results = []
+    for i in order:
+        results.append({
+            "id": columns["id"][i],
+            "title": columns["title"][i],
+            "status": columns["status"][i],
+            "priority": columns["priority"][i],
+            "score": int(scores["total"][i]),
+            "breakdown": {name: int(scores[name][i]) for name in SCORE_COMPONENTS},
+        })
+    return {"count": len(columns["id"]), "results": results}
+
+
+def smart_queue(queryset, limit=50, current_user_id=None):
+    """
+    Top `limit` items of a WorkItem queryset ordered by the persisted smart_score, which lets the
+    database walk the score index. Only that page is re-scored live to produce the breakdown.
+    """
+    if current_user_id:
+        # The persisted score assumes nobody is looking; credit the viewer's own assignments
+        ordered = queryset.alias(queue_score=F("smart_score") + Case(
+            When(assigned_user_id=current_user_id, assigned_team__isnull=True, then=ASSIGNED_TO_USER_POINTS),
+            When(assigned_user_id=current_user_id, then=ASSIGNED_TO_USER_POINTS - ASSIGNED_TO_TEAM_POINTS),
+            default=0,
+        )).order_by("-queue_score", "created_at")
+    else:
+        ordered = queryset.order_by("-smart_score", "created_at")
+    page_ids = list(ordered.values_list("id", flat=True)[:limit])
+    ranked = rank_work_items(queryset.filter(id__in=page_ids), limit=limit, current_user_id=current_user_id)
+    ranked["count"] = queryset.count()
+    return ranked
@@ -0,0 +1,278 @@
+# "Similar incidents / suggested articles": hashed-embedding vectors in memory-mapped files
+import fcntl
+import hashlib
+import json
+import math
+import os
+import threading
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+import numpy as np
+from django.conf import settings
+from ..models.knowledge import KnowledgeBaseArticle
+from ..models.workitems import WorkItem
+from .itsm_schema import CLOSED_STATUSES
+from .kb_search import tokenize
+
+# Width of the hashed embedding; 100k rows take 200 MB of page cache
+DIMENSIONS = 512
+# Rows preallocated when an index file is created; it doubles when full
+INITIAL_CAPACITY = 1024
+# Share of removed rows past which the files are rewritten with the live rows only
+COMPACT_FRACTION = 0.25
+# Rows copied at a time when the files are rewritten
+COPY_CHUNK = 4096
+# Below this cosine similarity a neighbour isn't worth showing
+MIN_SIMILARITY = 0.1
+
+# Bumped when the file layout changes; older files are discarded and rebuilt
+LAYOUT = 2
+# Tenant of rows without one
+NO_TENANT = bytes(16)
+
+# Row flags
+LIVE = 1
+# A resolved incident, i.e. one worth suggesting
+RESOLVED = 2
+
+def embed(text):
+    """
+    L2-normalized hashed embedding of the words and word pairs in `text`, with
+    sublinear term frequency. Signed hashing keeps collisions from adding up.
+    """
+    tokens = tokenize(text)
+    features = Counter(tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])])
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    for feature, count in features.items():
+        digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+        vector[digest % DIMENSIONS] += (1 + math.log(count)) * (1 if digest >> 63 else -1)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def work_item_text(wi):
+    return f"{wi.title}\n{wi.description}"
+
+def article_text(article):
+    return f"{article.title}\n{' '.join(str(tag) for tag in article.tags or [])}\n{article.content}"
+
+def work_item_flags(wi):
+    return LIVE | (RESOLVED if wi.work_type == "incident" and wi.status in CLOSED_STATUSES else 0)
+
+class VectorIndex:
+    """
+    A vector file (capacity x DIMENSIONS float32), id and tenant files (capacity x
+    16 bytes) and a flags file, all memory-mapped, plus a JSON header with the row count.
+    Writers take an exclusive file lock and write rows before the header, so
+    readers in other processes only ever see complete rows; the shared mapping
+    shows them writes without reopening. Growing the index, or compacting it once
+    enough rows are removed, rewrites the files under new names and swaps them in;
+    readers notice the new generation.
+    """
+    def __init__(self, name, directory=None):
+        self.directory = Path(directory or settings.SIMILARITY_INDEX_DIR)
+        self.name = name
+        self.generation = None
+        self.positions = None
+        # Threads of one process share the mapping; the file lock covers other processes
+        self.lock = threading.RLock()
+
+    def path(self, suffix, generation=None):
+        generation = self.generation if generation is None else generation
+        return self.directory / f"{self.name}.{generation}.{suffix}"
+
+    @property
+    def header_path(self):
+        return self.directory / f"{self.name}.json"
+
+    def read_header(self):
+        try:
+            return json.loads(self.header_path.read_text())
+        except FileNotFoundError:
+            return None
+
+    def open(self, header):
+        """Map the files of the header's generation, if they aren't mapped already."""
+        if header["generation"] != self.generation:
+            self.generation = header["generation"]
+            capacity = header["capacity"]
+            self.vectors = np.memmap(self.path("vectors"), dtype=np.float32, mode="r+", shape=(capacity, DIMENSIONS))
+            self.ids = np.memmap(self.path("ids"), dtype="V16", mode="r+", shape=(capacity,))
+            self.tenants = np.memmap(self.path("tenants"), dtype="V16", mode="r+", shape=(capacity,))
+            self.flags = np.memmap(self.path("flags"), dtype=np.uint8, mode="r+", shape=(capacity,))
+            self.positions = None
+        self.count = header["count"]
+
+    @contextmanager
+    def writing(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self.lock, open(self.directory / f"{self.name}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                header = self.read_header()
+                if header is None or not self.compatible(header):
+                    # Missing, or written with another width or layout: start over (rebuild_indexes refills it)
+                    header = self._create(generation=(header or {}).get("generation", 0) + 1, capacity=INITIAL_CAPACITY)
+                self.open(header)
+                yield header
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def compatible(header):
+        return header["dimensions"] == DIMENSIONS and header.get("layout") == LAYOUT
+
+    def upsert(self, rows):
+        """Write (uuid, vector, flags, tenant uuid or None) rows, replacing earlier rows for the same ids."""
+        with self.writing() as header:
+            positions = self._positions()
+            for key, vector, flags, tenant_id in rows:
+                row = positions.get(key.bytes)
+                if row is None:
+                    if self.count == header["capacity"]:
+                        header = self._grow(header)
+                    row = positions[key.bytes] = self.count
+                    self.count += 1
+                elif not self.flags[row]:
+                    # Written again after a removal
+                    header = {**header, "removed": header.get("removed", 0) - 1}
+                self.vectors[row] = vector
+                self.ids[row] = np.void(key.bytes)
+                self.tenants[row] = np.void(tenant_id.bytes if tenant_id else NO_TENANT)
+                self.flags[row] = flags
+            self._commit(header)
+
+    def remove(self, keys):
+        """Blank the rows of the given ids; their slots are reclaimed by the next compaction."""
+        with self.writing() as header:
+            positions = self._positions()
+            removed = header.get("removed", 0)
+            for key in keys:
+                row = positions.get(key.bytes)
+                if row is not None and self.flags[row]:
+                    self.vectors[row] = 0
+                    self.flags[row] = 0
+                    removed += 1
+            header = {**header, "removed": removed}
+            if removed > self.count * COMPACT_FRACTION:
+                self._compact(header)
+            else:
+                self._commit(header)
+
+    def nearest(self, vector, limit, flags=LIVE, exclude=None, tenant_id=None):
+        """(uuid, similarity) of the `limit` rows of a tenant closest to `vector` that have all `flags`."""
+        header = self.read_header()
+        if header is None or not header["count"] or not self.compatible(header):
+            return []
+        with self.lock:
+            self.open(header)
+            scores = self.vectors[:self.count] @ vector
+            scores[(self.flags[:self.count] & flags) != flags] = -1
+            scores[self.tenants[:self.count] != np.void(tenant_id.bytes if tenant_id else NO_TENANT)] = -1
+            if exclude is not None:
+                row = self._positions().get(exclude.bytes)
+                if row is not None:
+                    scores[row] = -1
+            limit = min(limit, self.count)
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            top = top[np.argsort(-scores[top])]
+            return [(uuid.UUID(bytes=self.ids[row].tobytes()), float(scores[row])) for row in top if scores[row] >= MIN_SIMILARITY]
+
+    def _positions(self):
+        if self.positions is None or len(self.positions) > self.count:
+            self.positions = {}
+        for row in range(len(self.positions), self.count):
+            self.positions[self.ids[row].tobytes()] = row
+        return self.positions
+
+    def _create(self, generation, capacity):
+        for suffix, dtype, shape in (
+            ("vectors", np.float32, (capacity, DIMENSIONS)), ("ids", "V16", (capacity,)), ("tenants", "V16", (capacity,)), ("flags", np.uint8, (capacity,)),
+        ):
+            np.memmap(self.path(suffix, generation), dtype=dtype, mode="w+", shape=shape).flush()
+        return {"generation": generation, "capacity": capacity, "count": 0, "removed": 0, "dimensions": DIMENSIONS, "layout": LAYOUT}
+
+    def _grow(self, header):
+        return self._rewrite(header, header["capacity"] * 2, np.arange(self.count), removed=header.get("removed", 0))
+
+    def _compact(self, header):
+        live = np.flatnonzero(self.flags[:self.count])
+        capacity = header["capacity"]
+        # Shrink too, keeping room to grow back into
+        while capacity > INITIAL_CAPACITY and len(live) <= capacity // 4:
+            capacity //= 2
+        return self._rewrite(header, capacity, live)
+
+    def _rewrite(self, header, capacity, rows, removed=0):
+        """Copy `rows` to the start of new files of `capacity` rows and swap them in."""
+        old = {"vectors": self.vectors, "ids": self.ids, "tenants": self.tenants, "flags": self.flags}
+        header = {**self._create(header["generation"] + 1, capacity), "count": len(rows), "removed": removed}
+        for suffix, array in old.items():
+            copy = np.memmap(self.path(suffix, header["generation"]), dtype=array.dtype, mode="r+", shape=(capacity,) + array.shape[1:])
+            for start in range(0, len(rows), COPY_CHUNK):
+                chunk = rows[start:start + COPY_CHUNK]
+                copy[start:start + len(chunk)] = array[chunk]
+            copy.flush()
+        previous = self.generation
+        self.open(header)
+        self._commit(header)
+        # A reader may still be opening the previous files; the ones before them are safe to go
+        for suffix in old:
+            self.path(suffix, previous - 1).unlink(missing_ok=True)
+        return header
+
+    def _commit(self, header):
+        for array in (self.vectors, self.ids, self.tenants, self.flags):
+            array.flush()
+        header = {**header, "generation": self.generation, "count": self.count}
+        tmp = self.header_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(header))
+        os.replace(tmp, self.header_path)
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_index(name):
+    with _indexes_lock:
+        directory = Path(settings.SIMILARITY_INDEX_DIR)
+        index = _indexes.get(name)
+        if index is None or index.directory != directory:
+            index = _indexes[name] = VectorIndex(name, directory)
+        return index
+
+def index_work_items(work_items):
+    get_index("workitems").upsert([(wi.pk, embed(work_item_text(wi)), work_item_flags(wi), wi.tenant_id) for wi in work_items])
+
+def index_articles(articles):
+    get_index("articles").upsert([(article.pk, embed(article_text(article)), LIVE, article.tenant_id) for article in articles])
+
+def refresh_vectors(name, ids):
+    """Re-embed the given work items or articles; ids no longer in the database are removed."""
+    model, index = (WorkItem, index_work_items) if name == "workitems" else (KnowledgeBaseArticle, index_articles)
+    found = list(model.objects.filter(pk__in=ids))
+    index(found)
+    gone = {uuid.UUID(str(pk)) for pk in ids} - {obj.pk for obj in found}
+    if gone:
+        get_index(name).remove(gone)
+
+def rebuild_indexes(chunk_size=1000):
+    """Re-embed every work item and article; rows are upserted, so searches keep working meanwhile."""
+    for queryset, index in (
+        (WorkItem.objects.only("id", "tenant_id", "title", "description", "work_type", "status"), index_work_items),
+        (KnowledgeBaseArticle.objects.only("id", "tenant_id", "title", "content", "tags"), index_articles),
+    ):
+        batch = []
+        for obj in queryset.iterator(chunk_size=chunk_size):
+            batch.append(obj)
+            if len(batch) == chunk_size:
+                index(batch)
+                batch = []
+        index(batch)
+
+def similar_to(wi, limit=5):
+    """The resolved incidents and the articles of the work item's tenant nearest to it."""
+    vector = embed(work_item_text(wi))
+    incidents = get_index("workitems").nearest(vector, limit, flags=LIVE | RESOLVED, exclude=wi.pk, tenant_id=wi.tenant_id)
+    articles = get_index("articles").nearest(vector, limit, tenant_id=wi.tenant_id)
+    return incidents, articles
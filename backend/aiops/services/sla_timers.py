@@ -0,0 +1,30 @@
+# Deadline bookkeeping for the SLA timer engine (tasks.sla_checks)
+from datetime import timedelta
+from .escalation import ESCALATION_MATRIX
+
+# Statuses whose SLA clock is running
+MONITORED_STATUSES = ("new", "in_progress")
+
+def sla_thresholds(work_item):
+    """Instants that need an SLA check, in order: the SLA deadline, then the escalation threshold if it comes later."""
+    thresholds = [work_item.sla_due_at]
+    if work_item.sla_escalation_at and work_item.sla_escalation_at > work_item.sla_due_at:
+        thresholds.append(work_item.sla_escalation_at)
+    return thresholds
+
+def next_threshold(work_item, after=None):
+    """First threshold later than `after`; None once every threshold has been checked."""
+    for threshold in sla_thresholds(work_item):
+        if after is None or threshold > after:
+            return threshold
+    return None
+
+def schedule_sla_timers(work_item):
+    """Set the SLA deadlines and the next pending check on a WorkItem without saving it."""
+    work_item.sla_due_at = work_item.created_at + timedelta(minutes=work_item.sla_target_minutes)
+    rule = ESCALATION_MATRIX.get(work_item.priority)
+    work_item.sla_escalation_at = work_item.created_at + timedelta(minutes=rule["threshold"]) if rule else None
+    if work_item.status in MONITORED_STATUSES:
+        work_item.sla_next_check_at = next_threshold(work_item, after=work_item.sla_checked_at)
+    else:
+        work_item.sla_next_check_at = None
@@ -0,0 +1,112 @@
+# Model signal handlers, connected from AiopsConfig.ready
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models.workitems import WorkItem
+from .models.automation import AutomationExecutionLog, AutomationRule, AutomationTriggerCondition
+from .models.logs import SystemLog
+from .models.knowledge import KnowledgeBaseArticle, KnowledgeFeedback
+from .services.automation_engine import invalidate_rule_index
+from .services.kb_ratings import apply_ratings
+from .services.kb_search import index_article
+from .services.log_correlation import assign_correlation, record_correlations
+from .services.log_counters import count_logs
+from .services.log_templates import assign_templates
+from .services.scoring import SCORE_INPUT_FIELDS, refresh_smart_score, rescore_work_items
+from .services.sla_timers import schedule_sla_timers
+from .tasks.similarity import refresh_similarity_vectors
+
+@receiver(pre_save, sender=WorkItem)
+def score_work_item(sender, instance, raw=False, **kwargs):
+    # Saves that leave the score's inputs alone keep it, and skip the automation stats query
+    if raw or not instance.has_changed(*SCORE_INPUT_FIELDS):
+        return
+    refresh_smart_score(instance)
+
+# Execution logs feed the automation component; batch jobs rescore after their bulk inserts.
+# Logs are never edited or deleted through the API, so deletes (cascades) are left alone
+@receiver(post_save, sender=AutomationExecutionLog)
+def rescore_automated_work_item(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    rescore_work_items(WorkItem.objects.filter(id=instance.work_item_id))
+
+@receiver(pre_save, sender=WorkItem)
+def schedule_work_item_sla(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    schedule_sla_timers(instance)
+
+@receiver([post_save, post_delete], sender=AutomationRule)
+@receiver([post_save, post_delete], sender=AutomationTriggerCondition)
+def recompile_automation_rules(sender, **kwargs):
+    invalidate_rule_index()
+
+# Bulk ingest correlates, templates and counts whole batches itself; these cover logs saved one at a time
+@receiver(pre_save, sender=SystemLog)
+def correlate_system_log(sender, instance, raw=False, **kwargs):
+    if raw or instance.correlation_id:
+        return
+    instance._correlation_key = assign_correlation(instance)
+
+@receiver(pre_save, sender=SystemLog)
+def template_system_log(sender, instance, raw=False, **kwargs):
+    if raw or instance.template_id or not instance._state.adding:
+        return
+    assign_templates([instance])
+
+@receiver(post_save, sender=SystemLog)
+def record_system_log_correlation(sender, instance, created=False, raw=False, **kwargs):
+    key = instance.__dict__.pop("_correlation_key", None)
+    if key is not None:
+        record_correlations([instance], [key])
+    if created and not raw:
+        count_logs([instance])
+
+@receiver(post_save, sender=KnowledgeBaseArticle)
+def index_knowledge_article(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    index_article(instance)
+
+# The article's rating totals change in the same transaction as its feedback
+@receiver(pre_save, sender=KnowledgeFeedback)
+def remember_feedback_rating(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    instance._previous_rating = KnowledgeFeedback.objects.filter(pk=instance.pk).values_list("article_id", "rating").first()
+
+@receiver(post_save, sender=KnowledgeFeedback)
+def add_feedback_rating(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = instance.__dict__.pop("_previous_rating", None)
+    if previous == (instance.article_id, instance.rating):
+        return
+    changes = [(instance.article_id, instance.rating, 1)]
+    if previous is not None:
+        changes.append((*previous, -1))
+    apply_ratings(changes)
+
+@receiver(post_delete, sender=KnowledgeFeedback)
+def remove_feedback_rating(sender, instance, **kwargs):
+    apply_ratings([(instance.article_id, instance.rating, -1)])
+
+# Fields the similarity index reads (the text, its flags and the tenant filter)
+SIMILARITY_FIELDS = {
+    WorkItem: ("title", "description", "status", "work_type", "tenant_id"),
+    KnowledgeBaseArticle: ("title", "content", "tags", "tenant_id"),
+}
+
+# Vector files are written by workers, after commit, so a failed write never fails a save
+@receiver([post_save, post_delete], sender=WorkItem)
+@receiver([post_save, post_delete], sender=KnowledgeBaseArticle)
+def refresh_similarity_vector(sender, instance, raw=False, signal=None, **kwargs):
+    if raw:
+        return
+    if signal is post_save and not instance.has_changed(*SIMILARITY_FIELDS[sender]):
+        return
+    # delete() clears the pk before commit, so read it now
+    name, ids = ("workitems" if sender is WorkItem else "articles"), [str(instance.pk)]
+    # robust: with the broker down the save has still committed; on_commit logs the error instead
+    transaction.on_commit(lambda: refresh_similarity_vectors.delay(name, ids), robust=True)
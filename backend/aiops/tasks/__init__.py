@@ -1 +1,2 @@
-# Celery tasks for SLA monitoring, escalations, metrics, compliance
+# Celery tasks for SLA monitoring, escalations, metrics, compliance, automation, log upkeep, similarity, counters
+from . import sla_checks, escalation_jobs, compliance_checks, metric_rollups, smart_scores, automation_jobs, log_maintenance, similarity, counters  # noqa
@@ -0,0 +1,89 @@
+from celery import chain, shared_task
+from django.db import transaction
+from django.db.models import F
+from django.utils.timezone import now
+from ..models.automation import AutomationBatchJob, AutomationExecutionLog
+from ..models.workitems import WorkItem
+from ..services.automation_engine import eligible_work_items
+from ..services.automation_runner import execute_rule, rule_steps
+from ..services.itsm_schema import CLOSED_STATUSES
+from ..services.scoring import rescore_work_items
+
+# Upper bound on parallel lanes one batch job may occupy on the workers
+MAX_BATCH_CONCURRENCY = 16
+
+@shared_task
+def execute_automation_rule(log_id):
+    """Run a queued automation execution and record its outcome on the log."""
+    log = AutomationExecutionLog.objects.select_related("rule", "work_item").get(id=log_id)
+    execute_rule(log.rule, log.work_item, log)
+    return log.status
+
+def start_batch_job(rule, work_items=None, concurrency=4, chunk_size=50):
+    """
+    Create a batch job for a rule over its eligible, open WorkItems (optionally
+    narrowed to a queryset) and queue it as `concurrency` chains of chunk tasks,
+    so at most that many chunks run at once however large the fleet is. Only items
+    of the work and asset types the rule accepts are read. A chunk that fails
+    outright marks the job failed rather than leaving it running.
+    """
+    concurrency = max(1, min(concurrency, MAX_BATCH_CONCURRENCY))
+    candidates = (work_items if work_items is not None else WorkItem.objects.all()).exclude(status__in=CLOSED_STATUSES)
+    ids = [str(pk) for pk, _ in eligible_work_items(rule.id, candidates.order_by("created_at"))]
+    job = AutomationBatchJob.objects.create(
+        rule=rule,
+        tenant_id=rule.tenant_id,
+        total=len(ids),
+        concurrency=concurrency,
+        chunk_size=chunk_size,
+        status="queued" if ids else "completed",
+        finished_at=None if ids else now(),
+    )
+    chunks = [ids[i:i + chunk_size] for i in range(0, len(ids), chunk_size)]
+    lanes = [chunks[lane::concurrency] for lane in range(concurrency)]
+    transaction.on_commit(lambda: [
+        chain(*(run_batch_chunk.si(str(job.id), chunk) for chunk in lane)).on_error(fail_batch_job.s(job_id=str(job.id))).delay()
+        for lane in lanes if lane
+    ])
+    return job
+
+@shared_task
+def run_batch_chunk(job_id, work_item_ids):
+    """Execute a batch job's rule against one chunk of WorkItems and record the logs in bulk."""
+    job = AutomationBatchJob.objects.select_related("rule").get(id=job_id)
+    if job.status == "cancelled":
+        return 0
+    if job.status == "queued":
+        AutomationBatchJob.objects.filter(id=job.id, status="queued").update(status="running", started_at=now())
+    steps = rule_steps(job.rule)
+    logs = []
+    for wi in WorkItem.objects.filter(id__in=work_item_ids):
+        try:
+            log = execute_rule(job.rule, wi, steps=steps, commit=False)
+        except Exception as e:
+            # One broken item must not stop the rest of the chunk or its lane
+            log = AutomationExecutionLog(
+                rule=job.rule, work_item=wi, tenant_id=wi.tenant_id, status="failed",
+                message=f"Rule {job.rule.name} failed: {e}"[:500], execution_time=0, result={"error": str(e)},
+            )
+        log.batch_job = job
+        logs.append(log)
+    AutomationExecutionLog.objects.bulk_create(logs)
+    # bulk_create skips the signal that rescores single executions
+    rescore_work_items(WorkItem.objects.filter(id__in=[log.work_item_id for log in logs]))
+    succeeded = sum(1 for log in logs if log.status == "success")
+    # Items deleted since the job was planned still count towards completion
+    AutomationBatchJob.objects.filter(id=job.id).update(
+        completed=F("completed") + len(work_item_ids),
+        succeeded=F("succeeded") + succeeded,
+        failed=F("failed") + len(work_item_ids) - succeeded,
+    )
+    AutomationBatchJob.objects.filter(id=job.id, status="running", completed__gte=F("total")).update(
+        status="completed", finished_at=now()
+    )
+    return len(logs)
+
+@shared_task
+def fail_batch_job(request, exc, traceback, job_id=None):
+    """Error callback of a batch lane: a chunk raised, so its remaining chunks will never run."""
+    AutomationBatchJob.objects.filter(id=job_id, status__in=["queued", "running"]).update(status="failed", finished_at=now())
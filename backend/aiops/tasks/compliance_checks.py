@@ -1,19 +1,52 @@
 from celery import shared_task
+from django.db import connection
 from django.utils.timezone import now
-from ..models.assets import AssetComplianceCertificate
+from ..models.assets import Asset, AssetComplianceCertificate
+
+CHUNK_SIZE = 5000
+# Alerts kept in the task result; the rest are only counted
+MAX_ALERT_SAMPLES = 20
 
 @shared_task
-def run_compliance_checks():
-    """Expire outdated compliance certs and return alerts."""
-    today = now().date()
-    expired = AssetComplianceCertificate.objects.filter(expiry_date__lt=today, status="valid")
-    alerts = []
-    for cert in expired:
-        cert.status = "expired"
-        cert.save()
-        alerts.append({
-            "asset": cert.asset.id,
-            "certificate": cert.certificate_type
-        })
-        print(f"[COMPLIANCE] {cert.certificate_type} expired for Asset {cert.asset.name}")
-    return alerts
+def run_compliance_checks(chunk_size=CHUNK_SIZE):
+    """Expire outdated compliance certs and return how many, with the first alerts as samples."""
+    expired, samples = 0, []
+    for chunk in expire_certificates(now(), chunk_size):
+        expired += len(chunk)
+        samples.extend(chunk[:MAX_ALERT_SAMPLES - len(samples)])
+        print(f"[COMPLIANCE] {len(chunk)} certificates expired, e.g. {chunk[0]['certificate']} for Asset {chunk[0]['asset_name']}")
+    return {"expired": expired, "samples": samples}
+
+def expire_certificates(at, chunk_size=CHUNK_SIZE):
+    """Mark valid certificates past their expiry date as expired, yielding their alerts in chunks."""
+    if connection.vendor == "postgresql":
+        yield from _expire_returning(at, chunk_size)
+    else:
+        yield from _expire_in_chunks(at, chunk_size)
+
+def _expire_returning(at, chunk_size):
+    # One set-based UPDATE; asset names are joined in the same statement
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {AssetComplianceCertificate._meta.db_table} AS cert
+            SET status = 'expired', modified_at = %s
+            FROM {Asset._meta.db_table} AS asset
+            WHERE cert.asset_id = asset.id AND cert.status = 'valid' AND cert.expiry_date < %s
+            RETURNING cert.asset_id, asset.name, cert.certificate_type
+            """,
+            [at, at.date()],
+        )
+        while rows := cursor.fetchmany(chunk_size):
+            yield [_alert(*row) for row in rows]
+
+def _expire_in_chunks(at, chunk_size):
+    pending = AssetComplianceCertificate.objects.filter(status="valid", expiry_date__lt=at.date()).order_by("pk")
+    while rows := list(pending.values_list("pk", "asset_id", "asset__name", "certificate_type")[:chunk_size]):
+        AssetComplianceCertificate.objects.filter(pk__in=[row[0] for row in rows], status="valid").update(
+            status="expired", modified_at=at
+        )
+        yield [_alert(*row[1:]) for row in rows]
+
+def _alert(asset_id, asset_name, certificate_type):
+    return {"asset": asset_id, "asset_name": asset_name, "certificate": certificate_type}
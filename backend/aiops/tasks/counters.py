@@ -0,0 +1,7 @@
+from celery import shared_task
+from ..services.counters import flush_counters as flush_pending_counters
+
+@shared_task
+def flush_counters():
+    """Write buffered counter increments (article views and the like) to the database."""
+    return flush_pending_counters()
@@ -1,18 +1,107 @@
+import uuid
 from celery import shared_task
-from ..models.workitems import WorkItem
+from django.db import IntegrityError, connection, transaction
+from django.utils.timezone import now
+from ..models.workitems import WorkItem, WorkItemEscalation
 from ..models.core import ExternalUser, Team
 
+# Titles listed in one coalesced notification before summarising the rest
+MAX_LISTED_TITLES = 10
+
 @shared_task
 def notify_escalation(work_item_id, escalation_target):
     """Send escalation notifications (placeholder for email/Slack/etc)."""
-    wi = WorkItem.objects.get(id=work_item_id)
-    if escalation_target.startswith("team:"):
-        team_id = escalation_target.split(":")[1]
-        team = Team.objects.get(id=team_id)
-        print(f"[ESCALATION] Team {team.name} notified for WorkItem {wi.title}")
-    elif escalation_target.startswith("user:"):
-        user_id = escalation_target.split(":")[1]
-        user = ExternalUser.objects.get(id=user_id)
-        print(f"[ESCALATION] User {user.display_name} notified for WorkItem {wi.title}")
+    notify_escalation_batch(escalation_target, [work_item_id])
+
+@shared_task
+def notify_escalation_batch(escalation_target, work_item_ids):
+    """Send one coalesced escalation notification covering several WorkItems."""
+    titles = list(WorkItem.objects.filter(id__in=work_item_ids).values_list("title", flat=True))
+    listed = ", ".join(titles[:MAX_LISTED_TITLES])
+    if len(titles) > MAX_LISTED_TITLES:
+        listed += f" and {len(titles) - MAX_LISTED_TITLES} more"
+    kind, _, key = escalation_target.partition(":")
+    if kind == "team":
+        team = _lookup(Team.objects.all(), key, "name")
+        print(f"[ESCALATION] Team {team.name if team else key} notified for {len(titles)} WorkItems: {listed}")
+    elif kind == "user":
+        user = _lookup(ExternalUser.objects.all(), key, "display_name")
+        print(f"[ESCALATION] User {user.display_name if user else key} notified for {len(titles)} WorkItems: {listed}")
     else:
-        print(f"[ESCALATION] Unknown target {escalation_target} for WorkItem {wi.title}")
+        print(f"[ESCALATION] Unknown target {escalation_target} for {len(titles)} WorkItems: {listed}")
+
+def dispatch_escalations(escalations):
+    """
+    Fan escalations out as one notify_escalation_batch task per target.
+    escalations: dicts with work_item, tenant_id, escalation_target and threshold_at.
+    Each (work item, threshold) is claimed by inserting its WorkItemEscalation; only
+    escalations this call inserted are notified, so overlapping runs never both send.
+    Notifications are enqueued once the claims commit.
+    Returns {target: [work item ids]} for what was claimed.
+    """
+    escalations = [e for e in escalations if e["escalation_target"]]
+    if not escalations:
+        return {}
+    fresh = {}
+    for e in escalations:
+        fresh.setdefault((e["work_item"], e["threshold_at"]), e)
+    claimed = _claim([
+        WorkItemEscalation(
+            work_item_id=e["work_item"], tenant_id=e["tenant_id"],
+            target=e["escalation_target"], threshold_at=e["threshold_at"],
+        )
+        for e in fresh.values()
+    ])
+
+    by_target = {}
+    for e in fresh.values():
+        if (e["work_item"], e["threshold_at"]) in claimed:
+            by_target.setdefault(e["escalation_target"], []).append(e["work_item"])
+    for target, work_item_ids in by_target.items():
+        ids = [str(pk) for pk in work_item_ids]
+        transaction.on_commit(lambda target=target, ids=ids: notify_escalation_batch.delay(target, ids))
+    return by_target
+
+def _claim(rows):
+    """Insert the escalations not yet recorded; returns (work_item_id, threshold_at) of those inserted."""
+    if connection.vendor not in ("postgresql", "sqlite"):
+        claimed = set()
+        for row in rows:
+            try:
+                with transaction.atomic():
+                    row.save(force_insert=True)
+            except IntegrityError:
+                continue
+            claimed.add((row.work_item_id, row.threshold_at))
+        return claimed
+    table = WorkItemEscalation._meta.db_table
+    columns = ["id", "created_at", "modified_at", "tenant_id", "work_item_id", "target", "threshold_at"]
+    fields = [WorkItemEscalation._meta.get_field(column) for column in columns]
+    stamp = now()
+    keys, claimed = {}, set()
+    for i in range(0, len(rows), 500):
+        chunk = rows[i:i + 500]
+        params = []
+        for row in chunk:
+            row.created_at = row.modified_at = stamp
+            keys[row.id] = (row.work_item_id, row.threshold_at)
+            params += [field.get_db_prep_save(getattr(row, field.attname), connection) for field in fields]
+        placeholders = ", ".join(["(" + ", ".join(["%s"] * len(columns)) + ")"] * len(chunk))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} ({", ".join(columns)}) VALUES {placeholders}
+                ON CONFLICT (work_item_id, threshold_at) DO NOTHING
+                RETURNING id
+                """,
+                params,
+            )
+            claimed.update(keys[uuid.UUID(str(row_id))] for row_id, in cursor.fetchall())
+    return claimed
+
+def _lookup(queryset, key, name_field):
+    # Targets carry either a primary key or a name (e.g. "team:incident_managers")
+    try:
+        return queryset.filter(id=uuid.UUID(key)).first()
+    except ValueError:
+        return queryset.filter(**{name_field: key}).first()
@@ -0,0 +1,14 @@
+from celery import shared_task
+from ..services.log_partitions import partitioning_enabled, ensure_partitions, apply_retention
+from ..services.log_counters import compact_log_counters
+
+@shared_task
+def maintain_system_logs():
+    """Pre-create upcoming SystemLog partitions and apply log retention policies."""
+    created = ensure_partitions() if partitioning_enabled() else []
+    return {"created": created, **apply_retention()}
+
+@shared_task
+def compact_system_log_counters():
+    """Merge recent SystemLog counter rows and expire minute/hour counters."""
+    return compact_log_counters()
@@ -1,40 +1,85 @@
+import operator
+from datetime import date, datetime, time, timedelta, timezone
+from functools import reduce
 from celery import shared_task
+from django.db import transaction
+from django.db.models import Avg, Count, DateTimeField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
 from django.utils.timezone import now
-from django.db.models import Sum
 from ..models.workitems import WorkItem
-from ..models.analytics import AnalyticsMetric, FinancialImpact
+from ..models.analytics import AnalyticsMetric
+from ..services.metric_series import DOWNSAMPLE_WINDOW, downsample_metrics, expire_metric_rollups
+
+ROLLUP_METRICS = {"MTTR": "minutes", "SLA_Compliance": "percent", "Daily_Cost": "currency"}
+# Metric keys matched per DELETE when replacing earlier rollups
+REPLACE_BATCH_SIZE = 500
+# sla_due_at is set on save(); rows written around it (bulk paths) get the deadline
+# schedule_sla_timers would have given them
+SLA_DUE_AT = Coalesce(
+    "sla_due_at",
+    ExpressionWrapper(F("created_at") + F("sla_target_minutes") * timedelta(minutes=1), output_field=DateTimeField()),
+)
+
+def rollup_range(start_date=None, end_date=None):
+    """The (start, end) dates daily_rollup covers for ISO date strings; raises ValueError on bad ones."""
+    end = date.fromisoformat(end_date) if end_date else now().date()
+    start = date.fromisoformat(start_date) if start_date else end - timedelta(days=1)
+    return start, end
 
 @shared_task
-def daily_rollup():
-    """Aggregate MTTR, SLA compliance %, and daily cost impact."""
-    today = now().date()
-    closed_items = WorkItem.objects.filter(status="closed", modified_at__date=today)
+def daily_rollup(start_date=None, end_date=None):
+    """
+    Aggregate MTTR, SLA compliance % and daily cost impact per tenant for every day
+    from start_date to end_date (ISO dates, inclusive). Defaults to yesterday and today,
+    so late closures from yesterday are settled too. Re-running replaces the metrics
+    it writes (same tenant, name and day) and leaves every other sample alone.
+    Returns the number of metrics written.
+    """
+    start, end = rollup_range(start_date, end_date)
+    window_start = datetime.combine(start, time.min, tzinfo=timezone.utc)
+    window_end = datetime.combine(end + timedelta(days=1), time.min, tzinfo=timezone.utc)
 
-    if closed_items.exists():
-        mttr = sum([(wi.modified_at - wi.created_at).total_seconds() for wi in closed_items]) / len(closed_items) / 60
-        AnalyticsMetric.objects.create(
-            name="MTTR",
-            metric_type="minutes",
-            value=mttr,
-            recorded_at=now()
+    rows = (
+        WorkItem.objects.filter(status="closed", modified_at__gte=window_start, modified_at__lt=window_end)
+        .annotate(day=TruncDate("modified_at"))
+        .values("tenant_id", "day")
+        .annotate(
+            closed=Count("id"),
+            mttr=Avg(F("modified_at") - F("created_at")),
+            breaches=Count("id", filter=Q(modified_at__gt=SLA_DUE_AT)),
+            cost=Sum("financial_impact__actual_cost"),
         )
+        .order_by()
+    )
+    metrics = []
+    for row in rows:
+        values = {
+            "MTTR": row["mttr"].total_seconds() / 60,
+            "SLA_Compliance": 100 * (row["closed"] - row["breaches"]) / row["closed"],
+        }
+        if row["cost"]:
+            values["Daily_Cost"] = float(row["cost"])
+        recorded_at = datetime.combine(row["day"], time.min, tzinfo=timezone.utc)
+        metrics += [
+            AnalyticsMetric(
+                tenant_id=row["tenant_id"], name=name, metric_type=ROLLUP_METRICS[name],
+                value=value, recorded_at=recorded_at,
+            )
+            for name, value in values.items()
+        ]
 
-    total = closed_items.count()
-    breaches = sum([1 for wi in closed_items if (wi.modified_at - wi.created_at).total_seconds()/60 > wi.sla_target_minutes])
-    if total > 0:
-        compliance = 100 * (total - breaches) / total
-        AnalyticsMetric.objects.create(
-            name="SLA_Compliance",
-            metric_type="percent",
-            value=compliance,
-            recorded_at=now()
-        )
+    with transaction.atomic():
+        # Replace only the (tenant, name, day) samples written here; others in the window
+        # (other tenants' days, samples posted through the API) are not this rollup's to drop
+        keys = [Q(tenant_id=m.tenant_id, name=m.name, recorded_at=m.recorded_at) for m in metrics]
+        for i in range(0, len(keys), REPLACE_BATCH_SIZE):
+            AnalyticsMetric.objects.filter(reduce(operator.or_, keys[i:i + REPLACE_BATCH_SIZE])).delete()
+        AnalyticsMetric.objects.bulk_create(metrics)
+    downsample_metrics(window_start, window_end)
+    return len(metrics)
 
-    total_cost = FinancialImpact.objects.filter(work_item__in=closed_items).aggregate(total=Sum("actual_cost"))["total"]
-    if total_cost:
-        AnalyticsMetric.objects.create(
-            name="Daily_Cost",
-            metric_type="currency",
-            value=float(total_cost),
-            recorded_at=now()
-        )
+@shared_task
+def downsample_analytics_metrics():
+    """Rebuild the latest AnalyticsMetric rollup buckets and expire old ones."""
+    written = downsample_metrics(now() - DOWNSAMPLE_WINDOW)
+    return {"written": written, "expired": expire_metric_rollups()}
@@ -0,0 +1,12 @@
+from celery import shared_task
+from ..services.similarity import refresh_vectors, rebuild_indexes
+
+@shared_task
+def refresh_similarity_vectors(name, ids):
+    """Re-embed saved or deleted work items ("workitems") or articles ("articles")."""
+    refresh_vectors(name, ids)
+
+@shared_task
+def rebuild_similarity_indexes():
+    """Re-embed every work item and article, healing any update that was missed."""
+    rebuild_indexes()
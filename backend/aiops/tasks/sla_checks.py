@@ -2,16 +2,23 @@ from celery import shared_task
 from django.utils.timezone import now
 from ..models.workitems import WorkItem
 from ..services.escalation import get_escalation_target
+from ..services.sla_timers import MONITORED_STATUSES, next_threshold
+from .escalation_jobs import dispatch_escalations
 
 @shared_task
-def run_sla_checks():
-    """Check open WorkItems against SLA and trigger escalations."""
-    workitems = WorkItem.objects.filter(status__in=["new", "in_progress"])
+def run_sla_checks(batch_size=500):
+    """Check open WorkItems whose next SLA threshold has passed and trigger escalations."""
+    at = now()
+    due = WorkItem.objects.filter(sla_next_check_at__lte=at, status__in=MONITORED_STATUSES).only(
+        "id", "tenant_id", "title", "priority", "work_type", "created_at", "sla_target_minutes",
+        "sla_due_at", "sla_escalation_at", "sla_checked_at", "sla_next_check_at",
+    )
     alerts = []
-    for wi in workitems:
-        elapsed_minutes = (now() - wi.created_at).total_seconds() / 60
-        sla_minutes = wi.sla_target_minutes
-        if elapsed_minutes > sla_minutes:
+    escalations = []
+    checked = []
+    for wi in due.iterator(chunk_size=batch_size):
+        elapsed_minutes = (at - wi.created_at).total_seconds() / 60
+        if elapsed_minutes > wi.sla_target_minutes:
             target = get_escalation_target(wi.priority, wi.work_type, elapsed_minutes)
             alerts.append({
                 "work_item": wi.id,
@@ -19,5 +26,15 @@ def run_sla_checks():
                 "escalation_target": target,
                 "elapsed_minutes": elapsed_minutes
             })
-            # TODO: enqueue escalation notification
+            escalations.append({
+                "work_item": wi.id,
+                "tenant_id": wi.tenant_id,
+                "escalation_target": target,
+                "threshold_at": wi.sla_next_check_at,
+            })
+        wi.sla_checked_at = at
+        wi.sla_next_check_at = next_threshold(wi, after=at)
+        checked.append(wi)
+    WorkItem.objects.bulk_update(checked, ["sla_checked_at", "sla_next_check_at"], batch_size=batch_size)
+    dispatch_escalations(escalations)
     return alerts
@@ -0,0 +1,12 @@
+from celery import shared_task
+from django.utils.timezone import now
+from ..models.workitems import WorkItem
+from ..services.itsm_schema import CLOSED_STATUSES
+from ..services.scoring import rescore_work_items
+
+@shared_task
+def rescore_sla_bands(batch_size=1000):
+    """Re-score open WorkItems whose SLA urgency band changed since the last run."""
+    at = now()
+    due = WorkItem.objects.filter(smart_score_rescore_at__lte=at).exclude(status__in=CLOSED_STATUSES)
+    return rescore_work_items(due, at=at, batch_size=batch_size)
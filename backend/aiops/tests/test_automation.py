@@ -0,0 +1,237 @@
+import random
+import time
+from unittest import mock
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+from aiops_platform.celery import app
+from aiops.models import Asset, AutomationRule, AutomationTriggerCondition, AutomationExecutionStep, AutomationExecutionLog, AutomationBatchJob, WorkItem
+from aiops.services.automation_runner import register_action, run_execution_steps
+from aiops.tasks import automation_jobs
+from aiops.services.automation_engine import KeywordAutomaton, RuleIndex, automation_text
+
+def eligible_by_scan(work_type, asset_type, text, conditions):
+    # The original rule-by-rule check that RuleIndex compiles
+    for work_types, asset_types, keywords in conditions:
+        if work_types and work_type not in work_types:
+            return False
+        if asset_types and asset_type not in asset_types:
+            return False
+        if keywords and not any(kw.lower() in text for kw in keywords):
+            return False
+    return True
+
+class RuleIndexTest(TestCase):
+    def test_automaton_finds_overlapping_keywords(self):
+        automaton = KeywordAutomaton(["disk", "disk full", "isk", "full", "ful"])
+        self.assertEqual(automaton.matches("the disk full alarm"), {"disk", "disk full", "isk", "full", "ful"})
+        self.assertEqual(automaton.matches("diskette"), {"disk", "isk"})
+        self.assertEqual(automaton.matches("nothing"), set())
+
+    def test_index_matches_rule_by_rule_scan(self):
+        rng = random.Random(7)
+        work_types = ["incident", "request", "problem"]
+        asset_types = ["server", "router", None]
+        words = ["disk", "cpu", "full", "latency", "reboot", "db", "Timeout"]
+        rules = [
+            (rule_id, [
+                (rng.sample(work_types, rng.randint(0, 2)), rng.sample(asset_types[:2], rng.randint(0, 1)), rng.sample(words, rng.randint(0, 2)))
+                for _ in range(rng.randint(0, 3))
+            ])
+            for rule_id in range(40)
+        ]
+        index = RuleIndex(rules)
+        for _ in range(200):
+            work_type, asset_type = rng.choice(work_types), rng.choice(asset_types)
+            text = automation_text(" ".join(rng.sample(words, 3)), "high timeout on db")
+            expected = [rule_id for rule_id, conditions in rules if eligible_by_scan(work_type, asset_type, text, conditions)]
+            self.assertEqual(index.match(work_type, asset_type, text), expected)
+            for rule_id in range(5):
+                self.assertEqual(index.is_eligible(rule_id, work_type, asset_type, text), rule_id in expected)
+
+    def test_endpoints_follow_rule_changes(self):
+        asset = Asset.objects.create(name="db-01", asset_type="server", status="active", criticality="high")
+        wi = WorkItem.objects.create(title="Disk full", description="on db-01", work_type="incident", priority="priority_2", asset=asset)
+        # The compiled index is dropped once rule changes commit
+        with self.captureOnCommitCallbacks(execute=True):
+            rule = AutomationRule.objects.create(name="Clean disk", automation_type="remediation")
+            condition = AutomationTriggerCondition.objects.create(rule=rule, work_types=["incident"], asset_types=["server"], keywords=["DISK"])
+        client = APIClient()
+        self.assertEqual(client.get(f"/api/workitems/{wi.id}/automation_eligibility/").data["eligible_rules"], [rule.id])
+        self.assertEqual(client.get(f"/api/automation/rules/{rule.id}/eligible_workitems/").data["eligible_workitems"], [{"id": wi.id, "title": wi.title}])
+        condition.keywords = ["memory"]
+        with self.captureOnCommitCallbacks(execute=True):
+            condition.save()
+        self.assertEqual(client.get(f"/api/workitems/{wi.id}/automation_eligibility/").data["eligible_rules"], [])
+
+        # A rule read back before its transaction rolls back never reaches the cached index
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            doomed = AutomationRule.objects.create(name="Doomed", automation_type="remediation")
+            AutomationTriggerCondition.objects.create(rule=doomed, work_types=["incident"])
+            client.get(f"/api/workitems/{wi.id}/automation_eligibility/")
+            raise RuntimeError
+        self.assertEqual(client.get(f"/api/workitems/{wi.id}/automation_eligibility/").data["eligible_rules"], [])
+
+class BulkEvaluateTest(TestCase):
+    def test_evaluates_many_items_in_constant_queries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            rule = AutomationRule.objects.create(name="Restart", automation_type="remediation")
+            AutomationTriggerCondition.objects.create(rule=rule, work_types=["incident"], keywords=["timeout"])
+        asset = Asset.objects.create(name="api-01", asset_type="server", status="active", criticality="high")
+        items = [
+            WorkItem.objects.create(title=f"Timeout {i}" if i % 2 else f"Slow {i}", description="", work_type="incident", priority="priority_3", asset=asset)
+            for i in range(6)
+        ]
+        client = APIClient()
+        client.post("/api/automation/evaluate/", {"filter": {"work_type": "incident"}}, format="json")
+        with self.assertNumQueries(1):
+            response = client.post("/api/automation/evaluate/", {"work_item_ids": [str(wi.id) for wi in items]}, format="json")
+        self.assertEqual(response.data["evaluated"], 6)
+        self.assertEqual(response.data["matched"], 3)
+        self.assertEqual(response.data["results"][str(items[1].id)], [rule.id])
+        self.assertEqual(response.data["results"][str(items[0].id)], [])
+        self.assertFalse(response.data["truncated"])
+        self.assertEqual(client.post("/api/automation/evaluate/", {"filter": {"owner": "x"}}, format="json").status_code, 400)
+        self.assertEqual(client.post("/api/automation/evaluate/", {"filter": ["work_type"]}, format="json").status_code, 400)
+        with mock.patch("aiops.views.automation.MAX_EVALUATE_ITEMS", 4):
+            response = client.post("/api/automation/evaluate/", {"filter": {"work_type": "incident"}}, format="json")
+        self.assertEqual((response.data["evaluated"], response.data["truncated"]), (4, True))
+
+
+def run_tasks_inline(test):
+    # Enqueued tasks run in-process for the rest of the test, so no broker is needed
+    eager = app.conf.task_always_eager
+    app.conf.task_always_eager = True
+    test.addCleanup(setattr, app.conf, "task_always_eager", eager)
+
+undone = []
+
+@register_action("test_sleep")
+def sleep_step(work_item, params):
+    time.sleep(params["seconds"])
+    return {"slept": params["seconds"]}
+
+@register_action("test_undo")
+def undo_step(work_item, params):
+    undone.append(params["name"])
+
+class StepRunnerTest(TestCase):
+    def setUp(self):
+        self.rule = AutomationRule.objects.create(name="Recycle pool", automation_type="remediation")
+        self.wi = WorkItem.objects.create(title="Pool exhausted", description="", work_type="incident", priority="priority_2")
+        undone.clear()
+        run_tasks_inline(self)
+
+    def step(self, order, action, **params):
+        return AutomationExecutionStep.objects.create(rule=self.rule, order=order, action=action, params=params)
+
+    def test_independent_steps_run_in_parallel(self):
+        for _ in range(3):
+            self.step(1, "test_sleep", seconds=0.3)
+        self.step(2, "test_sleep", seconds=0)
+        started = time.monotonic()
+        status, results = run_execution_steps(self.rule, self.wi)
+        self.assertLess(time.monotonic() - started, 0.8)
+        self.assertEqual(status, "success")
+        self.assertEqual([r["status"] for r in results], ["success"] * 4)
+        self.assertGreaterEqual(results[0]["duration"], 0.3)
+
+    def test_failure_rolls_back_completed_steps_in_reverse(self):
+        self.step(1, "test_sleep", seconds=0, rollback={"action": "test_undo", "params": {"name": "first"}})
+        self.step(2, "test_sleep", seconds=0, rollback={"action": "test_undo", "params": {"name": "second"}})
+        self.step(3, "no_such_action")
+        self.step(4, "test_sleep", seconds=0)
+        status, results = run_execution_steps(self.rule, self.wi)
+        self.assertEqual(status, "rolled_back")
+        self.assertEqual([r["status"] for r in results], ["success", "success", "failed", "skipped", "success", "success"])
+        self.assertEqual(undone, ["second", "first"])
+
+    def test_timed_out_step_is_unknown_and_not_rolled_back(self):
+        self.step(1, "test_sleep", seconds=0, rollback={"action": "test_undo", "params": {"name": "first"}})
+        self.step(2, "test_sleep", seconds=2, timeout=0.1, rollback={"action": "test_undo", "params": {"name": "slow"}})
+        status, results = run_execution_steps(self.rule, self.wi)
+        self.assertEqual(status, "failed")
+        self.assertEqual([r["status"] for r in results], ["success", "unknown", "success"])
+        self.assertTrue(results[1]["timed_out"])
+        self.assertEqual(undone, ["first"])
+
+    def test_execute_records_measured_outcome(self):
+        self.step(1, "test_sleep", seconds=0.05)
+        self.step(2, "no_such_action")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().post(f"/api/automation/rules/{self.rule.id}/execute/", {"work_item_id": str(self.wi.id)}, format="json")
+        self.assertEqual(response.status_code, 202)
+        log = AutomationExecutionLog.objects.get(id=response.data["id"])
+        self.assertEqual(log.status, "failed")
+        self.assertGreaterEqual(log.execution_time, 0.05)
+        self.assertEqual(log.result["steps"][1]["error"], "Unknown action: no_such_action")
+
+
+class BatchExecutionTest(TestCase):
+    def setUp(self):
+        run_tasks_inline(self)
+
+    def test_batch_runs_rule_over_eligible_open_items(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            rule = AutomationRule.objects.create(name="Restart agent", automation_type="remediation")
+            AutomationTriggerCondition.objects.create(rule=rule, work_types=["incident"], keywords=["stuck"])
+        AutomationExecutionStep.objects.create(rule=rule, order=1, action="test_sleep", params={"seconds": 0})
+        AutomationExecutionStep.objects.create(rule=rule, order=2, action="test_sleep", params={"seconds": 0})
+        for i in range(7):
+            WorkItem.objects.create(title=f"Host {i} stuck", description="", work_type="incident", priority="priority_3")
+        WorkItem.objects.create(title="Host stuck", description="", work_type="incident", priority="priority_3", status="closed")
+        WorkItem.objects.create(title="Disk warning", description="", work_type="incident", priority="priority_3")
+        client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(f"/api/automation/rules/{rule.id}/execute-batch/", {"concurrency": 2, "chunk_size": 2}, format="json")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["total"], 7)
+        job = client.get(f"/api/automation/jobs/{response.data['id']}/").data
+        self.assertEqual((job["status"], job["completed"], job["succeeded"], job["failed"]), ("completed", 7, 7, 0))
+        self.assertEqual(AutomationExecutionLog.objects.filter(batch_job_id=job["id"], status="success").count(), 7)
+        # Bulk-inserted logs still feed the automation part of the smart score
+        scores = dict(WorkItem.objects.values_list("title", "smart_score"))
+        self.assertEqual(scores["Host 0 stuck"] - scores["Disk warning"], 100)
+        self.assertEqual(client.post(f"/api/automation/jobs/{job['id']}/cancel/").status_code, 400)
+
+    def test_failures_are_counted_and_a_broken_chunk_fails_the_job(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            rule = AutomationRule.objects.create(name="Restart agent", automation_type="remediation")
+            AutomationTriggerCondition.objects.create(rule=rule, work_types=["incident"])
+        AutomationExecutionStep.objects.create(rule=rule, order=1, action="test_sleep", params={"seconds": 0})
+        for i in range(4):
+            WorkItem.objects.create(title=f"Host {i}", description="", work_type="incident", priority="priority_3")
+        WorkItem.objects.create(title="Laptop", description="", work_type="request", priority="priority_3")
+        client = APIClient()
+        real_execute = automation_jobs.execute_rule
+
+        def flaky(rule, wi, **kwargs):
+            if wi.title == "Host 1":
+                raise RuntimeError("agent unreachable")
+            return real_execute(rule, wi, **kwargs)
+
+        with mock.patch.object(automation_jobs, "execute_rule", flaky), self.captureOnCommitCallbacks(execute=True):
+            job = client.post(f"/api/automation/rules/{rule.id}/execute-batch/", {"concurrency": 1, "chunk_size": 2}, format="json").data
+        job = AutomationBatchJob.objects.get(id=job["id"])
+        self.assertEqual((job.status, job.total, job.succeeded, job.failed), ("completed", 4, 3, 1))
+
+        # Eager chains re-raise the chunk's error once its error callback has run
+        with mock.patch.object(AutomationExecutionLog.objects, "bulk_create", side_effect=RuntimeError("db down")), \
+                self.assertRaises(RuntimeError), self.captureOnCommitCallbacks(execute=True):
+            client.post(f"/api/automation/rules/{rule.id}/execute-batch/", {"concurrency": 1, "chunk_size": 2}, format="json")
+        job = AutomationBatchJob.objects.exclude(id=job.id).get()
+        self.assertEqual((job.status, job.completed), ("failed", 0))
+        self.assertIsNotNone(job.finished_at)
+
+
+# Autocommit, as in production: the enqueue runs inside the request
+class ExecuteEnqueueTest(TransactionTestCase):
+    def test_unreachable_queue_fails_the_log_and_returns_503(self):
+        rule = AutomationRule.objects.create(name="Recycle pool", automation_type="remediation")
+        with mock.patch("aiops.signals.refresh_similarity_vectors.delay"):
+            wi = WorkItem.objects.create(title="Pool exhausted", description="", work_type="incident", priority="priority_2")
+        with mock.patch("aiops.views.automation.execute_automation_rule") as task, self.assertLogs("aiops.views.automation", "ERROR"):
+            task.delay.side_effect = ConnectionError("broker down")
+            response = APIClient().post(f"/api/automation/rules/{rule.id}/execute/", {"work_item_id": str(wi.id)}, format="json")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(AutomationExecutionLog.objects.get(id=response.data["id"]).status, "failed")
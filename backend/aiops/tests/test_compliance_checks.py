@@ -0,0 +1,49 @@
+from datetime import timedelta
+from unittest import mock
+from django.db import connection
+from django.test import TestCase
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+from aiops.models import Asset, AssetComplianceCertificate
+from aiops.tasks import compliance_checks
+from aiops.tasks.compliance_checks import expire_certificates
+
+class CertificateExpiryTest(TestCase):
+    def setUp(self):
+        today = now().date()
+        self.assets = [Asset.objects.create(name=f"db-0{i}", asset_type="server", status="active", criticality="high") for i in range(3)]
+        self.overdue = [
+            AssetComplianceCertificate.objects.create(asset=asset, certificate_type=f"SOC2-{i}", expiry_date=today - timedelta(days=i + 1), status="valid")
+            for i, asset in enumerate(self.assets)
+        ]
+        self.current = AssetComplianceCertificate.objects.create(asset=self.assets[0], certificate_type="ISO27001", expiry_date=today + timedelta(days=1), status="valid")
+        self.revoked = AssetComplianceCertificate.objects.create(asset=self.assets[1], certificate_type="PCI", expiry_date=today - timedelta(days=1), status="revoked")
+
+    def assert_expired_only_overdue(self):
+        statuses = dict(AssetComplianceCertificate.objects.values_list("id", "status"))
+        self.assertEqual({statuses[cert.id] for cert in self.overdue}, {"expired"})
+        self.assertEqual((statuses[self.current.id], statuses[self.revoked.id]), ("valid", "revoked"))
+
+    def test_expires_overdue_certificates_in_chunks(self):
+        # The vendor's own path: UPDATE ... RETURNING on PostgreSQL, pk chunks elsewhere
+        chunks = list(expire_certificates(now(), chunk_size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+        self.assertCountEqual(
+            [alert for chunk in chunks for alert in chunk],
+            [{"asset": cert.asset_id, "asset_name": cert.asset.name, "certificate": cert.certificate_type} for cert in self.overdue],
+        )
+        self.assert_expired_only_overdue()
+        self.assertEqual(list(expire_certificates(now())), [])
+
+    def test_chunked_fallback_on_any_backend(self):
+        with mock.patch.object(connection, "vendor", "sqlite"):
+            alerts = [alert for chunk in expire_certificates(now(), chunk_size=2) for alert in chunk]
+        self.assertCountEqual([alert["certificate"] for alert in alerts], ["SOC2-0", "SOC2-1", "SOC2-2"])
+        self.assert_expired_only_overdue()
+
+    @mock.patch.object(compliance_checks, "MAX_ALERT_SAMPLES", 2)
+    def test_task_returns_a_count_and_samples(self):
+        response = APIClient().post("/api/orchestration/run-compliance-checks/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["expired"], 3)
+        self.assertEqual(len(response.data["samples"]), 2)
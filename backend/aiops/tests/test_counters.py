@@ -0,0 +1,55 @@
+from unittest import mock
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from aiops.models import KnowledgeBaseArticle
+from aiops.services.counters import flush_counters, increment, pending, reset_counter_buffer
+
+@override_settings(COUNTER_BUFFER_URL="", COUNTER_FLUSH_INTERVAL=3600, COUNTER_MAX_PENDING=1000)
+class BufferedCounterTest(TestCase):
+    def setUp(self):
+        reset_counter_buffer()
+        self.addCleanup(reset_counter_buffer)
+        self.articles = [
+            KnowledgeBaseArticle.objects.create(title=f"Article {i}", knowledge_type="howto", content="...")
+            for i in range(3)
+        ]
+
+    def test_article_views_are_buffered_then_flushed_in_batches(self):
+        client = APIClient()
+        first, second, third = self.articles
+        for article, views in ((first, 3), (second, 3), (third, 1)):
+            for _ in range(views):
+                self.assertEqual(client.get(f"/api/kb/{article.id}/").status_code, 200)
+        first.refresh_from_db()
+        self.assertEqual(first.view_count, 0)
+        self.assertEqual(client.get(f"/api/kb/{first.id}/stats/").data["view_count"], 3)
+
+        # One UPDATE for the two articles with 3 views, one for the article with 1
+        with self.assertNumQueries(4):
+            self.assertEqual(flush_counters(), 3)
+        self.assertEqual(
+            list(KnowledgeBaseArticle.objects.order_by("title").values_list("view_count", flat=True)), [3, 3, 1]
+        )
+        self.assertEqual(pending(KnowledgeBaseArticle, first.id, "view_count"), 0)
+        self.assertEqual(flush_counters(), 0)
+
+    @override_settings(COUNTER_MAX_PENDING=2)
+    def test_full_buffer_flushes_itself(self):
+        increment(KnowledgeBaseArticle, self.articles[0].id, "view_count", 5)
+        self.assertEqual(KnowledgeBaseArticle.objects.filter(view_count=5).count(), 0)
+        increment(KnowledgeBaseArticle, self.articles[1].id, "view_count")
+        self.assertEqual(
+            list(KnowledgeBaseArticle.objects.order_by("title").values_list("view_count", flat=True)), [5, 1, 0]
+        )
+
+    @override_settings(COUNTER_MAX_PENDING=1)
+    def test_failed_flush_keeps_the_view_and_the_request(self):
+        article = self.articles[0]
+        with mock.patch("aiops.services.counters.F", side_effect=DatabaseError("down")), \
+                self.assertLogs("aiops.services.counters", "ERROR"):
+            self.assertEqual(APIClient().get(f"/api/kb/{article.id}/").status_code, 200)
+        self.assertEqual(pending(KnowledgeBaseArticle, article.id, "view_count"), 1)
+        flush_counters()
+        article.refresh_from_db()
+        self.assertEqual(article.view_count, 1)
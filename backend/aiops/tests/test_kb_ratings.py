@@ -0,0 +1,42 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from aiops.models import KnowledgeBaseArticle, KnowledgeFeedback
+from aiops.services.counters import reset_counter_buffer
+
+@override_settings(COUNTER_BUFFER_URL="")
+class KnowledgeRatingTotalsTest(TestCase):
+    def setUp(self):
+        reset_counter_buffer()
+        self.addCleanup(reset_counter_buffer)
+
+    def article(self, title):
+        return KnowledgeBaseArticle.objects.create(title=title, knowledge_type="howto", content="...")
+
+    def test_totals_follow_feedback_writes(self):
+        article = self.article("Restart db")
+        client = APIClient()
+        for rating in (5, 4, 4):
+            self.assertEqual(client.post("/api/kb-feedback/", {"article": article.id, "rating": rating}).status_code, 201)
+        feedback = KnowledgeFeedback.objects.filter(rating=5).get()
+        feedback.rating = 2
+        feedback.save()
+        KnowledgeFeedback.objects.filter(rating=4).first().delete()
+
+        with self.assertNumQueries(1):
+            stats = client.get(f"/api/kb/{article.id}/stats/").data
+        self.assertEqual(stats["feedback_count"], 2)
+        self.assertEqual(stats["average_rating"], 3.0)
+        self.assertEqual(stats["rating_distribution"], {"2": 1, "4": 1})
+
+        listed = client.get("/api/kb/").data
+        self.assertNotIn("feedback", listed[0])
+        self.assertEqual((listed[0]["rating_count"], listed[0]["average_rating"]), (2, 3.0))
+        self.assertEqual(len(client.get("/api/kb/", {"expand": "feedback"}).data[0]["feedback"]), 2)
+
+    def test_search_without_query_ranks_by_rating(self):
+        loved, unrated, mixed = self.article("Loved"), self.article("Unrated"), self.article("Mixed")
+        for article, rating in ((loved, 5), (mixed, 5), (mixed, 1)):
+            KnowledgeFeedback.objects.create(article=article, rating=rating)
+        hits = APIClient().get("/api/kb/search/", {"sort": "rating"}).data
+        self.assertEqual([hit["id"] for hit in hits], [loved.id, mixed.id, unrated.id])
+        self.assertEqual(APIClient().get("/api/kb/search/", {"sort": "nope"}).status_code, 400)
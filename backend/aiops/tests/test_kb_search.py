@@ -0,0 +1,66 @@
+import uuid
+from django.test import TestCase
+from rest_framework.test import APIClient
+from aiops.models import KnowledgeBaseArticle, KnowledgeSearchPosting
+from aiops.services.kb_search import snippet
+
+class KnowledgeSearchTest(TestCase):
+    def article(self, title, content, tags=(), work_types=("incident",), tenant_id=None):
+        return KnowledgeBaseArticle.objects.create(
+            title=title, knowledge_type="howto", content=content, tags=list(tags), applicable_work_types=list(work_types), tenant_id=tenant_id,
+        )
+
+    def search(self, **params):
+        response = APIClient().get("/api/kb/search/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_ranks_by_bm25_and_filters_work_types(self):
+        title_hit = self.article("Postgres replication lag", "Check the WAL sender on the primary.")
+        body_hit = self.article("Database runbook", "When replication falls behind, look at disk and network first. " * 3)
+        tagged = self.article("Replica tuning", "Tune the standby.", tags=["replication"], work_types=["problem"])
+        vpn = self.article("VPN tunnel down", "Restart the IPsec daemon.")
+
+        hits = self.search(q="replication lag")
+        self.assertEqual([hit["id"] for hit in hits], [title_hit.id, tagged.id, body_hit.id])
+        self.assertTrue(all(hit["score"] > 0 for hit in hits))
+        self.assertIn("<mark>replication</mark>", hits[2]["snippet"])
+        self.assertEqual([hit["id"] for hit in self.search(q="replication", work_type="problem")], [tagged.id])
+        self.assertEqual([hit["id"] for hit in self.search(keyword="ipsec")], [vpn.id])
+        self.assertEqual(self.search(q="nothing matches zzz"), [])
+        self.assertEqual(APIClient().get("/api/kb/search/", {"q": "the"}).status_code, 400)
+        for params in ({"limit": -1}, {"q": "replication", "limit": -1}, {"q": "replication", "tenant_id": "nope"}, {"tenant_id": "nope"}):
+            response = APIClient().get("/api/kb/search/", params)
+            self.assertEqual(response.status_code, 400)
+            self.assertNotIn("Negative", response.data["error"])
+
+    def test_index_follows_article_edits(self):
+        article = self.article("Rotate certificates", "Renew the TLS certificate before expiry.")
+        postings = KnowledgeSearchPosting.objects.filter(document_id=article.id)
+        self.assertEqual(postings.get(term="certificates").tf, 3.0)
+
+        article.view_count += 1
+        with self.assertNumQueries(2):
+            article.save()
+        article.content = "Renew the SSH host keys."
+        article.save()
+        self.assertFalse(postings.filter(term="tls").exists())
+        self.assertEqual([hit["id"] for hit in self.search(q="ssh")], [article.id])
+        article.delete()
+        self.assertEqual(self.search(q="ssh"), [])
+
+    def test_tenant_scores_ignore_other_tenants_articles(self):
+        tenant, other = uuid.uuid4(), uuid.uuid4()
+        self.article("Postgres replication lag", "Check the WAL sender.", tenant_id=tenant)
+        self.article("VPN tunnel down", "Restart the IPsec daemon.", tenant_id=tenant)
+        before = self.search(q="replication", tenant_id=str(tenant))
+        for i in range(5):
+            self.article(f"Replication runbook {i}", "Replication " * 50, tenant_id=other)
+        self.assertEqual(self.search(q="replication", tenant_id=str(tenant)), before)
+
+    def test_snippet_escapes_and_marks_the_densest_window(self):
+        text = "Intro <b>words</b> " + "filler " * 40 + "disk full on disk array" + " tail" * 40
+        result = snippet(text, ["disk", "full"], words=8)
+        self.assertIn("<mark>disk</mark> <mark>full</mark> on <mark>disk</mark>", result)
+        self.assertTrue(result.startswith("… ") and result.endswith(" …"))
+        self.assertIn("&lt;b&gt;", snippet(text, ["intro"], words=4))
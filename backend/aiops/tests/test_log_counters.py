@@ -0,0 +1,66 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from django.test import TestCase
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+from aiops.models import SystemLog, SystemLogRollup
+from aiops.services.log_counters import bucket_floor, compact_log_counters, cover_range
+
+def at(day, hour=0, minute=0):
+    return datetime(2024, 5, day, hour, minute, tzinfo=timezone.utc)
+
+class LogCounterTest(TestCase):
+    def test_range_is_tiled_with_coarsest_counters(self):
+        self.assertEqual(cover_range(at(1, 22, 30), at(3, 1, 15)), [
+            ("1m", at(1, 22, 30), at(1, 23)),
+            ("1h", at(1, 23), at(2)),
+            ("1d", at(2), at(3)),
+            ("1h", at(3), at(3, 1)),
+            ("1m", at(3, 1), at(3, 1, 15)),
+        ])
+
+    def test_expired_resolutions_widen_to_kept_ones(self):
+        # Minute counters are gone after 2 days, hour counters after 90
+        self.assertEqual(cover_range(at(1, 22, 30), at(3, 1, 15), at=at(5, 2)), [
+            ("1h", at(1, 22), at(2)),
+            ("1d", at(2), at(3)),
+            ("1h", at(3), at(3, 2)),
+        ])
+        self.assertEqual(cover_range(at(1, 22, 30), at(3, 1, 15), at=at(1) + timedelta(days=120)), [("1d", at(1), at(4))])
+
+    def test_api_edits_and_deletes_correct_the_counters(self):
+        start = now() - timedelta(minutes=30)
+        log = SystemLog.objects.create(timestamp=start, level="error", category="db", source="api", message="m")
+        client = APIClient()
+        params = {"start": (start - timedelta(minutes=1)).isoformat(), "end": now().isoformat()}
+        self.assertEqual(client.patch(f"/api/logs/{log.id}/", {"level": "warn"}, format="json").status_code, 200)
+        stats = client.get("/api/logs/stats/", params).data
+        self.assertEqual((stats["total"], stats["by_level"]), (1, [{"level": "warn", "total": 1}]))
+        self.assertEqual(client.delete(f"/api/logs/{log.id}/").status_code, 204)
+        self.assertEqual(client.get("/api/logs/stats/", params).data["total"], 0)
+
+    def test_stats_read_counters_for_the_requested_range(self):
+        tenant = uuid.uuid4()
+        # Recent enough that minute counters are still kept
+        base = bucket_floor(now(), 86400) - timedelta(days=3)
+        at = lambda day, hour=0, minute=0: base + timedelta(days=day - 1, hours=hour, minutes=minute)
+        for when, level, category in [
+            (at(1, 23, 59), "error", "db"), (at(2, 3), "error", "db"), (at(2, 5), "error", "db"), (at(2, 3, 1), "info", "net"),
+            (at(2, 12, 40), "warn", "db"), (at(3, 0, 5), "error", "net"),
+        ]:
+            SystemLog.objects.create(timestamp=when, level=level, category=category, source="api", message="m", tenant_id=tenant)
+        SystemLog.objects.create(timestamp=at(2, 4), level="error", category="db", source="api", message="m")
+        day_errors = SystemLogRollup.objects.filter(resolution="1d", bucket_start=at(2), level="error", tenant_id=tenant)
+        self.assertEqual(day_errors.count(), 2)
+        compact_log_counters(at=at(3, 1))
+        self.assertEqual(list(day_errors.values_list("count", flat=True)), [2])
+
+        client = APIClient()
+        with self.assertNumQueries(1):
+            stats = client.get("/api/logs/stats/", {"start": at(1, 23, 30).isoformat(), "end": at(3, 0, 3).isoformat(), "tenant_id": str(tenant)}).data
+        self.assertEqual(stats["total"], 5)
+        self.assertEqual({row["level"]: row["total"] for row in stats["by_level"]}, {"error": 3, "info": 1, "warn": 1})
+        self.assertEqual({row["category"]: row["total"] for row in stats["by_category"]}, {"db": 4, "net": 1})
+        stats = client.get("/api/logs/stats/", {"start": at(2, 12).isoformat(), "end": at(3, 0, 6).isoformat()}).data
+        self.assertEqual(stats["total"], 2)
+        self.assertEqual(client.get("/api/logs/stats/", {"start": "yesterday"}).status_code, 400)
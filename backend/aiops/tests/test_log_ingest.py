@@ -0,0 +1,88 @@
+import json
+import uuid
+from django.test import TestCase
+from rest_framework.test import APIClient
+from aiops.models import Asset, SystemLog, SystemLogCorrelation, WorkItem
+from aiops.services.log_templates import reset_template_miners
+
+def ndjson(*records):
+    return "\n".join(r if isinstance(r, str) else json.dumps(r) for r in records)
+
+class LogIngestTest(TestCase):
+    def setUp(self):
+        self.asset = Asset.objects.create(name="edge-01", asset_type="router", status="active", criticality="high")
+        self.client = APIClient()
+
+    def line(self, **overrides):
+        return {"timestamp": "2024-05-01T10:00:00Z", "level": "error", "source": "syslog", "category": "network", "message": "link down", **overrides}
+
+    def post(self, body, **params):
+        query = "&".join(f"{k}={v}" for k, v in params.items())
+        return self.client.post(f"/api/logs/ingest/?{query}", body, content_type="application/x-ndjson")
+
+    def test_ingests_batches_and_reports_rejections(self):
+        body = ndjson(
+            self.line(asset=str(self.asset.id), tags=["bgp"]),
+            self.line(),
+            "{not json",
+            "",
+            self.line(level=None),
+            self.line(asset=str(uuid.uuid4())),
+            self.line(timestamp="yesterday"),
+            self.line(message="link up"),
+        )
+        response = self.post(body, batch_size=4)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["accepted"], response.data["rejected"]), (3, 4))
+        self.assertEqual([(b["accepted"], b["rejected"]) for b in response.data["batches"]], [(2, 2), (1, 2)])
+        self.assertEqual([e["line"] for e in response.data["batches"][0]["errors"]], [3, 5])
+        self.assertEqual(SystemLog.objects.filter(asset=self.asset, tags=["bgp"]).count(), 1)
+        self.assertEqual(SystemLog.objects.count(), 3)
+
+    def test_batch_costs_constant_queries(self):
+        body = ndjson(*(self.line(asset=str(self.asset.id), message=f"flap {i}") for i in range(50)))
+        reset_template_miners()
+        # The first batch also loads the tenant's stored templates
+        with self.assertNumQueries(7):
+            response = self.post(body)
+        self.assertEqual(response.data["accepted"], 50)
+        # One template and correlation group, but every message differs: nothing folds
+        self.assertEqual(SystemLog.objects.filter(occurrences=1).count(), 50)
+        self.assertEqual(self.post("", tenant_id="nope").status_code, 400)
+
+
+class LogCorrelationTest(TestCase):
+    def test_groups_by_window_scope_and_fingerprint(self):
+        asset = Asset.objects.create(name="db-01", asset_type="server", status="active", criticality="high")
+        other = Asset.objects.create(name="db-02", asset_type="server", status="active", criticality="high")
+        wi = WorkItem.objects.create(title="DB down", description="", work_type="incident", priority="priority_1")
+        lines = [
+            {"timestamp": "2024-05-01T10:00:05Z", "asset": str(asset.id), "work_item": str(wi.id), "message": "Connection to 10.0.0.7:5432 refused after 3 retries"},
+            {"timestamp": "2024-05-01T10:03:00Z", "asset": str(asset.id), "message": "connection to 10.0.0.9:5432 refused after 5 retries"},
+            {"timestamp": "2024-05-01T10:06:00Z", "asset": str(asset.id), "message": "Connection to 10.0.0.7:5432 refused after 3 retries"},
+            {"timestamp": "2024-05-01T10:01:00Z", "asset": str(other.id), "message": "Connection to 10.0.0.7:5432 refused after 3 retries"},
+            {"timestamp": "2024-05-01T10:02:00Z", "asset": str(asset.id), "message": "Disk quota exceeded"},
+        ]
+        body = "\n".join(json.dumps({"level": "error", "source": "postgres", "category": "db", **line}) for line in lines)
+        client = APIClient()
+        client.post("/api/logs/ingest/", body, content_type="application/x-ndjson")
+
+        logs = list(SystemLog.objects.order_by("timestamp"))
+        first, other_asset, disk, second, next_window = logs
+        self.assertEqual(first.correlation_id, second.correlation_id)
+        self.assertEqual(len({first.correlation_id, other_asset.correlation_id, disk.correlation_id, next_window.correlation_id}), 4)
+        group = SystemLogCorrelation.objects.get(correlation_id=first.correlation_id)
+        self.assertEqual((group.log_id, group.work_item_id), (first.id, wi.id))
+        self.assertEqual(SystemLogCorrelation.objects.count(), 4)
+
+        response = client.get(f"/api/log-correlations/{group.id}/logs/")
+        self.assertEqual([row["id"] for row in response.data], [str(first.id), str(second.id)])
+        with self.assertNumQueries(2):
+            response = client.get(f"/api/workitems/{wi.id}/logs/")
+        self.assertEqual([row["id"] for row in response.data], [str(second.id), str(first.id)])
+        self.assertEqual(client.get(f"/api/workitems/{wi.id}/logs/", {"limit": 1}).data[0]["id"], str(second.id))
+        self.assertEqual(client.get(f"/api/workitems/{wi.id}/logs/", {"limit": -1}).status_code, 400)
+
+        # Logs saved one at a time join the same groups
+        single = SystemLog.objects.create(timestamp=second.timestamp, level="warn", source="postgres", category="db", message="connection to 10.1.1.1:5432 refused after 1 retries", asset=asset)
+        self.assertEqual(single.correlation_id, first.correlation_id)
@@ -0,0 +1,68 @@
+import uuid
+from datetime import timedelta
+from unittest import skipUnless
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+from aiops.models import SystemLog, SystemLogCorrelation, SystemLogRollup, LogRetentionPolicy
+from aiops.services.log_partitions import apply_retention, ensure_partitions, _day_floor
+
+def log(at, tenant_id=None, level="error"):
+    return SystemLog.objects.create(timestamp=at, tenant_id=tenant_id, level=level, source="fw-01", category="network", message="drop")
+
+def rows_in(table):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+@override_settings(SYSTEMLOG_RETENTION_DAYS=30, SYSTEMLOG_RETENTION_ACTION="drop")
+class LogRetentionTest(TestCase):
+    def test_tenant_policy_expires_whole_days_keeping_day_counts(self):
+        short, other = uuid.uuid4(), uuid.uuid4()
+        LogRetentionPolicy.objects.create(tenant_id=short, retention_days=3)
+        today = _day_floor(now())
+        expired = [log(today - timedelta(days=5, hours=-h), short, level) for h, level in [(1, "error"), (2, "error"), (3, "info")]]
+        kept = log(today - timedelta(days=1), short)
+        log(today - timedelta(days=5), other)
+
+        result = apply_retention()
+        self.assertEqual(result["deleted"], 3)
+        self.assertEqual(set(SystemLog.objects.filter(tenant_id=short).values_list("id", flat=True)), {kept.id})
+        self.assertEqual(SystemLog.objects.filter(tenant_id=other).count(), 1)
+        self.assertFalse(SystemLogCorrelation.objects.filter(log_id__in=[e.id for e in expired]).exists())
+        self.assertTrue(SystemLogCorrelation.objects.filter(log_id=kept.id).exists())
+        day_counts = SystemLogRollup.objects.filter(tenant_id=short, resolution="1d", bucket_start=today - timedelta(days=5))
+        self.assertEqual(dict(day_counts.values_list("level").annotate(total=Sum("count"))), {"error": 2, "info": 1})
+
+    def test_only_one_default_policy(self):
+        client = APIClient()
+        self.assertEqual(client.post("/api/log-retention-policies/", {"retention_days": 10}, format="json").status_code, 201)
+        response = client.post("/api/log-retention-policies/", {"retention_days": 20}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("tenant_id", response.data)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            LogRetentionPolicy.objects.create(retention_days=20)
+        LogRetentionPolicy.objects.create(tenant_id=uuid.uuid4(), retention_days=20)
+        self.assertEqual(LogRetentionPolicy.objects.count(), 2)
+
+    @skipUnless(connection.vendor == "postgresql", "SystemLog is only partitioned on PostgreSQL")
+    def test_partitions_are_premade_and_dropped_or_archived(self):
+        keeper, dropper = uuid.uuid4(), uuid.uuid4()
+        LogRetentionPolicy.objects.create(tenant_id=keeper, retention_days=30, action="archive")
+        day = _day_floor(now()) + timedelta(days=40)
+        log(day + timedelta(hours=3), keeper)
+        log(day + timedelta(hours=4), dropper)
+        self.assertEqual(rows_in("aiops_systemlog_default"), 2)
+
+        created = ensure_partitions(at=day, days=1)
+        self.assertEqual(created, [f"aiops_systemlog_p{day:%Y%m%d}", f"aiops_systemlog_p{day + timedelta(days=1):%Y%m%d}"])
+        self.assertEqual(rows_in("aiops_systemlog_default"), 0)
+        self.assertEqual(ensure_partitions(at=day, days=1), [])
+
+        result = apply_retention(at=day + timedelta(days=31))
+        self.assertIn(f"aiops_systemlog_archive_{day:%Y%m%d}", result["archived"])
+        self.assertEqual(rows_in(f"aiops_systemlog_archive_{day:%Y%m%d}"), 1)
+        self.assertFalse(SystemLog.objects.filter(timestamp__lt=day + timedelta(days=1)).exists())
+        self.assertEqual(SystemLogRollup.objects.filter(resolution="1d", bucket_start=day).count(), 2)
@@ -0,0 +1,70 @@
+from datetime import datetime, timezone
+from unittest import skipUnless
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+from aiops.models import SystemLog
+from aiops.services.log_search import parse_search_query, search_logs
+
+def at(day, hour=0):
+    return datetime(2024, 5, day, hour, tzinfo=timezone.utc)
+
+class LogSearchTest(TestCase):
+    def log(self, message, when=None, level="error", source="api"):
+        return SystemLog.objects.create(timestamp=when or at(2), level=level, category="app", source=source, message=message)
+
+    def test_query_parsing(self):
+        self.assertEqual(parse_search_query('"Disk full" db-01 time* foo_bar'), [
+            (["disk", "full"], False), (["db", "01"], False), (["time"], True), (["foo", "bar"], False),
+        ])
+        self.assertEqual(parse_search_query("  -- "), [])
+        with self.assertRaises(ValueError):
+            search_logs("!!")
+
+    def test_phrase_prefix_and_updates_are_indexed(self):
+        full = self.log("Disk full on db-01")
+        reversed_ = self.log("full disk reported by db-02")
+        timeout = self.log("Connection timeout to cache", level="warn")
+        self.assertEqual({log.id for log in search_logs("disk full")}, {full.id, reversed_.id})
+        self.assertEqual([log.id for log in search_logs('"disk full"')], [full.id])
+        self.assertEqual([log.id for log in search_logs("db-01")], [full.id])
+        self.assertEqual([log.id for log in search_logs("time*")], [timeout.id])
+
+        timeout.message = "Connection refused by cache"
+        timeout.save()
+        self.assertEqual(list(search_logs("timeout")), [])
+        self.assertEqual([log.id for log in search_logs("refused")], [timeout.id])
+        full.delete()
+        self.assertEqual([log.id for log in search_logs("disk")], [reversed_.id])
+
+    @skipUnless(connection.vendor == "sqlite", "rowids are SQLite's")
+    def test_renumbered_rowids_keep_their_hits(self):
+        # What VACUUM may do to a table without an INTEGER PRIMARY KEY
+        disk = self.log("Disk full on db-01")
+        self.log("Connection timeout to cache")
+        with connection.cursor() as cursor:
+            cursor.execute(f"UPDATE {SystemLog._meta.db_table} SET rowid = rowid + 1000")
+        self.assertEqual([log.id for log in search_logs("disk")], [disk.id])
+        disk.delete()
+        self.assertEqual(list(search_logs("disk")), [])
+
+    def test_search_endpoint_filters_ranks_and_pages(self):
+        for hour in range(5):
+            self.log("replica lag", when=at(2, hour))
+        best = self.log("replica lag replica lag replica lag", when=at(1))
+        self.log("replica lag", when=at(2), level="info")
+        self.log("replica lag", when=at(2), source="worker")
+        self.log("replica lag", when=at(1) - (at(9) - at(1)))
+
+        client = APIClient()
+        params = {"q": "replica lag", "start": "2024-04-30T00:00:00Z", "end": "2024-05-03T00:00:00Z", "level": "error,warn", "source": "api"}
+        page = client.get("/api/logs/search/", {**params, "page_size": 4}).data
+        self.assertTrue(page["has_more"])
+        self.assertEqual(page["results"][0]["id"], str(best.id))
+        self.assertEqual([r["timestamp"][:13] for r in page["results"][1:]], ["2024-05-02T04", "2024-05-02T03", "2024-05-02T02"])
+        page = client.get("/api/logs/search/", {**params, "page_size": 4, "page": 2}).data
+        self.assertFalse(page["has_more"])
+        self.assertEqual(len(page["results"]), 2)
+
+        self.assertEqual(client.get("/api/logs/search/", {"q": ""}).status_code, 400)
+        self.assertEqual(client.get("/api/logs/search/", {"q": "lag", "page": "x"}).status_code, 400)
@@ -0,0 +1,60 @@
+import json
+from datetime import timedelta
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+from django.utils.timezone import now
+from aiops.models import SystemLog, WorkItem
+from aiops.views import streams
+
+def events(chunk):
+    return [json.loads(line[len("data: "):]) for line in chunk.splitlines() if line.startswith("data: ")]
+
+async def read_messages(stream, count):
+    # The stream polls on its own schedule, so events may arrive split over chunks
+    messages = []
+    while len(messages) < count:
+        messages += [e["message"] for e in events((await anext(stream)).decode())]
+    return messages
+
+@mock.patch.object(streams, "TAIL_POLL_INTERVAL", 0.01)
+class LogTailTest(TestCase):
+    def setUp(self):
+        self.wi = WorkItem.objects.create(title="Replica lag", description="", work_type="incident", priority="priority_2")
+
+    def log(self, message, **fields):
+        fields.setdefault("work_item", self.wi)
+        return SystemLog.objects.create(timestamp=now(), level="error", category="db", source="db-01", message=message, **fields)
+
+    def test_requires_a_filter_and_a_valid_cursor(self):
+        self.assertEqual(self.client.get("/api/logs/tail/").status_code, 400)
+        self.assertEqual(self.client.get("/api/logs/tail/", {"work_item": "x"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/logs/tail/", {"source": "db-01", "since": "soon"}).status_code, 400)
+
+    async def test_stream_resumes_after_last_event_id_and_follows_new_logs(self):
+        log = sync_to_async(self.log)
+        await log("before", created_at=now() - timedelta(minutes=5))
+        seen = await log("seen", created_at=now() - timedelta(minutes=1))
+        await log("other work item", work_item=None)
+        response = await self.async_client.get(
+            "/api/logs/tail/", {"work_item": str(self.wi.id)}, headers={"Last-Event-ID": seen.created_at.isoformat()},
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b"retry:"))
+
+        first = await log("first")
+        chunk = (await anext(stream)).decode()
+        self.assertEqual([e["message"] for e in events(chunk)], ["first"])
+        self.assertIn(f"id: {first.created_at.isoformat()}", chunk)
+
+        # Committed late with an older created_at, but inside the settle window
+        await log("late", created_at=first.created_at - timedelta(seconds=1))
+        await log("second")
+        self.assertEqual(await read_messages(stream, 2), ["late", "second"])
+        await stream.aclose()
+
+    async def test_stream_ends_after_max_duration(self):
+        stream = streams.tail_events(SystemLog.objects.filter(source="db-01"), now(), max_duration=0.05)
+        chunks = [chunk async for chunk in stream]
+        self.assertEqual(chunks, [f"retry: {int(streams.TAIL_POLL_INTERVAL * 1000)}\n\n"])
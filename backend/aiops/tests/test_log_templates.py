@@ -0,0 +1,83 @@
+import json
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from aiops.models import Asset, LogTemplate, SystemLog, WorkItem
+from aiops.services.log_templates import TemplateMiner, reset_template_miners
+
+def ndjson(*records):
+    return "\n".join(json.dumps(r) for r in records)
+
+def line(message, timestamp="2024-05-01T10:00:00Z", **overrides):
+    return {"timestamp": timestamp, "level": "error", "source": "auth", "category": "security", "message": message, **overrides}
+
+class TemplateMinerTest(TestCase):
+    def test_similar_messages_generalize_into_one_template(self):
+        miner = TemplateMiner()
+        digest, template = miner.add("User alice failed login from 10.0.0.7")
+        self.assertEqual(template, "user alice failed login from <*>")
+        self.assertEqual(miner.add("User bob failed login from 10.0.0.9"), (digest, "user <*> failed login from <*>"))
+        self.assertEqual(miner.add("User carol failed login from 10.1.0.1"), (digest, "user <*> failed login from <*>"))
+        self.assertEqual(miner.add("User quota exceeded")[1], "user quota exceeded")
+        self.assertEqual(miner.add("Disk quota exceeded")[1], "disk quota exceeded")
+
+        restarted = TemplateMiner()
+        restarted.load([(digest, "user <*> failed login from <*>")])
+        self.assertEqual(restarted.add("User dave failed login from 10.0.0.1"), (digest, "user <*> failed login from <*>"))
+
+
+@override_settings(SYSTEMLOG_COLLAPSE_WINDOW=60)
+class LogTemplateIngestTest(TestCase):
+    def setUp(self):
+        reset_template_miners()
+        self.client = APIClient()
+
+    def ingest(self, *records):
+        return self.client.post("/api/logs/ingest/", ndjson(*records), content_type="application/x-ndjson").data
+
+    def test_storm_collapses_into_counted_rows_across_batches(self):
+        storm = [line("Token 0x00ff rejected for session 7", f"2024-05-01T10:00:{i:02d}Z") for i in range(40)]
+        self.assertEqual(self.ingest(*storm[:25])["accepted"], 25)
+        self.assertEqual(self.ingest(*storm[25:], line("Token 0x1 rejected for session 1", "2024-05-01T10:01:05Z"))["accepted"], 16)
+        rows = list(SystemLog.objects.order_by("timestamp").values_list("occurrences", "timestamp", "last_seen"))
+        self.assertEqual([r[0] for r in rows], [40, 1])
+        self.assertEqual((rows[0][1].second, rows[0][2].second), (0, 39))
+        template = LogTemplate.objects.get()
+        self.assertEqual((template.template, template.occurrences), ("token <*> rejected for session <*>", 41))
+
+        stats = self.client.get("/api/logs/stats/", {"start": "2024-05-01T00:00:00Z", "end": "2024-05-02T00:00:00Z", "group_by": "template"}).data
+        self.assertEqual(stats["total"], 41)
+        self.assertEqual(stats["by_template"], [{"template_id": template.id, "template": template.template, "total": 41}])
+
+    def test_storm_keeps_work_items_and_values_apart(self):
+        first, second = (
+            WorkItem.objects.create(title=f"Disk alert {i}", description="", work_type="incident", priority="priority_3")
+            for i in range(2)
+        )
+        asset = Asset.objects.create(name="db-01", asset_type="server", status="active", criticality="high")
+        self.ingest(
+            line("disk usage 91 percent", work_item=str(first.id), asset=str(asset.id)),
+            line("disk usage 91 percent", "2024-05-01T10:00:05Z", work_item=str(first.id), asset=str(asset.id)),
+            line("disk usage 92 percent", work_item=str(second.id), asset=str(asset.id)),
+            line("disk usage 93 percent", work_item=str(second.id), asset=str(asset.id)),
+        )
+        rows = SystemLog.objects.order_by("message").values_list("message", "work_item_id", "occurrences")
+        self.assertEqual(list(rows), [
+            ("disk usage 91 percent", first.id, 2), ("disk usage 92 percent", second.id, 1), ("disk usage 93 percent", second.id, 1),
+        ])
+        # The asset's correlation group links the first item's log too
+        logs = self.client.get(f"/api/workitems/{second.id}/logs/").data
+        self.assertLessEqual({"disk usage 92 percent", "disk usage 93 percent"}, {log["message"] for log in logs})
+
+    @override_settings(SYSTEMLOG_COLLAPSE_WINDOW=0)
+    def test_search_groups_hits_by_template(self):
+        self.ingest(
+            *(line(f"Login failed for user u{i}", source=f"web-{i}") for i in range(3)),
+            line("Password expired for user u2"),
+            line("Login session opened"),
+        )
+        self.assertEqual(SystemLog.objects.count(), 5)
+        SystemLog.objects.create(timestamp=SystemLog.objects.first().timestamp, level="info", category="security", source="sso", message="Login failed for user u9")
+        groups = self.client.get("/api/logs/search/", {"q": "login", "start": "2024-05-01T00:00:00Z", "end": "2024-05-02T00:00:00Z", "group_by": "template"}).data
+        self.assertEqual([(g["template"], g["logs"], g["occurrences"]) for g in groups["results"]], [
+            ("login failed for user <*>", 4, 4), ("login session opened", 1, 1),
+        ])
@@ -0,0 +1,69 @@
+import uuid
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+from aiops.models import AnalyticsMetric, FinancialImpact, WorkItem
+from aiops.services.log_counters import bucket_floor
+from aiops.tasks.metric_rollups import daily_rollup
+
+TENANT = uuid.uuid4()
+
+class DailyRollupTest(TestCase):
+    def setUp(self):
+        self.day = bucket_floor(now() - timedelta(days=1), 86400)
+        # Closed after 60 minutes within its 120 minute SLA, and after 90 minutes past its 60 minute one
+        for minutes, sla_minutes in ((60, 120), (90, 60)):
+            wi = WorkItem.objects.create(
+                title="Disk full", description="", work_type="incident", priority="priority_3",
+                status="closed", sla_target_minutes=sla_minutes, tenant_id=TENANT,
+            )
+            WorkItem.objects.filter(pk=wi.pk).update(
+                created_at=self.day, modified_at=self.day + timedelta(minutes=minutes),
+                sla_due_at=self.day + timedelta(minutes=sla_minutes),
+            )
+        FinancialImpact.objects.create(work_item=wi, actual_cost=10)
+        # Still open: not part of the rollup
+        WorkItem.objects.create(title="Disk full", description="", work_type="incident", priority="priority_3", tenant_id=TENANT)
+
+    def metrics(self):
+        return dict(AnalyticsMetric.objects.filter(tenant_id=TENANT, recorded_at=self.day).values_list("name", "value"))
+
+    def test_aggregates_per_tenant_and_day_and_reruns_in_place(self):
+        self.assertEqual(daily_rollup(), 3)
+        self.assertEqual(self.metrics(), {"MTTR": 75, "SLA_Compliance": 50, "Daily_Cost": 10})
+
+        self.assertEqual(daily_rollup(), 3)
+        self.assertEqual(AnalyticsMetric.objects.count(), 3)
+
+    def test_only_the_rollups_own_samples_are_replaced(self):
+        other = uuid.uuid4()
+        AnalyticsMetric.objects.create(tenant_id=other, name="SLA_Compliance", metric_type="percent", value=90, recorded_at=self.day)
+        response = APIClient().post("/api/analytics/metrics/", {
+            "tenant_id": str(TENANT), "name": "MTTR", "metric_type": "minutes", "value": 5, "recorded_at": (self.day + timedelta(hours=2)).isoformat(),
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        daily_rollup()
+        daily_rollup()
+        self.assertEqual(AnalyticsMetric.objects.get(tenant_id=other).value, 90)
+        self.assertTrue(AnalyticsMetric.objects.filter(id=response.data["id"], value=5).exists())
+        self.assertEqual(AnalyticsMetric.objects.count(), 5)
+
+    def test_missing_due_date_falls_back_to_the_sla_target(self):
+        WorkItem.objects.filter(sla_target_minutes=60).update(sla_due_at=None)
+        daily_rollup()
+        self.assertEqual(self.metrics()["SLA_Compliance"], 50)
+
+    def test_long_backfills_are_queued(self):
+        client = APIClient()
+        response = client.post("/api/orchestration/run-metric-rollup/", {"start_date": self.day.date().isoformat()}, format="json")
+        self.assertEqual((response.status_code, response.data["metrics_written"]), (200, 3))
+
+        with mock.patch("aiops.views.orchestration.daily_rollup") as task:
+            task.delay.return_value.id = "rollup-1"
+            response = client.post("/api/orchestration/run-metric-rollup/", {"start_date": "2020-01-01", "end_date": "2020-12-31"}, format="json")
+        self.assertEqual((response.status_code, response.data["task_id"]), (202, "rollup-1"))
+        task.delay.assert_called_once_with("2020-01-01", "2020-12-31")
+        for body in ({"start_date": "2020-02-01", "end_date": "2020-01-01"}, {"start_date": "nope"}):
+            self.assertEqual(client.post("/api/orchestration/run-metric-rollup/", body, format="json").status_code, 400)
@@ -0,0 +1,85 @@
+import uuid
+from datetime import timedelta
+from django.test import TestCase
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+from aiops.models import AnalyticsMetric, AnalyticsMetricRollup
+from aiops.services.log_counters import bucket_floor
+from aiops.services.metric_series import downsample_metrics
+
+TENANT_A, TENANT_B = uuid.uuid4(), uuid.uuid4()
+
+class MetricSeriesTest(TestCase):
+    def setUp(self):
+        self.base = bucket_floor(now() - timedelta(days=1), 86400)
+        for offset, value, tenant, name in (
+            (timedelta(minutes=1), 1, TENANT_A, "cpu"),
+            (timedelta(minutes=1, seconds=30), 3, TENANT_A, "cpu"),
+            (timedelta(minutes=1, seconds=10), 7, TENANT_B, "cpu"),
+            (timedelta(minutes=2), 5, TENANT_A, "cpu"),
+            (timedelta(hours=3), 10, TENANT_A, "cpu"),
+            (timedelta(minutes=1), 99, TENANT_A, "mem"),
+        ):
+            AnalyticsMetric.objects.create(tenant_id=tenant, name=name, metric_type="gauge", value=value, recorded_at=self.base + offset)
+        downsample_metrics(self.base, self.base + timedelta(days=1))
+
+    def trend(self, span, points, **params):
+        response = APIClient().get("/api/analytics/metrics/trend/", {
+            "name": "cpu", "start": self.base.isoformat(), "end": (self.base + span).isoformat(), "points": points, **params,
+        })
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_trend_picks_the_resolution_that_fits_the_budget(self):
+        epoch = int(self.base.timestamp())
+        minutes = self.trend(timedelta(hours=4), 500)
+        self.assertEqual((minutes["resolution"], minutes["step"]), ("1m", 60))
+        self.assertEqual(minutes["timestamps"], [epoch + 60, epoch + 120, epoch + 3 * 3600])
+        self.assertEqual((minutes["count"], minutes["min"], minutes["max"]), ([3, 1, 1], [1, 5, 10], [7, 5, 10]))
+        self.assertAlmostEqual(minutes["avg"][0], 11 / 3)
+
+        hours = self.trend(timedelta(days=1), 100)
+        self.assertEqual((hours["resolution"], hours["timestamps"], hours["sum"]), ("1h", [epoch, epoch + 3 * 3600], [16, 10]))
+
+        days = self.trend(timedelta(days=3), 2, tenant_id=str(TENANT_A))
+        self.assertEqual((days["resolution"], days["step"]), ("1d", 2 * 86400))
+        self.assertEqual((days["timestamps"], days["count"], days["avg"]), ([epoch], [4], [19 / 4]))
+
+        self.assertEqual(APIClient().get("/api/analytics/metrics/trend/").status_code, 400)
+
+    def test_downsampling_a_range_rebuilds_its_buckets(self):
+        AnalyticsMetric.objects.filter(value=10).update(value=20)
+        AnalyticsMetric.objects.create(tenant_id=TENANT_A, name="cpu", metric_type="gauge", value=2, recorded_at=self.base + timedelta(hours=3, minutes=5))
+        downsample_metrics(self.base + timedelta(hours=3, minutes=4), self.base + timedelta(hours=3, minutes=6))
+
+        rollups = AnalyticsMetricRollup.objects.filter(name="cpu", tenant_id=TENANT_A)
+        hour = rollups.get(resolution="1h", bucket_start=self.base + timedelta(hours=3))
+        self.assertEqual((hour.count, hour.value_sum, hour.value_min, hour.value_max), (2, 22, 2, 20))
+        day = rollups.get(resolution="1d")
+        self.assertEqual((day.count, day.value_sum, day.value_min, day.value_max), (5, 31, 1, 20))
+        # The minute edited outside the range keeps its old bucket until a run covers it
+        self.assertEqual(rollups.get(resolution="1m", bucket_start=self.base + timedelta(hours=3)).value_sum, 10)
+
+    def test_api_writes_rebuild_their_buckets(self):
+        client, hour = APIClient(), self.base + timedelta(hours=3)
+        rollups = AnalyticsMetricRollup.objects.filter(name="cpu", tenant_id=TENANT_A)
+        # Other series are neither re-read nor rewritten
+        AnalyticsMetricRollup.objects.filter(tenant_id=TENANT_B).update(value_sum=-1)
+        response = client.post("/api/analytics/metrics/", {
+            "tenant_id": str(TENANT_A), "name": "cpu", "metric_type": "gauge", "value": 2, "recorded_at": (hour + timedelta(minutes=5)).isoformat(),
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        bucket = rollups.get(resolution="1h", bucket_start=hour)
+        self.assertEqual((bucket.count, bucket.value_sum, bucket.value_min, bucket.value_max), (2, 12, 2, 10))
+        self.assertEqual(rollups.get(resolution="1d").count, 5)
+
+        # Moving a sample to another hour rebuilds both
+        moved = client.patch(f"/api/analytics/metrics/{response.data['id']}/", {"recorded_at": (hour + timedelta(hours=1)).isoformat()}, format="json")
+        self.assertEqual(moved.status_code, 200)
+        self.assertEqual(rollups.get(resolution="1h", bucket_start=hour).count, 1)
+        self.assertEqual(rollups.get(resolution="1h", bucket_start=hour + timedelta(hours=1)).value_sum, 2)
+
+        self.assertEqual(client.delete(f"/api/analytics/metrics/{response.data['id']}/").status_code, 204)
+        self.assertFalse(rollups.filter(bucket_start=hour + timedelta(hours=1)).exists())
+        self.assertEqual(rollups.get(resolution="1d").count, 4)
+        self.assertEqual(set(AnalyticsMetricRollup.objects.filter(tenant_id=TENANT_B).values_list("value_sum", flat=True)), {-1})
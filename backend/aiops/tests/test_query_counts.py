@@ -0,0 +1,120 @@
+from datetime import date, timedelta
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+from aiops.models import (
+    Asset, AssetConfigurationItem, AssetComplianceCertificate, AssetCostTracking, BusinessService,
+    ServiceComponent, ServiceComplianceRequirement, Customer, CustomerEscalationContact, Location,
+    Contract, SLATarget, PenaltyClause, Team, TeamMembership, ExternalUser, AutomationRule,
+    AutomationTriggerCondition, AutomationExecutionStep, WorkItem, WorkItemCommunication,
+    WorkItemVendorOrder, WorkItemChangeRelation, Vendor, ChangeRequest, FinancialImpact,
+    SystemLog, SystemLogCorrelation, KnowledgeBaseArticle, KnowledgeFeedback,
+)
+
+def make_work_item():
+    wi = WorkItem.objects.create(title="Outage", description="", work_type="incident", priority="priority_1")
+    WorkItemCommunication.objects.create(work_item=wi, message="ack", sender="noc")
+    WorkItemVendorOrder.objects.create(work_item=wi, vendor=Vendor.objects.create(name="Acme"))
+    WorkItemChangeRelation.objects.create(work_item=wi)
+    FinancialImpact.objects.create(work_item=wi)
+    wi.related_assets.add(make_asset())
+
+def make_asset():
+    asset = Asset.objects.create(name="db-01", asset_type="server", status="active", criticality="high")
+    AssetConfigurationItem.objects.create(asset=asset, key="os", value="linux")
+    AssetComplianceCertificate.objects.create(asset=asset, certificate_type="SOC2", expiry_date=date.today(), status="valid")
+    AssetCostTracking.objects.create(asset=asset)
+    return asset
+
+def make_team():
+    team = Team.objects.create(name="NOC")
+    TeamMembership.objects.create(team=team, user=ExternalUser.objects.create(display_name="Sam", role="engineer"))
+
+def make_rule():
+    rule = AutomationRule.objects.create(name="Restart", automation_type="remediation")
+    AutomationTriggerCondition.objects.create(rule=rule, work_types=["incident"])
+    AutomationExecutionStep.objects.create(rule=rule, order=1, action="restart_service")
+
+def make_customer():
+    customer = Customer.objects.create(name="Globex")
+    customer.locations.add(Location.objects.create(name="HQ"))
+    CustomerEscalationContact.objects.create(customer=customer, name="Ann", role="cto", email="ann@example.com")
+    return customer
+
+def make_contract():
+    contract = Contract.objects.create(customer=make_customer(), title="MSA", valid_from=date.today(), valid_to=date.today())
+    SLATarget.objects.create(contract=contract, work_type="incident", response_minutes=15, resolution_minutes=60)
+    PenaltyClause.objects.create(contract=contract, condition="breach", penalty_amount=100, penalty_type="fixed")
+    return contract
+
+def make_service():
+    service = BusinessService.objects.create(name="Payments", criticality="high", revenue_impact_per_hour=1000)
+    service.customers.add(make_customer())
+    service.contracts.add(make_contract())
+    ServiceComponent.objects.create(service=service, name="api", type="app")
+    ServiceComplianceRequirement.objects.create(service=service, standard="PCI", description="")
+    return service
+
+def make_change_request():
+    change = ChangeRequest.objects.create(title="Patch", description="", scheduled_start=now(), scheduled_end=now() + timedelta(hours=1))
+    change.related_services.add(make_service())
+
+def make_log_correlation():
+    # Saving a log from a new source opens a new correlation group
+    SystemLog.objects.create(timestamp=now(), level="error", source=f"db-{SystemLogCorrelation.objects.count()}", category="db", message="timeout")
+
+def make_article():
+    article = KnowledgeBaseArticle.objects.create(title="Restart db", knowledge_type="howto", content="...")
+    KnowledgeFeedback.objects.create(article=article, rating=5)
+
+class ListQueryCountTest(TestCase):
+    """Each list endpoint must issue the same number of queries for one row as for many."""
+
+    def assertConstantQueries(self, url, make_row, params=None):
+        client = APIClient()
+        make_row()
+        with CaptureQueriesContext(connection) as single:
+            self.assertEqual(client.get(url, params).status_code, 200)
+        for _ in range(4):
+            make_row()
+        with CaptureQueriesContext(connection) as several:
+            self.assertEqual(client.get(url, params).status_code, 200)
+        self.assertEqual(len(several), len(single), [q["sql"] for q in several.captured_queries])
+
+    def test_workitems(self):
+        self.assertConstantQueries(
+            "/api/workitems/", make_work_item,
+            {"expand": "communications,vendor_orders,related_changes,financial_impact"},
+        )
+
+    def test_assets(self):
+        self.assertConstantQueries("/api/assets/", make_asset)
+
+    def test_services(self):
+        self.assertConstantQueries("/api/services/", make_service)
+
+    def test_teams(self):
+        self.assertConstantQueries("/api/people/teams/", make_team)
+
+    def test_team_memberships(self):
+        self.assertConstantQueries("/api/people/memberships/", make_team)
+
+    def test_automation_rules(self):
+        self.assertConstantQueries("/api/automation/rules/", make_rule)
+
+    def test_customers(self):
+        self.assertConstantQueries("/api/customers/", make_customer)
+
+    def test_contracts(self):
+        self.assertConstantQueries("/api/contracts/", make_contract)
+
+    def test_change_requests(self):
+        self.assertConstantQueries("/api/governance/change-requests/", make_change_request)
+
+    def test_log_correlations(self):
+        self.assertConstantQueries("/api/log-correlations/", make_log_correlation)
+
+    def test_knowledge_articles(self):
+        self.assertConstantQueries("/api/kb/", make_article)
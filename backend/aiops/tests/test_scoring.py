@@ -0,0 +1,84 @@
+from datetime import timedelta
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+from aiops.models.workitems import WorkItem
+from aiops.models.services import BusinessService
+from aiops.models.automation import AutomationRule, AutomationExecutionLog
+from aiops.services.scoring import calculate_smart_score, load_score_columns, score_columns
+from aiops.tasks.smart_scores import rescore_sla_bands
+
+class SmartScoreBatchTest(TestCase):
+    def setUp(self):
+        service = BusinessService.objects.create(name="Payments", criticality="high", revenue_impact_per_hour=250000)
+        self.breached = WorkItem.objects.create(
+            title="DB down", description="", work_type="incident", priority="priority_1",
+            sla_target_minutes=30, business_service=service, created_at=now() - timedelta(minutes=45),
+        )
+        self.fresh = WorkItem.objects.create(
+            title="Password reset", description="", work_type="request", priority="priority_3",
+            sla_target_minutes=480,
+        )
+        WorkItem.objects.create(title="Done", description="", work_type="incident", priority="priority_1", status="closed")
+        rule = AutomationRule.objects.create(name="Restart", automation_type="remediation")
+        AutomationExecutionLog.objects.create(rule=rule, work_item=self.fresh, status="success", message="ok", execution_time=1)
+
+    def test_batch_matches_single_item_score(self):
+        at = now()
+        columns = load_score_columns(WorkItem.objects.filter(id__in=[self.breached.id, self.fresh.id]))
+        totals = dict(zip(columns["id"], score_columns(columns, at=at)["total"]))
+        self.assertEqual(totals[self.breached.id], calculate_smart_score({
+            "priority": "priority_1", "sla_target_minutes": 30, "created_at": self.breached.created_at,
+            "modified_at": at, "business_service": {"revenue_impact_per_hour": 250000},
+        }))
+        self.assertEqual(totals[self.fresh.id], calculate_smart_score({
+            "priority": "priority_3", "sla_target_minutes": 480, "created_at": self.fresh.created_at,
+            "modified_at": at, "automation": {"success_rate": 100, "auto_executable": True},
+        }))
+
+    def test_smart_queue_ranks_open_items(self):
+        response = APIClient().get("/api/workitems/smart-queue/", {"limit": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual([r["id"] for r in response.data["results"]], [self.breached.id])
+        self.assertEqual(response.data["results"][0]["breakdown"]["sla"], 300)
+        for params in ({"limit": -1}, {"limit": 0}, {"tenant_id": "nope"}, {"user_id": "nope"}):
+            self.assertEqual(APIClient().get("/api/workitems/smart-queue/", params).status_code, 400)
+
+class PersistedSmartScoreTest(TestCase):
+    def test_score_persisted_on_save_and_rescored_when_band_changes(self):
+        wi = WorkItem.objects.create(
+            title="Disk full", description="", work_type="incident", priority="priority_2",
+            sla_target_minutes=60, created_at=now() - timedelta(minutes=50),
+        )
+        self.assertEqual(wi.smart_score, 300 + 250)
+        self.assertAlmostEqual(
+            (wi.smart_score_rescore_at - wi.created_at).total_seconds(), 60 * 60, delta=1
+        )
+        # Time passes: the item is now past its SLA
+        WorkItem.objects.filter(id=wi.id).update(
+            created_at=now() - timedelta(minutes=70), smart_score_rescore_at=now()
+        )
+        self.assertEqual(rescore_sla_bands(), 1)
+        wi.refresh_from_db()
+        self.assertEqual(wi.smart_score, 300 + 300)
+        self.assertIsNone(wi.smart_score_rescore_at)
+        self.assertEqual(rescore_sla_bands(), 0)
+
+    def test_execution_logs_rescore_and_unrelated_saves_skip_the_stats(self):
+        wi = WorkItem.objects.create(title="Disk full", description="", work_type="incident", priority="priority_2")
+        before = wi.smart_score
+        rule = AutomationRule.objects.create(name="Clean disk", automation_type="remediation")
+        AutomationExecutionLog.objects.create(rule=rule, work_item=wi, status="success", message="", execution_time=1)
+        wi.refresh_from_db()
+        self.assertEqual(wi.smart_score, before + 100)
+
+        wi.description = "on db-01"
+        with CaptureQueriesContext(connection) as queries:
+            wi.save()
+        self.assertFalse(any(AutomationExecutionLog._meta.db_table in query["sql"] for query in queries))
+        wi.priority = "priority_1"
+        wi.save()
+        self.assertEqual(wi.smart_score, before + 200)
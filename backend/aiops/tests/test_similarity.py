@@ -0,0 +1,116 @@
+import tempfile
+import uuid
+from unittest import mock
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from aiops.models import KnowledgeBaseArticle, WorkItem
+from aiops.services import similarity
+from aiops.services.similarity import VectorIndex, embed, rebuild_indexes
+from aiops.tests.test_automation import run_tasks_inline
+
+class SimilarityTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(SIMILARITY_INDEX_DIR=directory.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        run_tasks_inline(self)
+
+    def incident(self, title, description="", status="closed", tenant_id=None):
+        return WorkItem.objects.create(
+            title=title, description=description, work_type="incident", priority="priority_3", status=status, tenant_id=tenant_id,
+        )
+
+    def test_suggests_resolved_incidents_and_articles(self):
+        fixed = self.incident("Postgres replication lag on db-01", "WAL sender stalled, restarted replica")
+        open_twin = self.incident("Postgres replication lag on db-02", "WAL sender stalled", status="new")
+        self.incident("VPN tunnel flapping", "IPsec rekey failures")
+        runbook = KnowledgeBaseArticle.objects.create(title="Replication lag runbook", knowledge_type="howto", content="Check the WAL sender and the replica disk.")
+        KnowledgeBaseArticle.objects.create(title="Printer jams", knowledge_type="howto", content="Open tray two.")
+        rebuild_indexes()
+
+        response = APIClient().get(f"/api/workitems/{open_twin.id}/similar/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([hit["id"] for hit in response.data["incidents"]], [fixed.id])
+        self.assertGreater(response.data["incidents"][0]["similarity"], 0.5)
+        self.assertEqual([hit["id"] for hit in response.data["articles"]], [runbook.id])
+
+        # Resolving the twin makes it a suggestion for others, never for itself
+        open_twin.status = "closed"
+        with self.captureOnCommitCallbacks(execute=True):
+            open_twin.save()
+        hits = APIClient().get(f"/api/workitems/{fixed.id}/similar/").data["incidents"]
+        self.assertEqual([hit["id"] for hit in hits], [open_twin.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            open_twin.delete()
+        self.assertEqual(APIClient().get(f"/api/workitems/{fixed.id}/similar/").data["incidents"], [])
+
+    @mock.patch.object(similarity, "INITIAL_CAPACITY", 2)
+    def test_index_grows_and_other_handles_see_writes(self):
+        writer, reader = VectorIndex("test"), VectorIndex("test")
+        keys = [uuid.uuid4() for _ in range(5)]
+        writer.upsert([(key, embed(f"disk {i} full on host {i}"), similarity.LIVE, None) for i, key in enumerate(keys)])
+        self.assertEqual(reader.nearest(embed("disk 3 full on host 3"), 1)[0][0], keys[3])
+        self.assertEqual(reader.read_header()["capacity"], 8)
+
+        writer.upsert([(keys[3], embed("certificate expired"), similarity.LIVE, None)])
+        self.assertEqual(reader.nearest(embed("certificate expired"), 1)[0][0], keys[3])
+        reader.remove([keys[3]])
+        self.assertNotIn(keys[3], [key for key, _ in writer.nearest(embed("certificate expired"), 5)])
+
+    @mock.patch.object(similarity, "INITIAL_CAPACITY", 2)
+    def test_removed_rows_are_compacted_away(self):
+        writer, reader = VectorIndex("test"), VectorIndex("test")
+        keys = [uuid.uuid4() for _ in range(8)]
+        writer.upsert([(key, embed(f"disk {i} full on host {i}"), similarity.LIVE, None) for i, key in enumerate(keys)])
+        self.assertEqual(reader.nearest(embed("disk 7 full on host 7"), 1)[0][0], keys[7])
+
+        writer.remove(keys[:2])
+        self.assertEqual(reader.read_header()["count"], 8)
+        writer.remove(keys[2:6])
+        header = reader.read_header()
+        self.assertEqual((header["count"], header["removed"], header["capacity"]), (2, 0, 4))
+        self.assertEqual(reader.nearest(embed("disk 7 full on host 7"), 1, exclude=keys[6])[0][0], keys[7])
+        writer.upsert([(keys[0], embed("certificate expired"), similarity.LIVE, None)])
+        self.assertEqual(reader.nearest(embed("certificate expired"), 1)[0][0], keys[0])
+        writer.remove(keys[6:])
+        self.assertEqual(reader.read_header()["capacity"], 2)
+        self.assertEqual([key for key, _ in reader.nearest(embed("certificate expired"), 5)], [keys[0]])
+
+    def test_suggestions_stay_within_the_tenant(self):
+        tenant, other = uuid.uuid4(), uuid.uuid4()
+        own = self.incident("Kafka consumer lag on broker-1", tenant_id=tenant)
+        self.incident("Kafka consumer lag on broker-2", tenant_id=other)
+        self.incident("Kafka consumer lag on broker-3")
+        KnowledgeBaseArticle.objects.create(title="Kafka consumer lag", knowledge_type="howto", content="Scale the consumers.", tenant_id=other)
+        current = self.incident("Kafka consumer lag on broker-4", status="new", tenant_id=tenant)
+        rebuild_indexes()
+
+        response = APIClient().get(f"/api/workitems/{current.id}/similar/")
+        self.assertEqual([hit["id"] for hit in response.data["incidents"]], [own.id])
+        self.assertEqual(response.data["articles"], [])
+        self.assertEqual(APIClient().get(f"/api/workitems/{current.id}/similar/", {"limit": 0}).status_code, 400)
+
+    def test_only_indexed_fields_enqueue_a_refresh(self):
+        wi = self.incident("Disk full on web-01")
+        wi = WorkItem.objects.get(pk=wi.pk)
+        with mock.patch("aiops.signals.refresh_similarity_vectors.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                wi.smart_score = 99
+                wi.save()
+            delay.assert_not_called()
+            with self.captureOnCommitCallbacks(execute=True):
+                wi.description = "Logs rotated"
+                wi.save()
+            delay.assert_called_once_with("workitems", [str(wi.pk)])
+
+    def test_saves_succeed_while_the_broker_is_down(self):
+        with mock.patch("aiops.signals.refresh_similarity_vectors.delay", side_effect=ConnectionError("broker down")), \
+                self.assertLogs(level="ERROR"), self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().post("/api/workitems/", {
+                "title": "Disk full", "description": "on web-01", "work_type": "incident", "priority": "priority_3",
+            }, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(WorkItem.objects.filter(id=response.data["id"]).exists())
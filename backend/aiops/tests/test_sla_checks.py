@@ -0,0 +1,95 @@
+from datetime import timedelta
+from unittest import mock
+from django.db.models import F
+from django.test import TestCase
+from django.utils.timezone import now
+from aiops.models.workitems import WorkItem, WorkItemEscalation
+from aiops.tasks.escalation_jobs import dispatch_escalations, notify_escalation_batch
+from aiops.tasks.sla_checks import run_sla_checks
+
+class SLATimerEngineTest(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(notify_escalation_batch, "delay")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create(self, minutes_ago, **kwargs):
+        fields = {"title": "Outage", "description": "", "work_type": "incident", "priority": "priority_2", "sla_target_minutes": 60}
+        fields.update(kwargs)
+        return WorkItem.objects.create(created_at=now() - timedelta(minutes=minutes_ago), **fields)
+
+    def test_each_threshold_alerts_once(self):
+        wi = self.create(minutes_ago=90)
+        self.create(minutes_ago=10)
+        self.create(minutes_ago=90, status="closed")
+        self.assertEqual(wi.sla_next_check_at, wi.sla_due_at)
+
+        alerts = run_sla_checks()
+        self.assertEqual([a["work_item"] for a in alerts], [wi.id])
+        self.assertIsNone(alerts[0]["escalation_target"])
+        self.assertEqual(run_sla_checks(), [])
+
+        wi.refresh_from_db()
+        self.assertEqual(wi.sla_next_check_at, wi.sla_escalation_at)
+        # Jump past the priority_2 escalation threshold (180 minutes)
+        WorkItem.objects.filter(id=wi.id).update(
+            created_at=now() - timedelta(minutes=200),
+            sla_due_at=now() - timedelta(minutes=140),
+            sla_escalation_at=now() - timedelta(minutes=20),
+            sla_next_check_at=now() - timedelta(minutes=20),
+        )
+        alerts = run_sla_checks()
+        self.assertEqual(alerts[0]["escalation_target"], "team:service_desk")
+        wi.refresh_from_db()
+        self.assertIsNone(wi.sla_next_check_at)
+
+    def test_closing_an_item_cancels_its_timers(self):
+        wi = self.create(minutes_ago=90)
+        wi.status = "closed"
+        wi.save()
+        self.assertIsNone(wi.sla_next_check_at)
+        self.assertEqual(run_sla_checks(), [])
+
+class EscalationFanOutTest(TestCase):
+    def test_breaches_coalesce_per_target_and_never_repeat(self):
+        for i in range(3):
+            WorkItem.objects.create(
+                title=f"P1 outage {i}", description="", work_type="incident", priority="priority_1",
+                sla_target_minutes=30, created_at=now() - timedelta(minutes=90),
+            )
+        with mock.patch.object(notify_escalation_batch, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(len(run_sla_checks()), 3)
+            delay.assert_called_once()
+            target, ids = delay.call_args.args
+            self.assertEqual((target, len(ids)), ("team:incident_managers", 3))
+            self.assertEqual(WorkItemEscalation.objects.count(), 3)
+
+            # A replayed threshold is not sent twice
+            WorkItem.objects.update(sla_next_check_at=F("sla_due_at"))
+            with self.captureOnCommitCallbacks(execute=True):
+                run_sla_checks()
+            delay.assert_called_once()
+
+    def test_overlapping_runs_notify_only_what_they_claim(self):
+        items = [
+            WorkItem.objects.create(
+                title=f"P1 outage {i}", description="", work_type="incident", priority="priority_1",
+                sla_target_minutes=30, created_at=now() - timedelta(minutes=90),
+            )
+            for i in range(3)
+        ]
+        # Both runs read the same due items; the other one claims the first item's breach between
+        # our read and our insert
+        def claim_first(escalations):
+            e = next(e for e in escalations if e["work_item"] == items[0].id)
+            WorkItemEscalation.objects.create(work_item_id=e["work_item"], target=e["escalation_target"], threshold_at=e["threshold_at"])
+            return dispatch_escalations(escalations)
+
+        with mock.patch.object(notify_escalation_batch, "delay") as delay, \
+                mock.patch("aiops.tasks.sla_checks.dispatch_escalations", claim_first):
+            with self.captureOnCommitCallbacks(execute=True):
+                run_sla_checks()
+        _, ids = delay.call_args.args
+        self.assertEqual(sorted(ids), sorted(str(wi.id) for wi in items[1:]))
+        self.assertEqual(WorkItemEscalation.objects.count(), 3)
@@ -1,5 +1,8 @@
+from datetime import timedelta
 from django.test import TestCase
-from aiops.models.workitems import WorkItem
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+from aiops.models.workitems import WorkItem, WorkItemCommunication
 from aiops.services.itsm_schema import validate_status
 
 class WorkItemModelTest(TestCase):
@@ -14,3 +17,31 @@ class WorkItemModelTest(TestCase):
         )
         self.assertTrue(validate_status("incident", wi.status))
         self.assertFalse(validate_status("incident", "foo"))
+
+class WorkItemListTest(TestCase):
+    def setUp(self):
+        for i in range(5):
+            wi = WorkItem.objects.create(
+                title=f"Incident {i}", description="", work_type="incident",
+                priority="priority_3", created_at=now() - timedelta(minutes=i),
+            )
+            WorkItemCommunication.objects.create(work_item=wi, message="ack", sender="noc")
+
+    def test_cursor_pages_with_sparse_fields(self):
+        client = APIClient()
+        first = client.get("/api/workitems/", {"page_size": 3, "fields": "id,title"}).data
+        self.assertEqual([r["title"] for r in first["results"]], ["Incident 0", "Incident 1", "Incident 2"])
+        self.assertEqual(set(first["results"][0]), {"id", "title"})
+        second = client.get(first["next"]).data
+        self.assertEqual([r["title"] for r in second["results"]], ["Incident 3", "Incident 4"])
+        self.assertIsNone(second["next"])
+
+    def test_nested_relations_only_when_expanded(self):
+        client = APIClient()
+        thin = client.get("/api/workitems/").data["results"][0]
+        self.assertNotIn("communications", thin)
+        expanded = client.get("/api/workitems/", {"expand": "communications"}).data["results"][0]
+        self.assertEqual(len(expanded["communications"]), 1)
+        self.assertNotIn("vendor_orders", expanded)
+        detail = client.get(f"/api/workitems/{thin['id']}/").data
+        self.assertIn("vendor_orders", detail)
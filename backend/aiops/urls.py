@@ -4,14 +4,16 @@ from .views.workitems import WorkItemViewSet
 from .views.assets import AssetViewSet
 from .views.services import BusinessServiceViewSet
 from .views.automation import (
-    AutomationRuleViewSet, AutomationTriggerConditionViewSet, AutomationExecutionStepViewSet, AutomationExecutionLogViewSet
+    AutomationRuleViewSet, AutomationTriggerConditionViewSet, AutomationExecutionStepViewSet, AutomationExecutionLogViewSet,
+    AutomationBatchJobViewSet, AutomationEvaluateView,
 )
 from .views.knowledge import KnowledgeBaseArticleViewSet, KnowledgeFeedbackViewSet
-from .views.logs import SystemLogViewSet, SystemLogCorrelationViewSet
+from .views.logs import SystemLogViewSet, SystemLogCorrelationViewSet, LogRetentionPolicyViewSet, LogTemplateViewSet
 from .views.governance import OperationalCategoryViewSet, ChangeRequestViewSet, RiskRegisterViewSet
 from .views.analytics import AnalyticsMetricViewSet, FinancialImpactViewSet
 from .views.people import ExternalUserViewSet, TeamViewSet, TeamMembershipViewSet
 from .views.customers import CustomerViewSet, ContractViewSet, VendorViewSet
+from .views.streams import log_tail
 from .views.orchestration import RunSLAChecksView, NotifyEscalationView, RunComplianceChecksView, RunMetricRollupView
 
 router = DefaultRouter()
@@ -22,10 +24,13 @@ router.register(r'automation/rules', AutomationRuleViewSet)
 router.register(r'automation/triggers', AutomationTriggerConditionViewSet)
 router.register(r'automation/steps', AutomationExecutionStepViewSet)
 router.register(r'automation/logs', AutomationExecutionLogViewSet)
+router.register(r'automation/jobs', AutomationBatchJobViewSet)
 router.register(r'kb', KnowledgeBaseArticleViewSet)
 router.register(r'kb-feedback', KnowledgeFeedbackViewSet)
 router.register(r'logs', SystemLogViewSet)
 router.register(r'log-correlations', SystemLogCorrelationViewSet)
+router.register(r'log-retention-policies', LogRetentionPolicyViewSet)
+router.register(r'log-templates', LogTemplateViewSet)
 router.register(r'governance/categories', OperationalCategoryViewSet)
 router.register(r'governance/change-requests', ChangeRequestViewSet)
 router.register(r'governance/risks', RiskRegisterViewSet)
@@ -38,7 +43,11 @@ router.register(r'customers', CustomerViewSet)
 router.register(r'contracts', ContractViewSet)
 router.register(r'vendors', VendorViewSet)
 
-urlpatterns = router.urls + [
+# Ahead of the router, whose logs/<pk>/ route would otherwise claim these paths
+urlpatterns = [
+    path("logs/tail/", log_tail),
+] + router.urls + [
+    path("automation/evaluate/", AutomationEvaluateView.as_view()),
     path("orchestration/run-sla-checks/", RunSLAChecksView.as_view()),
     path("orchestration/notify-escalation/", NotifyEscalationView.as_view()),
     path("orchestration/run-compliance-checks/", RunComplianceChecksView.as_view()),
@@ -1,19 +1,46 @@
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db import transaction
 from django.db.models import Avg, Sum
-from datetime import timedelta, datetime
+from datetime import timedelta
 from ..models.analytics import AnalyticsMetric, FinancialImpact
 from ..serializers.analytics import AnalyticsMetricSerializer, FinancialImpactSerializer
+from ..services.metric_series import add_sample, metric_trend, resample
+from .logs import parse_time_range, parse_uuid
+from .mixins import EagerLoadingViewSetMixin
 
-class AnalyticsMetricViewSet(viewsets.ModelViewSet):
+# Trend range when no start is given, and the point budget (default and most allowed)
+TREND_DEFAULT_SPAN = timedelta(days=30)
+TREND_DEFAULT_POINTS = 1000
+MAX_TREND_POINTS = 5000
+
+class AnalyticsMetricViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = AnalyticsMetric.objects.all().order_by("-recorded_at")
     serializer_class = AnalyticsMetricSerializer
 
+    # The periodic run only re-reads recent samples; keep the rollups of older ones current.
+    # New samples are folded in as deltas, edits and deletes rebuild just their series' buckets
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            add_sample(serializer.save())
+
+    def perform_update(self, serializer):
+        before = serializer.instance.tenant_id, serializer.instance.name, serializer.instance.recorded_at
+        with transaction.atomic():
+            metric = serializer.save()
+            resample(*before)
+            resample(metric.tenant_id, metric.name, metric.recorded_at)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            resample(instance.tenant_id, instance.name, instance.recorded_at)
+
     @action(detail=False, methods=["get"])
     def aggregate(self, request):
         name = request.query_params.get("name")
-        qs = self.queryset
+        qs = self.get_queryset()
         if name:
             qs = qs.filter(name=name)
         avg_val = qs.aggregate(avg=Avg("value"))["avg"]
@@ -22,18 +49,28 @@ class AnalyticsMetricViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"])
     def trend(self, request):
-        name = request.query_params.get("name")
-        cutoff = datetime.now() - timedelta(days=30)
-        qs = self.queryset.filter(name=name, recorded_at__gte=cutoff).order_by("recorded_at")
-        return Response(AnalyticsMetricSerializer(qs, many=True).data)
+        # Columnar arrays from the rollup resolution that fits ?points=, not sample rows
+        params = request.query_params
+        name = params.get("name")
+        if not name:
+            return Response({"error": "name is required"}, status=400)
+        try:
+            start, end = parse_time_range(params, TREND_DEFAULT_SPAN)
+            tenant_id = parse_uuid(params.get("tenant_id"), "tenant_id")
+            points = int(params.get("points", TREND_DEFAULT_POINTS))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        if start >= end or not 0 < points <= MAX_TREND_POINTS:
+            return Response({"error": f"start must precede end and points be 1-{MAX_TREND_POINTS}"}, status=400)
+        return Response(metric_trend(name, start, end, points, tenant_id=tenant_id))
 
-class FinancialImpactViewSet(viewsets.ReadOnlyModelViewSet):
+class FinancialImpactViewSet(EagerLoadingViewSetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = FinancialImpact.objects.all()
     serializer_class = FinancialImpactSerializer
 
     @action(detail=False, methods=["get"])
     def totals(self, request):
-        qs = self.queryset
+        qs = self.get_queryset()
         totals = {
             "estimated_cost": qs.aggregate(Sum("estimated_cost"))["estimated_cost__sum"] or 0,
             "actual_cost": qs.aggregate(Sum("actual_cost"))["actual_cost__sum"] or 0,
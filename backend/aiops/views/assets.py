@@ -4,8 +4,9 @@ from rest_framework.response import Response
 from ..models.assets import Asset
 from ..serializers.assets import AssetSerializer
 from ..models.assets import AssetComplianceCertificate, AssetCostTracking
+from .mixins import EagerLoadingViewSetMixin
 
-class AssetViewSet(viewsets.ModelViewSet):
+class AssetViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = Asset.objects.all()
     serializer_class = AssetSerializer
 
@@ -1,51 +1,160 @@
+import logging
 from rest_framework import viewsets
+from rest_framework.views import APIView
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.timezone import now
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from ..models.automation import (
-    AutomationRule, AutomationTriggerCondition, AutomationExecutionStep, AutomationExecutionLog
+    AutomationRule, AutomationTriggerCondition, AutomationExecutionStep, AutomationExecutionLog, AutomationBatchJob
 )
 from ..serializers.automation import (
     AutomationRuleSerializer, AutomationTriggerConditionSerializer,
-    AutomationExecutionStepSerializer, AutomationExecutionLogSerializer
+    AutomationExecutionStepSerializer, AutomationExecutionLogSerializer, AutomationBatchJobSerializer
 )
-from ..services.automation_engine import is_work_item_eligible_for_automation
+from ..services.automation_engine import eligible_work_items, evaluate_work_items
 from ..models.workitems import WorkItem
+from ..tasks.automation_jobs import execute_automation_rule, start_batch_job
+from .mixins import EagerLoadingViewSetMixin
 
-class AutomationRuleViewSet(viewsets.ModelViewSet):
+logger = logging.getLogger(__name__)
+
+class AutomationRuleViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = AutomationRule.objects.all()
     serializer_class = AutomationRuleSerializer
 
     @action(detail=True, methods=["get"])
     def eligible_workitems(self, request, pk=None):
         rule = self.get_object()
-        eligible = []
-        for wi in WorkItem.objects.all():
-            if is_work_item_eligible_for_automation(wi, rule):
-                eligible.append({"id": wi.id, "title": wi.title})
+        eligible = [{"id": pk, "title": title} for pk, title in eligible_work_items(rule.id, WorkItem.objects.all())]
         return Response({"eligible_workitems": eligible})
 
     @action(detail=True, methods=["post"])
     def execute(self, request, pk=None):
         rule = self.get_object()
         work_item_id = request.data.get("work_item_id")
-        wi = WorkItem.objects.get(id=work_item_id)
+        try:
+            wi = WorkItem.objects.filter(id=work_item_id).first() if work_item_id else None
+        except ValidationError:
+            wi = None
+        if wi is None:
+            return Response({"error": "Valid work_item_id required"}, status=400)
+        # Steps run on a worker; poll the log for the measured outcome
         log = AutomationExecutionLog.objects.create(
             rule=rule,
             work_item=wi,
-            status="success",
-            execution_time=1.2,
-            result={"message": f"Rule {rule.name} executed"}
+            tenant_id=wi.tenant_id,
+            status="queued",
+            message=f"Rule {rule.name} queued",
+            execution_time=0,
         )
-        return Response(AutomationExecutionLogSerializer(log).data)
+        unqueued = []
+
+        def enqueue():
+            try:
+                execute_automation_rule.delay(log.id)
+            except Exception:
+                # Don't leave a log that stays "queued" forever
+                logger.exception("Could not queue automation execution %s", log.id)
+                log.status, log.message = "failed", f"Rule {rule.name} could not be queued"
+                log.save(update_fields=["status", "message", "modified_at"])
+                unqueued.append(log)
+
+        # After commit, so the worker finds the log; without a surrounding transaction that is now
+        transaction.on_commit(enqueue)
+        if unqueued:
+            return Response({"error": "Automation queue unavailable, try again later", "id": log.id}, status=503)
+        return Response(AutomationExecutionLogSerializer(log).data, status=202)
 
-class AutomationTriggerConditionViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=["post"], url_path="execute-batch")
+    def execute_batch(self, request, pk=None):
+        rule = self.get_object()
+        work_item_ids = request.data.get("work_item_ids")
+        if work_item_ids is not None and not isinstance(work_item_ids, list):
+            return Response({"error": "work_item_ids must be a list"}, status=400)
+        try:
+            concurrency = int(request.data.get("concurrency", 4))
+            chunk_size = int(request.data.get("chunk_size", 50))
+        except (TypeError, ValueError):
+            return Response({"error": "concurrency and chunk_size must be integers"}, status=400)
+        if concurrency < 1 or chunk_size < 1:
+            return Response({"error": "concurrency and chunk_size must be positive"}, status=400)
+        work_items = WorkItem.objects.filter(id__in=work_item_ids) if work_item_ids is not None else None
+        try:
+            job = start_batch_job(rule, work_items, concurrency=concurrency, chunk_size=chunk_size)
+        except ValidationError as e:
+            return Response({"error": e.messages}, status=400)
+        return Response(AutomationBatchJobSerializer(job).data, status=202)
+
+class AutomationTriggerConditionViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = AutomationTriggerCondition.objects.all()
     serializer_class = AutomationTriggerConditionSerializer
 
-class AutomationExecutionStepViewSet(viewsets.ModelViewSet):
+class AutomationExecutionStepViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = AutomationExecutionStep.objects.all()
     serializer_class = AutomationExecutionStepSerializer
 
-class AutomationExecutionLogViewSet(viewsets.ReadOnlyModelViewSet):
+class AutomationExecutionLogViewSet(EagerLoadingViewSetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = AutomationExecutionLog.objects.all()
     serializer_class = AutomationExecutionLogSerializer
+
+class AutomationBatchJobViewSet(EagerLoadingViewSetMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = AutomationBatchJob.objects.all()
+    serializer_class = AutomationBatchJobSerializer
+
+    @action(detail=True, methods=["post"])
+    def cancel(self, request, pk=None):
+        # Chunks already running finish; the rest see the status and stop
+        job = self.get_object()
+        updated = AutomationBatchJob.objects.filter(id=job.id, status__in=["queued", "running"]).update(status="cancelled", finished_at=now())
+        if not updated:
+            return Response({"error": "Job is not running"}, status=400)
+        job.refresh_from_db()
+        return Response(AutomationBatchJobSerializer(job).data)
+
+# Largest batch one evaluate call accepts
+MAX_EVALUATE_ITEMS = 10000
+
+# Filters accepted by the evaluate endpoint, mapped to WorkItem lookups
+EVALUATE_FILTERS = {
+    "status": "status",
+    "work_type": "work_type",
+    "priority": "priority",
+    "tenant_id": "tenant_id",
+    "created_after": "created_at__gte",
+    "created_before": "created_at__lt",
+}
+
+class AutomationEvaluateView(APIView):
+    def post(self, request):
+        work_item_ids = request.data.get("work_item_ids")
+        filters = request.data.get("filter")
+        if work_item_ids is None and filters is None:
+            return Response({"error": "work_item_ids or filter required"}, status=400)
+        qs = WorkItem.objects.all()
+        if work_item_ids is not None:
+            if not isinstance(work_item_ids, list) or len(work_item_ids) > MAX_EVALUATE_ITEMS:
+                return Response({"error": f"work_item_ids must be a list of at most {MAX_EVALUATE_ITEMS} ids"}, status=400)
+            qs = qs.filter(id__in=work_item_ids)
+        if filters is not None:
+            if not isinstance(filters, dict):
+                return Response({"error": "filter must be an object"}, status=400)
+            unknown = set(filters) - set(EVALUATE_FILTERS)
+            if unknown:
+                return Response({"error": f"Unsupported filters: {', '.join(sorted(unknown))}"}, status=400)
+            qs = qs.filter(**{EVALUATE_FILTERS[key]: value for key, value in filters.items()})
+        try:
+            # One extra row tells a filter that matched more than the cap apart from one that didn't
+            results = evaluate_work_items(qs.order_by("created_at", "id")[:MAX_EVALUATE_ITEMS + 1])
+        except ValidationError as e:
+            return Response({"error": e.messages}, status=400)
+        truncated = len(results) > MAX_EVALUATE_ITEMS
+        if truncated:
+            results.pop(next(reversed(results)))
+        return Response({
+            "evaluated": len(results),
+            "truncated": truncated,
+            "matched": sum(1 for rules in results.values() if rules),
+            "results": {str(pk): rules for pk, rules in results.items()},
+        })
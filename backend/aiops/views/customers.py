@@ -5,8 +5,9 @@ from ..models.customers import Customer
 from ..models.contracts import Contract
 from ..models.vendors import Vendor
 from ..serializers.customers import CustomerSerializer, ContractSerializer, VendorSerializer
+from .mixins import EagerLoadingViewSetMixin
 
-class CustomerViewSet(viewsets.ModelViewSet):
+class CustomerViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
 
@@ -15,7 +16,7 @@ class CustomerViewSet(viewsets.ModelViewSet):
         customer = self.get_object()
         return Response(CustomerSerializer(customer).data["escalation_contacts"])
 
-class ContractViewSet(viewsets.ModelViewSet):
+class ContractViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = Contract.objects.all()
     serializer_class = ContractSerializer
 
@@ -29,7 +30,7 @@ class ContractViewSet(viewsets.ModelViewSet):
         contract = self.get_object()
         return Response(ContractSerializer(contract).data["penalty_clauses"])
 
-class VendorViewSet(viewsets.ModelViewSet):
+class VendorViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = Vendor.objects.all()
     serializer_class = VendorSerializer
 
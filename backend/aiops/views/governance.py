@@ -4,8 +4,9 @@ from rest_framework.response import Response
 from datetime import date
 from ..models.governance import OperationalCategory, ChangeRequest, RiskRegister
 from ..serializers.governance import OperationalCategorySerializer, ChangeRequestSerializer, RiskRegisterSerializer
+from .mixins import EagerLoadingViewSetMixin
 
-class OperationalCategoryViewSet(viewsets.ModelViewSet):
+class OperationalCategoryViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = OperationalCategory.objects.all()
     serializer_class = OperationalCategorySerializer
 
@@ -14,22 +15,22 @@ class OperationalCategoryViewSet(viewsets.ModelViewSet):
         category = self.get_object()
         return Response(category.sla_override or {})
 
-class ChangeRequestViewSet(viewsets.ModelViewSet):
+class ChangeRequestViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = ChangeRequest.objects.all()
     serializer_class = ChangeRequestSerializer
 
     @action(detail=False, methods=["get"])
     def upcoming(self, request):
-        qs = self.queryset.filter(scheduled_start__gte=date.today()).order_by("scheduled_start")
+        qs = self.get_queryset().filter(scheduled_start__gte=date.today()).order_by("scheduled_start")
         return Response(ChangeRequestSerializer(qs, many=True).data)
 
-class RiskRegisterViewSet(viewsets.ModelViewSet):
+class RiskRegisterViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = RiskRegister.objects.all()
     serializer_class = RiskRegisterSerializer
 
     @action(detail=False, methods=["get"])
     def open_risks(self, request):
-        qs = self.queryset.filter(status="open")
+        qs = self.get_queryset().filter(status="open")
         return Response({"open_count": qs.count(), "risks": RiskRegisterSerializer(qs, many=True).data})
 
     @action(detail=True, methods=["get"])
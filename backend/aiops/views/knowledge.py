@@ -1,35 +1,87 @@
 from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
-from django.db.models import Avg
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast, NullIf
 from ..models.knowledge import KnowledgeBaseArticle, KnowledgeFeedback
 from ..serializers.knowledge import KnowledgeBaseArticleSerializer, KnowledgeFeedbackSerializer
+from ..services.counters import increment, pending
+from ..services.kb_search import search_articles, work_type_filter
+from .logs import parse_uuid
+from .mixins import EagerLoadingViewSetMixin
 
-class KnowledgeBaseArticleViewSet(viewsets.ModelViewSet):
+# Results returned by search when no limit is given, and the most it will return
+SEARCH_DEFAULT_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+# Orderings for search without a query; both read stored columns only
+AVERAGE_RATING = Cast(F("rating_sum"), FloatField()) / NullIf(F("rating_count"), 0)
+SEARCH_ORDERINGS = {
+    "views": ("-view_count", "title"),
+    "rating": (AVERAGE_RATING.desc(nulls_last=True), "-rating_count", "title"),
+}
+
+class KnowledgeBaseArticleViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = KnowledgeBaseArticle.objects.all()
     serializer_class = KnowledgeBaseArticleSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        # Buffered, so readers of a popular article don't queue on its row
+        increment(KnowledgeBaseArticle, response.data["id"], "view_count")
+        return response
+
     @action(detail=False, methods=["get"])
     def search(self, request):
-        qs = self.queryset
-        work_type = request.query_params.get("work_type")
-        keyword = request.query_params.get("keyword")
-        if work_type:
-            qs = qs.filter(applicable_work_types__contains=[work_type])
-        if keyword:
-            qs = qs.filter(title__icontains=keyword) | qs.filter(content__icontains=keyword)
-        return Response(KnowledgeBaseArticleSerializer(qs, many=True).data)
+        params = request.query_params
+        # `keyword` is the parameter's old name
+        query = params.get("q") or params.get("keyword")
+        work_type = params.get("work_type")
+        try:
+            limit = min(int(params.get("limit", SEARCH_DEFAULT_LIMIT)), MAX_SEARCH_LIMIT)
+            tenant_id = parse_uuid(params.get("tenant_id"), "tenant_id")
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        if limit < 1:
+            return Response({"error": "limit must be at least 1"}, status=400)
+        if not query:
+            # No query: the articles for a work type, most viewed (or ?sort=rating, best rated) first
+            ordering = SEARCH_ORDERINGS.get(params.get("sort", "views"))
+            if ordering is None:
+                return Response({"error": f"sort must be one of: {', '.join(SEARCH_ORDERINGS)}"}, status=400)
+            articles = self.get_queryset()
+            if work_type:
+                articles = articles.filter(work_type_filter(work_type))
+            if tenant_id:
+                articles = articles.filter(tenant_id=tenant_id)
+            return Response([self.result(article) for article in articles.order_by(*ordering)[:limit]])
+        try:
+            hits = search_articles(query, limit=limit, work_type=work_type, tenant_id=tenant_id)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        return Response([self.result(article, score, snippet) for article, score, snippet in hits])
+
+    @staticmethod
+    def result(article, score=None, snippet=None):
+        return {
+            "id": article.id, "title": article.title, "knowledge_type": article.knowledge_type,
+            "difficulty_level": article.difficulty_level, "tags": article.tags,
+            "applicable_work_types": article.applicable_work_types, "average_rating": article.average_rating,
+            "rating_count": article.rating_count, "score": score, "snippet": snippet,
+        }
 
     @action(detail=True, methods=["get"])
     def stats(self, request, pk=None):
-        article = self.get_object()
-        avg_rating = article.feedback.aggregate(Avg("rating"))["rating__avg"]
+        # Stored totals only: none of the serializer's eager loading is needed
+        articles = self.get_queryset().prefetch_related(None).only("id", "view_count", "rating_count", "rating_sum", "rating_distribution")
+        article = get_object_or_404(articles, pk=pk)
         return Response({
-            "view_count": article.view_count,
-            "feedback_count": article.feedback.count(),
-            "average_rating": round(avg_rating or 0, 2)
+            "view_count": article.view_count + pending(KnowledgeBaseArticle, article.pk, "view_count"),
+            "feedback_count": article.rating_count,
+            "average_rating": article.average_rating,
+            "rating_distribution": article.rating_distribution,
         })
 
-class KnowledgeFeedbackViewSet(viewsets.ModelViewSet):
+class KnowledgeFeedbackViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = KnowledgeFeedback.objects.all()
     serializer_class = KnowledgeFeedbackSerializer
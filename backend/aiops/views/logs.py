@@ -1,26 +1,152 @@
+import copy
+import uuid
+from datetime import timedelta, timezone
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Count
-from ..models.logs import SystemLog, SystemLogCorrelation
-from ..serializers.logs import SystemLogSerializer, SystemLogCorrelationSerializer
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_aware, make_aware, now
+from ..models.logs import SystemLog, SystemLogCorrelation, LogRetentionPolicy, LogTemplate
+from ..serializers.logs import SystemLogSerializer, SystemLogCorrelationSerializer, LogRetentionPolicySerializer, LogTemplateSerializer
+from ..parsers import NDJSONParser
+from ..services.log_correlation import CORRELATION_WINDOW
+from ..services.log_counters import count_logs, log_stats
+from ..services.log_ingest import ingest_logs, INGEST_BATCH_SIZE
+from ..services.log_search import search_logs, group_by_template, describe_templates
+from .mixins import EagerLoadingViewSetMixin
 
-class SystemLogViewSet(viewsets.ModelViewSet):
+# Search window when no start is given, and the largest page of hits
+SEARCH_DEFAULT_SPAN = timedelta(days=7)
+MAX_SEARCH_PAGE_SIZE = 200
+# Templates listed by stats?group_by=template
+MAX_STAT_TEMPLATES = 50
+# SystemLog fields its counters are keyed or weighted on
+COUNTED_FIELDS = ("tenant_id", "timestamp", "level", "category", "source", "template_id", "occurrences")
+
+def parse_time_range(params, default_span):
+    """(start, end) from ISO 8601 start/end query params; end defaults to now."""
+    try:
+        end = parse_datetime(params["end"]) if params.get("end") else now()
+        start = parse_datetime(params["start"]) if params.get("start") else end and end - default_span
+    except ValueError:
+        start = end = None
+    if start is None or end is None:
+        raise ValueError("start and end must be ISO 8601 datetimes")
+    return tuple(at if is_aware(at) else make_aware(at, timezone.utc) for at in (start, end))
+
+def parse_uuid(value, name):
+    try:
+        return uuid.UUID(value) if value else None
+    except ValueError:
+        raise ValueError(f"{name} must be a UUID")
+
+class SystemLogViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = SystemLog.objects.all().order_by("-timestamp")
     serializer_class = SystemLogSerializer
 
+    # The counters keep counting logs that retention deletes, so edits and deletes
+    # through the API take their logs back out here rather than in a delete signal
+    def perform_update(self, serializer):
+        before = copy.copy(serializer.instance)
+        with transaction.atomic():
+            log = serializer.save()
+            if any(getattr(before, field) != getattr(log, field) for field in COUNTED_FIELDS):
+                count_logs([before], sign=-1)
+                count_logs([log])
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            count_logs([instance], sign=-1)
+
+    @action(detail=False, methods=["post"], parser_classes=[NDJSONParser])
+    def ingest(self, request):
+        try:
+            batch_size = min(int(request.query_params.get("batch_size", INGEST_BATCH_SIZE)), INGEST_BATCH_SIZE)
+        except ValueError:
+            return Response({"error": "batch_size must be an integer"}, status=400)
+        if batch_size < 1:
+            return Response({"error": "batch_size must be positive"}, status=400)
+        try:
+            tenant_id = parse_uuid(request.query_params.get("tenant_id"), "tenant_id")
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        # An empty body parses to an empty dict rather than a line iterator
+        lines = request.data if not isinstance(request.data, dict) else ()
+        return Response(ingest_logs(lines, batch_size=batch_size, tenant_id=tenant_id))
+
     @action(detail=False, methods=["get"])
     def stats(self, request):
-        counts_by_level = SystemLog.objects.values("level").annotate(total=Count("id"))
-        counts_by_category = SystemLog.objects.values("category").annotate(total=Count("id"))
-        return Response({"by_level": list(counts_by_level), "by_category": list(counts_by_category)})
+        try:
+            start, end = parse_time_range(request.query_params, timedelta(hours=24))
+            tenant_id = parse_uuid(request.query_params.get("tenant_id"), "tenant_id")
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        templates = MAX_STAT_TEMPLATES if request.query_params.get("group_by") == "template" else 0
+        return Response(log_stats(start, end, tenant_id=tenant_id, templates=templates))
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        params = request.query_params
+        try:
+            # Without an explicit start, search the last week so old partitions are skipped
+            start, end = parse_time_range(params, SEARCH_DEFAULT_SPAN)
+            tenant_id = parse_uuid(params.get("tenant_id"), "tenant_id")
+            asset_id = parse_uuid(params.get("asset"), "asset")
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        try:
+            page = int(params.get("page", 1))
+            page_size = min(int(params.get("page_size", 50)), MAX_SEARCH_PAGE_SIZE)
+        except ValueError:
+            return Response({"error": "page and page_size must be integers"}, status=400)
+        if page < 1 or page_size < 1:
+            return Response({"error": "page and page_size must be positive"}, status=400)
+        logs = SystemLog.objects.filter(timestamp__gte=start, timestamp__lt=end)
+        if params.get("level"):
+            logs = logs.filter(level__in=params["level"].split(","))
+        if params.get("source"):
+            logs = logs.filter(source=params["source"])
+        if asset_id:
+            logs = logs.filter(asset_id=asset_id)
+        if tenant_id:
+            logs = logs.filter(tenant_id=tenant_id)
+        try:
+            hits = search_logs(params.get("q"), logs)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        if params.get("group_by") == "template":
+            hits = group_by_template(hits)
+        # One row past the page tells whether another page exists, without a COUNT
+        rows = list(hits[(page - 1) * page_size:page * page_size + 1])
+        if params.get("group_by") == "template":
+            results = describe_templates(rows[:page_size])
+        else:
+            results = [{**SystemLogSerializer(log).data, "rank": log.rank} for log in rows[:page_size]]
+        return Response({"query": params.get("q"), "page": page, "page_size": page_size, "has_more": len(rows) > page_size, "results": results})
 
-class SystemLogCorrelationViewSet(viewsets.ReadOnlyModelViewSet):
+class LogTemplateViewSet(EagerLoadingViewSetMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = LogTemplate.objects.all().order_by("-last_seen")
+    serializer_class = LogTemplateSerializer
+
+class SystemLogCorrelationViewSet(EagerLoadingViewSetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = SystemLogCorrelation.objects.all()
     serializer_class = SystemLogCorrelationSerializer
 
     @action(detail=True, methods=["get"])
     def logs(self, request, pk=None):
         correlation = self.get_object()
-        logs = SystemLog.objects.filter(correlation_id=correlation.correlation_id).order_by("timestamp")
+        logs = SystemLog.objects.filter(correlation_id=correlation.correlation_id)
+        if correlation.window_start:
+            # Bounding the window lets PostgreSQL read a single partition
+            logs = logs.filter(
+                timestamp__gte=correlation.window_start,
+                timestamp__lt=correlation.window_start + timedelta(seconds=CORRELATION_WINDOW),
+            )
+        logs = logs.order_by("timestamp")
         return Response(SystemLogSerializer(logs, many=True).data)
+
+class LogRetentionPolicyViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
+    queryset = LogRetentionPolicy.objects.all()
+    serializer_class = LogRetentionPolicySerializer
@@ -0,0 +1,11 @@
+# Shared viewset behaviour
+
+class EagerLoadingViewSetMixin:
+    """Applies the serializer's eager loading (see EagerLoadingMixin) to every queryset the viewset reads."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer = self.get_serializer()
+        if hasattr(serializer, "setup_eager_loading"):
+            queryset = serializer.setup_eager_loading(queryset)
+        return queryset
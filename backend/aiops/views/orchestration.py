@@ -4,7 +4,10 @@ from rest_framework import status
 from ..tasks.sla_checks import run_sla_checks
 from ..tasks.escalation_jobs import notify_escalation
 from ..tasks.compliance_checks import run_compliance_checks
-from ..tasks.metric_rollups import daily_rollup
+from ..tasks.metric_rollups import daily_rollup, rollup_range
+
+# Days a rollup may cover and still run inside the request
+MAX_INLINE_ROLLUP_DAYS = 7
 
 class RunSLAChecksView(APIView):
     def post(self, request):
@@ -22,10 +25,19 @@ class NotifyEscalationView(APIView):
 
 class RunComplianceChecksView(APIView):
     def post(self, request):
-        result = run_compliance_checks()
-        return Response({"expired": result}, status=status.HTTP_200_OK)
+        return Response(run_compliance_checks(), status=status.HTTP_200_OK)
 
 class RunMetricRollupView(APIView):
     def post(self, request):
-        daily_rollup()
-        return Response({"message": "Metric rollup triggered"}, status=status.HTTP_200_OK)
+        try:
+            start, end = rollup_range(request.data.get("start_date"), request.data.get("end_date"))
+        except (TypeError, ValueError):
+            return Response({"error": "start_date and end_date must be ISO dates"}, status=400)
+        if start > end:
+            return Response({"error": "start_date must not be after end_date"}, status=400)
+        # Backfills longer than a few days go to a worker instead of holding the request
+        if (end - start).days >= MAX_INLINE_ROLLUP_DAYS:
+            task = daily_rollup.delay(start.isoformat(), end.isoformat())
+            return Response({"message": "Metric rollup queued", "task_id": task.id}, status=status.HTTP_202_ACCEPTED)
+        written = daily_rollup(start.isoformat(), end.isoformat())
+        return Response({"message": "Metric rollup triggered", "metrics_written": written}, status=status.HTTP_200_OK)
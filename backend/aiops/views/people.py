@@ -3,8 +3,9 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from ..models.core import ExternalUser, Team, TeamMembership
 from ..serializers.people import ExternalUserSerializer, TeamSerializer, TeamMembershipSerializer
+from .mixins import EagerLoadingViewSetMixin
 
-class ExternalUserViewSet(viewsets.ModelViewSet):
+class ExternalUserViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = ExternalUser.objects.all()
     serializer_class = ExternalUserSerializer
 
@@ -12,14 +13,14 @@ class ExternalUserViewSet(viewsets.ModelViewSet):
     def search(self, request):
         skill = request.query_params.get("skill")
         cert = request.query_params.get("certification")
-        qs = self.queryset
+        qs = self.get_queryset()
         if skill:
             qs = qs.filter(skills__contains=[skill])
         if cert:
             qs = qs.filter(certifications__contains=[cert])
         return Response(ExternalUserSerializer(qs, many=True).data)
 
-class TeamViewSet(viewsets.ModelViewSet):
+class TeamViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = Team.objects.all()
     serializer_class = TeamSerializer
 
@@ -28,6 +29,6 @@ class TeamViewSet(viewsets.ModelViewSet):
         team = self.get_object()
         return Response(team.workload_summary or {})
 
-class TeamMembershipViewSet(viewsets.ModelViewSet):
+class TeamMembershipViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = TeamMembership.objects.all()
     serializer_class = TeamMembershipSerializer
@@ -3,8 +3,9 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from ..models.services import BusinessService
 from ..serializers.services import BusinessServiceSerializer
+from .mixins import EagerLoadingViewSetMixin
 
-class BusinessServiceViewSet(viewsets.ModelViewSet):
+class BusinessServiceViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = BusinessService.objects.all()
     serializer_class = BusinessServiceSerializer
 
@@ -0,0 +1,97 @@
+import asyncio
+import json
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_aware, make_aware, now
+from rest_framework.utils.encoders import JSONEncoder
+from ..models.logs import SystemLog
+from ..serializers.logs import SystemLogSerializer
+from .logs import parse_uuid
+
+# Seconds between polls while the tail is caught up, and rows sent per poll
+TAIL_POLL_INTERVAL = 1.0
+TAIL_BATCH_SIZE = 200
+# Idle seconds before a keepalive comment, and the lifetime of one stream; clients
+# reconnect with Last-Event-ID and pick up where they left off
+TAIL_HEARTBEAT = 15
+TAIL_MAX_DURATION = 900
+# Rows can commit slightly out of created_at order (a batch is stamped before it is
+# inserted), so each poll looks back this far and skips the rows already sent
+TAIL_SETTLE = timedelta(seconds=5)
+
+async def log_tail(request):
+    """
+    Server-sent events stream of new SystemLogs for a work_item, asset or source
+    (plus optional level and tenant_id filters), oldest first. Each event's id is
+    the log's created_at: reconnecting with Last-Event-ID, or passing `since`,
+    resumes after it. Without either the stream starts from now.
+    """
+    # require_GET can't wrap coroutine views before Django 5.0
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    params = request.GET
+    try:
+        filters = {
+            "work_item_id": parse_uuid(params.get("work_item"), "work_item"),
+            "asset_id": parse_uuid(params.get("asset"), "asset"),
+            "source": params.get("source") or None,
+            "tenant_id": parse_uuid(params.get("tenant_id"), "tenant_id"),
+        }
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    if not (filters["work_item_id"] or filters["asset_id"] or filters["source"]):
+        return JsonResponse({"error": "work_item, asset or source required"}, status=400)
+    since = request.headers.get("Last-Event-ID") or params.get("since")
+    if since:
+        since = parse_datetime(since)
+        if since is None:
+            return JsonResponse({"error": "since must be an ISO 8601 datetime"}, status=400)
+        since = since if is_aware(since) else make_aware(since)
+    logs = SystemLog.objects.filter(**{name: value for name, value in filters.items() if value})
+    if params.get("level"):
+        logs = logs.filter(level__in=params["level"].split(","))
+    response = StreamingHttpResponse(tail_events(logs, since or now()), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Keep reverse proxies from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+async def tail_events(logs, since, max_duration=TAIL_MAX_DURATION):
+    """
+    Yield SSE chunks for rows of `logs` created after `since`. Nothing is buffered
+    ahead of the client: the next poll only runs once the previous chunk has been
+    handed to the server, so a slow reader slows the polling instead of piling up
+    memory.
+    """
+    cursor, sent = since, {}
+    deadline = asyncio.get_running_loop().time() + max_duration
+    idle = 0.0
+    yield f"retry: {int(TAIL_POLL_INTERVAL * 1000)}\n\n"
+    while asyncio.get_running_loop().time() < deadline:
+        rows, cursor = await sync_to_async(_poll)(logs, since, cursor, sent)
+        if rows:
+            idle = 0.0
+            yield "".join(
+                f"id: {created_at.isoformat()}\nevent: log\ndata: {json.dumps(data, cls=JSONEncoder)}\n\n"
+                for created_at, data in rows
+            )
+            if len(rows) == TAIL_BATCH_SIZE:
+                continue
+        elif idle >= TAIL_HEARTBEAT:
+            idle = 0.0
+            yield ": keepalive\n\n"
+        await asyncio.sleep(TAIL_POLL_INTERVAL)
+        idle += TAIL_POLL_INTERVAL
+
+def _poll(logs, since, cursor, sent):
+    floor = max(since, cursor - TAIL_SETTLE)
+    batch = list(logs.filter(created_at__gt=floor).exclude(id__in=list(sent)).order_by("created_at", "id")[:TAIL_BATCH_SIZE])
+    for log in batch:
+        sent[log.id] = log.created_at
+        cursor = max(cursor, log.created_at)
+    for log_id, created_at in list(sent.items()):
+        if created_at <= cursor - TAIL_SETTLE:
+            del sent[log_id]
+    return [(log.created_at, SystemLogSerializer(log).data) for log in batch], cursor
@@ -1,20 +1,37 @@
 from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 from ..models.workitems import WorkItem, WorkItemCommunication, WorkItemVendorOrder, WorkItemChangeRelation
 from ..models.analytics import FinancialImpact
+from ..models.logs import SystemLog
+from ..models.knowledge import KnowledgeBaseArticle
 from ..serializers.workitems import (
     WorkItemSerializer, WorkItemCommunicationSerializer, WorkItemVendorOrderSerializer,
     WorkItemChangeRelationSerializer, FinancialImpactSerializer
 )
-from ..services.itsm_schema import validate_status, get_sla_target
+from ..serializers.logs import SystemLogSerializer
+from ..services.itsm_schema import validate_status, get_sla_target, CLOSED_STATUSES
 from ..services.escalation import get_escalation_target
 from ..services.impact import calculate_business_impact
-from ..services.automation_engine import is_work_item_eligible_for_automation
+from ..services.automation_engine import get_rule_index, automation_attributes
+from ..services.scoring import smart_queue
+from ..services.similarity import similar_to
+from ..pagination import WorkItemCursorPagination
+from .logs import parse_uuid
+from .mixins import EagerLoadingViewSetMixin
 
-class WorkItemViewSet(viewsets.ModelViewSet):
+# Most logs the "System Logs" tab loads at once
+MAX_CORRELATED_LOGS = 1000
+# Most neighbours of each kind the similar action returns
+MAX_SIMILAR = 20
+# Most items the smart queue ranks in one response
+MAX_SMART_QUEUE = 500
+
+class WorkItemViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = WorkItem.objects.all()
     serializer_class = WorkItemSerializer
+    pagination_class = WorkItemCursorPagination
 
     @action(detail=True, methods=["post"])
     def update_status(self, request, pk=None):
@@ -48,9 +65,60 @@ class WorkItemViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["get"])
     def automation_eligibility(self, request, pk=None):
         wi = self.get_object()
-        eligible_rules = []
-        from ..models.automation import AutomationRule
-        for rule in AutomationRule.objects.all():
-            if is_work_item_eligible_for_automation(wi, rule):
-                eligible_rules.append(rule.id)
-        return Response({"eligible_rules": eligible_rules})
+        return Response({"eligible_rules": get_rule_index().match(*automation_attributes(wi))})
+
+    @action(detail=True, methods=["get"])
+    def logs(self, request, pk=None):
+        # Only the id is needed; skip the serializer's eager loading
+        wi = get_object_or_404(WorkItem.objects.only("id"), pk=pk)
+        try:
+            limit = min(int(request.query_params.get("limit", 200)), MAX_CORRELATED_LOGS)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=400)
+        if limit < 1:
+            return Response({"error": "limit must be at least 1"}, status=400)
+        # Every log sharing a correlation group with one of the item's own logs
+        correlated = SystemLog.objects.filter(
+            correlation_id__in=SystemLog.objects.filter(work_item=wi).values("correlation_id")
+        ).order_by("-timestamp")[:limit]
+        return Response(SystemLogSerializer(correlated, many=True).data)
+
+    @action(detail=True, methods=["get"])
+    def similar(self, request, pk=None):
+        wi = get_object_or_404(WorkItem.objects.only("id", "tenant_id", "title", "description"), pk=pk)
+        try:
+            limit = min(int(request.query_params.get("limit", 5)), MAX_SIMILAR)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=400)
+        if limit < 1:
+            return Response({"error": "limit must be at least 1"}, status=400)
+        incidents, articles = similar_to(wi, limit=limit)
+        # The index may lag a delete; drop neighbours that no longer exist
+        found_items = WorkItem.objects.only("id", "title", "status", "work_type").in_bulk([pk for pk, _ in incidents])
+        found_articles = KnowledgeBaseArticle.objects.only("id", "title", "knowledge_type").in_bulk([pk for pk, _ in articles])
+        return Response({
+            "incidents": [
+                {"id": item_id, "title": found_items[item_id].title, "status": found_items[item_id].status, "similarity": round(score, 4)}
+                for item_id, score in incidents if item_id in found_items
+            ],
+            "articles": [
+                {"id": article_id, "title": found_articles[article_id].title, "knowledge_type": found_articles[article_id].knowledge_type, "similarity": round(score, 4)}
+                for article_id, score in articles if article_id in found_articles
+            ],
+        })
+
+    @action(detail=False, methods=["get"], url_path="smart-queue")
+    def smart_queue(self, request):
+        params = request.query_params
+        try:
+            limit = min(int(params.get("limit", 50)), MAX_SMART_QUEUE)
+            user_id = parse_uuid(params.get("user_id"), "user_id")
+            tenant_id = parse_uuid(params.get("tenant_id"), "tenant_id")
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        if limit < 1:
+            return Response({"error": "limit must be at least 1"}, status=400)
+        qs = self.get_queryset().exclude(status__in=CLOSED_STATUSES)
+        if tenant_id:
+            qs = qs.filter(tenant_id=tenant_id)
+        return Response(smart_queue(qs, limit=limit, current_user_id=user_id))
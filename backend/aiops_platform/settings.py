@@ -61,9 +61,54 @@ DATABASES = {
     }
 }
 
+# Cache shared by web and worker processes (e.g. for cache invalidation); per-process memory if unset
+if os.getenv("CACHE_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("CACHE_URL"),
+        }
+    }
+
 # Celery
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
+CELERY_BEAT_SCHEDULE = {
+    "run-sla-checks": {"task": "aiops.tasks.sla_checks.run_sla_checks", "schedule": 60.0},
+    "daily-metric-rollup": {"task": "aiops.tasks.metric_rollups.daily_rollup", "schedule": 3600.0},
+    "rescore-sla-bands": {"task": "aiops.tasks.smart_scores.rescore_sla_bands", "schedule": 60.0},
+    "maintain-system-logs": {"task": "aiops.tasks.log_maintenance.maintain_system_logs", "schedule": 3600.0},
+    "compact-system-log-counters": {"task": "aiops.tasks.log_maintenance.compact_system_log_counters", "schedule": 300.0},
+    "rebuild-similarity-indexes": {"task": "aiops.tasks.similarity.rebuild_similarity_indexes", "schedule": 86400.0},
+    "downsample-analytics-metrics": {"task": "aiops.tasks.metric_rollups.downsample_analytics_metrics", "schedule": 60.0},
+    "flush-counters": {"task": "aiops.tasks.counters.flush_counters", "schedule": 10.0},
+}
+
+# SystemLog retention for tenants without a LogRetentionPolicy; "archive" keeps expired
+# partitions as detached tables instead of dropping them (PostgreSQL only)
+SYSTEMLOG_RETENTION_DAYS = int(os.getenv("SYSTEMLOG_RETENTION_DAYS", "30"))
+SYSTEMLOG_RETENTION_ACTION = os.getenv("SYSTEMLOG_RETENTION_ACTION", "drop")
+# Seconds within which bulk ingest folds repeated logs into one counted row; 0 disables
+SYSTEMLOG_COLLAPSE_WINDOW = int(os.getenv("SYSTEMLOG_COLLAPSE_WINDOW", "60"))
+
+# Days raw AnalyticsMetric samples are kept; their 1m/1h/1d rollups outlive them. 0 keeps them all
+ANALYTICS_METRIC_RETENTION_DAYS = int(os.getenv("ANALYTICS_METRIC_RETENTION_DAYS", "0"))
+
+# Memory-mapped vector files behind the similar incidents / suggested articles lookups;
+# every web and worker process must see the same directory
+SIMILARITY_INDEX_DIR = os.getenv("SIMILARITY_INDEX_DIR", str(BASE_DIR / "var" / "similarity"))
+
+# Hot counters (e.g. article views) are buffered per process by default, flushed as batched
+# updates once that process counts after COUNTER_FLUSH_INTERVAL seconds or exits: idle
+# processes hold views, killed ones lose them. Set a Redis URL to share one buffer between
+# every process instead, also written out by the beat task
+COUNTER_BUFFER_URL = os.getenv("COUNTER_BUFFER_URL", "")
+COUNTER_FLUSH_INTERVAL = float(os.getenv("COUNTER_FLUSH_INTERVAL", "10"))
+COUNTER_MAX_PENDING = int(os.getenv("COUNTER_MAX_PENDING", "1000"))
+
+# Automation runner: threads per parallel step group, default per-step timeout (seconds)
+AUTOMATION_MAX_WORKERS = int(os.getenv("AUTOMATION_MAX_WORKERS", "4"))
+AUTOMATION_STEP_TIMEOUT = float(os.getenv("AUTOMATION_STEP_TIMEOUT", "30"))
 
 LANGUAGE_CODE = "en-us"
 TIME_ZONE = "UTC"